@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Log de accesos y métricas del servidor estático
+El hilo que atiende la petición solo encola una tupla; un hilo aparte da
+formato y escribe por lotes. Las métricas (latencia por ruta, bytes,
+aciertos de caché, conexiones) se exponen en formato Prometheus en /metrics
+"""
+
+import atexit
+import bisect
+import json
+import os
+import posixpath
+import queue
+import random
+import sys
+import threading
+import time
+
+from asset_cache import normalize_url_path
+
+METRICS_PATH = "/metrics"
+
+# Entradas pendientes como máximo; si el escritor no da abasto se descartan
+QUEUE_SIZE = 4096
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 1.0
+
+# Los errores y las peticiones lentas se registran siempre, sin muestreo
+SLOW_REQUEST_MS = 500
+
+# Límites (segundos) del histograma de latencia
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def route_label(url_path, status):
+    """Agrupa rutas para que las métricas tengan pocas series
+
+    static/js/main.d10c6229.js -> /static/js; las rutas del SPA -> spa;
+    el resto de archivos por extensión. Las respuestas de error van a
+    "unmatched" para que rutas inventadas no creen series nuevas.
+    """
+    path = normalize_url_path(url_path)
+    if "/" + path == METRICS_PATH:
+        return METRICS_PATH
+    if status >= 400:
+        return "unmatched"
+    if path == "index.html":
+        return "/"
+    if path.startswith("static/"):
+        parts = path.split("/", 2)
+        return "/static/" + parts[1] if len(parts) == 3 else "/static"
+    extension = posixpath.splitext(path)[1]
+    return "*" + extension if extension else "spa"
+
+
+class AccessLog:
+    """Log de accesos asíncrono con muestreo y escritura por lotes
+
+    sample_rate es la fracción de respuestas correctas que se registran;
+    fmt es "json" (una línea JSON por petición) o "text".
+    """
+
+    def __init__(self, stream=None, sample_rate=1.0, fmt="json"):
+        self.stream = stream or sys.stdout
+        self.sample_rate = sample_rate
+        self.fmt = fmt
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="neopilot-access-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, client, method, path, status, size, duration_ms, source):
+        """Encola una petición; no bloquea nunca al hilo del servidor"""
+        if status < 400 and duration_ms < SLOW_REQUEST_MS and self.sample_rate < 1.0:
+            if random.random() >= self.sample_rate:
+                return
+        try:
+            self._queue.put_nowait((time.time(), client, method, path, status, size, duration_ms, source))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=1.0):
+        """Escribe lo pendiente y detiene el hilo escritor"""
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                entry = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while entry is not None:
+                batch.append(entry)
+                if len(batch) >= BATCH_SIZE:
+                    break
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            if entry is None:
+                return
+
+    def _write(self, batch):
+        lines = [self._format(entry) for entry in batch]
+        try:
+            self.stream.write("".join(lines))
+            self.stream.flush()
+            self.written += len(lines)
+        except (OSError, ValueError):
+            self.dropped += len(lines)
+
+    def _format(self, entry):
+        ts, client, method, path, status, size, duration_ms, source = entry
+        if self.fmt == "text":
+            return f"🌐 {client} {method} {path} {status} {size}B {duration_ms:.1f}ms {source or '-'}\n"
+        return json.dumps({
+            "ts": round(ts, 3), "client": client, "method": method, "path": path,
+            "status": status, "bytes": size, "ms": round(duration_ms, 2), "source": source,
+        }, separators=(",", ":")) + "\n"
+
+
+def access_log_from_env(default="off", default_format="json"):
+    """AccessLog según NEOPILOT_ACCESS_LOG ("-" stdout, ruta de archivo u "off")
+
+    NEOPILOT_ACCESS_LOG_SAMPLE fija la fracción de respuestas correctas
+    que se registran y NEOPILOT_ACCESS_LOG_FORMAT el formato.
+    """
+    target = os.environ.get("NEOPILOT_ACCESS_LOG", default)
+    if not target or target == "off":
+        return None
+
+    try:
+        sample_rate = min(max(float(os.environ.get("NEOPILOT_ACCESS_LOG_SAMPLE", "1")), 0.0), 1.0)
+    except ValueError:
+        sample_rate = 1.0
+    fmt = os.environ.get("NEOPILOT_ACCESS_LOG_FORMAT", default_format)
+
+    if target == "-":
+        return AccessLog(sys.stdout, sample_rate, fmt)
+    try:
+        stream = open(target, "a", buffering=64 * 1024)
+    except OSError as e:
+        print(f"⚠️  No se pudo abrir el log de accesos {target}: {e}")
+        return None
+    return AccessLog(stream, sample_rate, fmt)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class HTTPMetrics:
+    """Contadores del servidor HTTP en formato de exposición de Prometheus"""
+
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.bytes_sent = {}
+        self.sources = {}
+        self.connections_total = 0
+        self._lock = threading.Lock()
+
+    def connection_opened(self):
+        with self._lock:
+            self.connections_total += 1
+
+    def observe(self, route, method, status, size, duration_s, source):
+        """Registra una petición terminada (llamado desde el hilo del servidor)"""
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent[route] = self.bytes_sent.get(route, 0) + size
+            if source:
+                self.sources[source] = self.sources.get(source, 0) + 1
+
+            histogram = self.latency.get(route)
+            if histogram is None:
+                histogram = self.latency[route] = _Histogram()
+            histogram.counts[bisect.bisect_left(LATENCY_BUCKETS, duration_s)] += 1
+            histogram.total += duration_s
+            histogram.count += 1
+
+    def render(self, server=None):
+        """Texto para /metrics; `server` aporta conexiones activas y el caché"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if labels:
+                    label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}")
+                else:
+                    lines.append(f"{name} {value}")
+
+        with self._lock:
+            requests = sorted(self.requests.items())
+            bytes_sent = sorted(self.bytes_sent.items())
+            sources = sorted(self.sources.items())
+            latency = [(route, list(h.counts), h.total, h.count) for route, h in sorted(self.latency.items())]
+            connections_total = self.connections_total
+
+        metric("neopilot_http_requests_total", "counter", "Peticiones HTTP atendidas",
+               [((("route", r), ("method", m), ("status", s)), n) for (r, m, s), n in requests])
+
+        lines.append("# HELP neopilot_http_request_duration_seconds Latencia de las peticiones por ruta")
+        lines.append("# TYPE neopilot_http_request_duration_seconds histogram")
+        for route, counts, total, count in latency:
+            route_text = _label(route)
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'neopilot_http_request_duration_seconds_bucket{{route="{route_text}",le="{bound}"}} {cumulative}')
+            lines.append(f'neopilot_http_request_duration_seconds_bucket{{route="{route_text}",le="+Inf"}} {count}')
+            lines.append(f'neopilot_http_request_duration_seconds_sum{{route="{route_text}"}} {total:.6f}')
+            lines.append(f'neopilot_http_request_duration_seconds_count{{route="{route_text}"}} {count}')
+
+        metric("neopilot_http_response_bytes_total", "counter", "Bytes de cuerpo enviados por ruta",
+               [((("route", r),), n) for r, n in bytes_sent])
+        metric("neopilot_http_responses_by_source_total", "counter",
+               "Respuestas por origen del contenido (pack, memory o disk)",
+               [((("source", s),), n) for s, n in sources])
+        metric("neopilot_http_connections_total", "counter", "Conexiones TCP aceptadas",
+               [((), connections_total)])
+
+        if server is not None:
+            active, in_flight = server.connection_counts()
+            metric("neopilot_http_connections_active", "gauge", "Conexiones abiertas (incluye keep-alive)",
+                   [((), active)])
+            metric("neopilot_http_requests_in_flight", "gauge", "Peticiones en curso", [((), in_flight)])
+
+            cache = getattr(server, "asset_cache", None)
+            if cache is not None:
+                stats = cache.stats()
+                lookups = stats["hits"] + stats["misses"]
+                cache_labels = (("cache", getattr(cache, "source", "memory")),)
+                metric("neopilot_asset_cache_hits_total", "counter", "Aciertos del caché de assets",
+                       [(cache_labels, stats["hits"])])
+                metric("neopilot_asset_cache_misses_total", "counter", "Fallos del caché de assets",
+                       [(cache_labels, stats["misses"])])
+                metric("neopilot_asset_cache_hit_ratio", "gauge", "Fracción de aciertos del caché de assets",
+                       [(cache_labels, round(stats["hits"] / lookups, 4) if lookups else 0)])
+                metric("neopilot_asset_cache_bytes", "gauge", "Bytes en el caché de assets",
+                       [(cache_labels, stats["bytes"])])
+
+            access_log = getattr(server, "access_log", None)
+            if access_log is not None:
+                metric("neopilot_access_log_dropped_total", "counter",
+                       "Entradas del log de accesos descartadas por cola llena",
+                       [((), access_log.dropped)])
+
+        return "\n".join(lines) + "\n"
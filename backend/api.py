@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - API REST local
+Endpoints para el frontend del kiosko con consultas agrupadas en un solo
+round trip, caché con TTL e invalidación explícita, y coalescencia de
+peticiones concurrentes sobre la misma sonda (single-flight)
+"""
+
+import os
+import sys
+
+from flask import Flask, jsonify, request
+
+from probes import create_registry, telemetry_history
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5000
+
+
+def create_app(registry=None):
+    app = Flask(__name__)
+    registry = registry or create_registry()
+    app.config["REGISTRY"] = registry
+
+    @app.after_request
+    def add_cors_headers(response):
+        response.headers["Access-Control-Allow-Origin"] = "*"
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type, If-None-Match"
+        response.headers["Access-Control-Expose-Headers"] = "ETag"
+        return response
+
+    @app.route("/api/health")
+    def health():
+        return jsonify({"status": "ok", "probes": sorted(registry.probes)})
+
+    @app.route("/api/batch", methods=["POST", "OPTIONS"])
+    def batch():
+        """Varias consultas en una sola petición
+
+        Cuerpo: {"queries": ["system", "apps", ...]}
+        """
+        if request.method == "OPTIONS":
+            return "", 204
+
+        body = request.get_json(silent=True) or {}
+        queries = body.get("queries")
+        if not isinstance(queries, list):
+            return jsonify({"error": "se esperaba {\"queries\": [...]}"}), 400
+
+        results, errors = {}, {}
+        for name in dict.fromkeys(queries):
+            try:
+                results[name] = registry.query(name)
+            except KeyError:
+                errors[name] = "consulta desconocida"
+            except Exception as e:
+                errors[name] = str(e)
+
+        return jsonify({"results": results, "errors": errors})
+
+    @app.route("/api/cache/invalidate", methods=["POST", "OPTIONS"])
+    def invalidate():
+        """Cuerpo opcional: {"keys": ["system", ...]}; sin claves invalida todo"""
+        if request.method == "OPTIONS":
+            return "", 204
+
+        body = request.get_json(silent=True) or {}
+        registry.cache.invalidate(body.get("keys"))
+        return jsonify({"invalidated": body.get("keys") or "all"})
+
+    @app.route("/api/apps/config")
+    def apps_config():
+        """Registro de apps serializado; el frontend lo guarda y revalida con ETag"""
+        from apps_config import get_registry
+
+        payload, etag = get_registry().serialized()
+        if request.headers.get("If-None-Match") == etag:
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(payload, mimetype="application/json")
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.route("/api/telemetry/history")
+    def history():
+        """Historial por rango: ?start=&end= (epoch s), tier=raw|minute|hour, points=N"""
+        try:
+            result = telemetry_history(
+                request.args.get("start", type=float),
+                request.args.get("end", type=float),
+                tier=request.args.get("tier"),
+                points=request.args.get("points", default=500, type=int),
+            )
+        except KeyError:
+            return jsonify({"error": "tier desconocido"}), 400
+        except OSError as e:
+            return jsonify({"error": str(e)}), 503
+        return jsonify(result)
+
+    @app.route("/api/<name>")
+    def single(name):
+        try:
+            return jsonify(registry.query(name))
+        except KeyError:
+            return jsonify({"error": "consulta desconocida"}), 404
+
+    return app
+
+
+def main():
+    host = os.environ.get("NEOPILOT_API_HOST", DEFAULT_HOST)
+    port = int(os.environ.get("NEOPILOT_API_PORT", DEFAULT_PORT))
+
+    print("🧩 NeoPilot - API local")
+    print(f"✅ API activa en http://{host}:{port}/api")
+
+    app = create_app()
+    app.run(host=host, port=port, threaded=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Gestor de procesos de aplicaciones
+Lanza y sigue las apps de la pantalla de inicio con posix_spawn, recoge
+los hijos de forma asíncrona (pidfd) y mide la latencia de cada app hasta
+que su ventana se ve.
+
+El prewarm no mantiene procesos pre-forkeados: hacer fork del kiosko con
+hilos no es seguro y el hijo tendría que hacer el exec en frío igual. Lo
+que cuesta en la SD es leer los archivos de la app, así que se piden a la
+page cache: el ejecutable, su intérprete si es un script (chromium-browser
+lo es) y las rutas de "prewarm_paths" (p. ej. el directorio de chromium)
+"""
+
+import os
+import selectors
+import shutil
+import signal
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+
+# Latencias que se guardan por app para las estadísticas
+LATENCY_HISTORY = 20
+
+# Un lanzamiento cuya ventana no se vio en este tiempo no cuenta en la latencia
+READY_TIMEOUT = 60.0
+
+
+def spawn_app(argv):
+    """Arranca argv en su propia sesión con stdio a /dev/null; devuelve el pid
+
+    posix_spawn (vfork + exec en libc) no ejecuta código Python en el hijo,
+    así que es seguro con los hilos de Qt, del reaper y del servidor ya en
+    marcha, y glibc informa del fallo del exec como OSError aquí mismo.
+    """
+    return os.posix_spawnp(
+        argv[0], argv, os.environ,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDWR, 0),
+            (os.POSIX_SPAWN_DUP2, 0, 1),
+            (os.POSIX_SPAWN_DUP2, 0, 2),
+        ],
+        setsid=True,
+        # Python ignora SIGPIPE y SIGXFSZ; la app los recibe por defecto
+        setsigdef=(signal.SIGPIPE, signal.SIGXFSZ),
+    )
+
+
+class ChildReaper:
+    """Hilo que recoge hijos terminados sin bloquear en wait()
+
+    Usa un pidfd por hijo (Linux 5.3+) en un selector; si no hay pidfd,
+    revisa los hijos con WNOHANG una vez por segundo.
+    """
+
+    def __init__(self, on_exit):
+        self.on_exit = on_exit
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._polled = set()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="neopilot-reaper", daemon=True)
+        self._thread.start()
+
+    def watch(self, pid):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except (AttributeError, OSError):
+            with self._lock:
+                self._polled.add(pid)
+        else:
+            self._selector.register(pidfd, selectors.EVENT_READ, pid)
+        os.write(self._wakeup_w, b"\0")
+
+    def stop(self):
+        self._stopping = True
+        os.write(self._wakeup_w, b"\0")
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        while not self._stopping:
+            timeout = 1.0 if self._polled else None
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj == self._wakeup_r:
+                    os.read(self._wakeup_r, 512)
+                    continue
+                self._selector.unregister(key.fileobj)
+                os.close(key.fileobj)
+                self._reap(key.data)
+
+            with self._lock:
+                polled = list(self._polled)
+            for pid in polled:
+                self._reap(pid)
+
+    def _reap(self, pid):
+        try:
+            reaped, status = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            reaped, status = pid, 0
+        if reaped == 0:
+            return
+        with self._lock:
+            self._polled.discard(pid)
+        self.on_exit(pid, os.waitstatus_to_exitcode(status))
+
+
+class AppLauncher:
+    """Lanza, sigue y cierra las aplicaciones configuradas"""
+
+    def __init__(self, apps, on_change=None):
+        # apps: {app_id: app}; puede ser el AppRegistry, que se recarga solo
+        self.apps = apps
+        self.on_change = on_change
+        self.running = {}
+        # Hasta que la ventana de la app se ve, y solo hasta el posix_spawn
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_HISTORY))
+        self.spawn_latencies = defaultdict(lambda: deque(maxlen=LATENCY_HISTORY))
+        self._prewarmed = set()
+        # app_id -> (pid, inicio) de los lanzamientos cuya ventana aún no se vio
+        self._awaiting_ready = {}
+        self._pids = {}
+        self._exited = {}
+        # Apps entre la reserva y el registro en running (lanzamientos en curso)
+        self._launching = set()
+        self._lock = threading.Lock()
+        self._reaper = ChildReaper(self._on_child_exit)
+
+    def start(self):
+        """Lee a la page cache los archivos de las apps con prewarm"""
+        for app_id, app in self.apps.items():
+            if app.get("prewarm") and app.get("command"):
+                self._prewarm(app_id)
+
+    def launch(self, app_id):
+        """Lanza una app (o devuelve la instancia que ya está corriendo)"""
+        app = self.apps.get(app_id)
+        if app is None:
+            raise KeyError(f"App desconocida: {app_id}")
+        if not app.get("command"):
+            return {"type": "app_launched", "data": {"app_id": app_id, "pid": None, "external": False}}
+
+        with self._lock:
+            record = self.running.get(app_id)
+            if record:
+                return {"type": "app_launched", "data": dict(record, app_id=app_id, already_running=True)}
+            # El WebSocket y el puente lanzan desde hilos distintos: la app
+            # queda reservada hasta estar en running para no arrancarla dos veces
+            if app_id in self._launching:
+                return {"type": "app_launched", "data": {"app_id": app_id, "pid": None, "already_running": True, "launching": True}}
+            self._launching.add(app_id)
+
+        try:
+            return self._spawn(app_id, app)
+        finally:
+            with self._lock:
+                self._launching.discard(app_id)
+
+    def _spawn(self, app_id, app):
+        started = time.perf_counter()
+        warm = app_id in self._prewarmed
+        try:
+            pid = spawn_app(app["command"])
+        except OSError as e:
+            # Sin hijo que seguir: no queda nada en _pids ni en _exited
+            return {"type": "app_error", "data": {"app_id": app_id, "error": f"No se pudo ejecutar {app['command'][0]}: {e}"}}
+        self._pids[pid] = app_id
+        self._reaper.watch(pid)
+
+        spawn_ms = (time.perf_counter() - started) * 1000
+        self.spawn_latencies[app_id].append(spawn_ms)
+
+        # launch_ms se completa en app_ready(), cuando la ventana de la app se ve
+        record = {"pid": pid, "started": time.time(), "spawn_ms": round(spawn_ms, 2), "launch_ms": None, "warm": warm}
+        with self._lock:
+            # La app pudo terminar antes de llegar aquí
+            exit_code = self._exited.pop(pid, None)
+            if exit_code is None:
+                self.running[app_id] = record
+                self._awaiting_ready[app_id] = (pid, started)
+        if exit_code is not None:
+            record["exit_code"] = exit_code
+        self._notify()
+        return {"type": "app_launched", "data": dict(record, app_id=app_id)}
+
+    def app_ready(self, app_id=None):
+        """La ventana de la app ya se ve: cierra la medida de su lanzamiento
+
+        El kiosko lo llama cuando otra ventana le quita la activación; sin
+        app_id se atribuye al lanzamiento pendiente más reciente. Devuelve
+        la latencia en ms, o None si no había ninguno pendiente.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if app_id is None and self._awaiting_ready:
+                app_id = max(self._awaiting_ready, key=lambda key: self._awaiting_ready[key][1])
+            pid, started = self._awaiting_ready.pop(app_id, (None, None))
+            if pid is None or now - started > READY_TIMEOUT:
+                return None
+            launch_ms = (now - started) * 1000
+            self.latencies[app_id].append(launch_ms)
+            record = self.running.get(app_id)
+            if record is not None and record["pid"] == pid:
+                record["launch_ms"] = round(launch_ms, 2)
+        return launch_ms
+
+    def close(self, app_id, force=False):
+        """Envía SIGTERM (o SIGKILL con force) a la app; el reaper registra la salida"""
+        with self._lock:
+            record = self.running.get(app_id)
+        if not record:
+            return {"type": "app_closed", "data": {"app_id": app_id, "exit_code": None}}
+
+        try:
+            # El hijo hizo setsid: se cierra todo su grupo de procesos
+            os.killpg(record["pid"], signal.SIGKILL if force else signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        return {"type": "app_closing", "data": {"app_id": app_id, "pid": record["pid"]}}
+
+    def status(self):
+        with self._lock:
+            return {
+                app_id: {"running": app_id in self.running, "pid": self.running.get(app_id, {}).get("pid")}
+                for app_id in self.apps
+            }
+
+    def stats(self):
+        """Latencia de lanzamiento por app (ms)
+
+        last_ms y median_ms llegan hasta que la ventana de la app se ve
+        (None si el kiosko no lo ha visto nunca, p. ej. en el navegador);
+        spawn_median_ms es solo el posix_spawn.
+        """
+        result = {}
+        for app_id, spawns in list(self.spawn_latencies.items()):
+            if not spawns:
+                continue
+            ready = self.latencies.get(app_id) or ()
+            result[app_id] = {
+                "last_ms": round(ready[-1], 2) if ready else None,
+                "median_ms": round(statistics.median(ready), 2) if ready else None,
+                "spawn_median_ms": round(statistics.median(spawns), 2),
+                "launches": len(spawns),
+                "prewarmed": app_id in self._prewarmed,
+            }
+        return result
+
+    def shutdown(self):
+        self._reaper.stop()
+
+    def _prewarm(self, app_id):
+        app = self.apps[app_id]
+        paths = _executable_files(app["command"][0]) + list(app.get("prewarm_paths", ()))
+        if sum(_readahead(path) for path in paths):
+            self._prewarmed.add(app_id)
+
+    def _on_child_exit(self, pid, exit_code):
+        app_id = self._pids.pop(pid, None)
+        if app_id is None:
+            return
+
+        with self._lock:
+            record = self.running.get(app_id)
+            was_running = record is not None and record["pid"] == pid
+            if was_running:
+                del self.running[app_id]
+            if self._awaiting_ready.get(app_id, (None,))[0] == pid:
+                del self._awaiting_ready[app_id]
+            if not was_running:
+                # launch() lo recoge al registrar la app
+                self._exited[pid] = exit_code
+
+        if was_running:
+            self._notify({"type": "app_closed", "data": {"app_id": app_id, "exit_code": exit_code}})
+
+    def _notify(self, event=None):
+        if self.on_change:
+            self.on_change(self.status(), event)
+
+
+def _executable_files(name):
+    """Ejecutable de `name` en el PATH y, si es un script, su intérprete"""
+    path = shutil.which(name)
+    if not path:
+        return []
+    files = [os.path.realpath(path)]
+    try:
+        with open(files[0], "rb") as f:
+            first_line = f.readline(256)
+    except OSError:
+        return files
+    if first_line.startswith(b"#!") and first_line[2:].split():
+        files.append(os.fsdecode(first_line[2:].split()[0]))
+    return files
+
+
+def _readahead(path):
+    """Pide a la page cache un archivo, o los de un directorio (sin recursión)
+
+    fadvise(WILLNEED) no bloquea: la lectura la hace el kernel. Devuelve
+    los bytes pedidos (0 si la ruta no existe o no hay posix_fadvise).
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return 0
+    if os.path.isdir(path):
+        try:
+            entries = [entry.path for entry in os.scandir(path) if entry.is_file()]
+        except OSError:
+            return 0
+    else:
+        entries = [path]
+
+    requested = 0
+    for entry in entries:
+        try:
+            fd = os.open(entry, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            requested += os.fstat(fd).st_size
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return requested
+
+
+def running_apps(apps):
+    """Apps cuyo proceso aparece en /proc, sin depender de quién las lanzó
+
+    Compara el ejecutable y los argumentos de cada comando con
+    /proc/<pid>/cmdline; es una sonda relativamente cara.
+    """
+    targets = {}
+    for app_id, app in apps.items():
+        if app.get("command"):
+            name = os.path.basename(app["command"][0])
+            targets.setdefault(name, []).append((app_id, app["command"][1:]))
+
+    found = {app_id: False for app_id in apps}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return found
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                argv = f.read().decode(errors="replace").split("\0")
+        except OSError:
+            continue
+        if not argv or not argv[0]:
+            continue
+        for app_id, args in targets.get(os.path.basename(argv[0]), ()):
+            if all(arg in argv for arg in args):
+                found[app_id] = True
+    return found
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Esquema neopilot:// para QtWebEngine
+Sirve frontend/build directamente desde el caché de assets en proceso,
+sin servidor HTTP, socket de loopback ni conflictos de puerto
+"""
+
+import mimetypes
+
+from asset_cache import is_spa_route, normalize_url_path
+
+SCHEME = b"neopilot"
+APP_URL = "neopilot://app/"
+
+_handler_class = None
+
+
+def register_app_scheme():
+    """Registra el esquema neopilot://
+
+    Debe llamarse antes de crear QApplication.
+    """
+    from PyQt5.QtWebEngineCore import QWebEngineUrlScheme
+
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+
+    # Contexto seguro (como https) y fetch/XHR entre rutas del propio esquema
+    flags = QWebEngineUrlScheme.SecureScheme
+    if hasattr(QWebEngineUrlScheme, "CorsEnabled"):
+        flags |= QWebEngineUrlScheme.CorsEnabled
+    scheme.setFlags(flags)
+
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def install_app_scheme(profile, asset_cache):
+    """Instala el handler de neopilot:// en un QWebEngineProfile"""
+    handler = create_scheme_handler(asset_cache, parent=profile)
+    profile.installUrlSchemeHandler(SCHEME, handler)
+    return handler
+
+
+def create_scheme_handler(asset_cache, parent=None):
+    """Crea el QWebEngineUrlSchemeHandler (PyQt5 se importa aquí, no al cargar el módulo)"""
+    global _handler_class
+
+    if _handler_class is None:
+        from PyQt5.QtCore import QBuffer, QFile, QIODevice
+        from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlSchemeHandler
+
+        class AppSchemeHandler(QWebEngineUrlSchemeHandler):
+            def __init__(self, cache, parent=None):
+                super().__init__(parent)
+                self.cache = cache
+
+            def requestStarted(self, job):
+                if bytes(job.requestMethod()) != b"GET":
+                    job.fail(QWebEngineUrlRequestJob.RequestDenied)
+                    return
+
+                url_path = job.requestUrl().path() or "/"
+                asset = self.cache.lookup(url_path)
+
+                if asset is not None:
+                    # El buffer vive mientras viva el job; setData no acepta
+                    # memoryview (los assets del paquete son slices del mmap)
+                    buffer = QBuffer(job)
+                    buffer.setData(bytes(asset.identity))
+                    buffer.open(QIODevice.ReadOnly)
+                    job.reply(asset.content_type.encode(), buffer)
+                    return
+
+                # Archivos que no caben en el caché: Qt los lee del disco por bloques
+                path = normalize_url_path(url_path)
+                file_path = self.cache.root / path
+                if is_spa_route(path) or not file_path.is_file():
+                    job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                    return
+
+                device = QFile(str(file_path), job)
+                if not device.open(QIODevice.ReadOnly):
+                    job.fail(QWebEngineUrlRequestJob.RequestFailed)
+                    return
+
+                content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                job.reply(content_type.encode(), device)
+
+        _handler_class = AppSchemeHandler
+
+    return _handler_class(asset_cache, parent)
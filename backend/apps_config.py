@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Configuración de aplicaciones
+Registro único de las apps de la pantalla de inicio, cargado desde
+config/apps.json. Se parsea y valida una sola vez y solo se vuelve a leer
+cuando cambian el mtime o el inodo del archivo
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "apps.json"
+
+SECTIONS = ("main", "quick")
+COLORS = ("cyan", "green", "blue", "purple", "orange", "pink")
+
+# Campos que se envían al frontend (el comando solo lo usa el backend)
+PUBLIC_FIELDS = ("id", "label", "icon", "color", "section", "external")
+
+
+class AppConfigError(ValueError):
+    """El archivo de apps no existe o no es válido"""
+
+
+def _validate(raw):
+    """Valida el JSON y devuelve {app_id: app} en el orden del archivo"""
+    entries = raw.get("apps") if isinstance(raw, dict) else None
+    if not isinstance(entries, list):
+        raise AppConfigError("se esperaba {\"apps\": [...]}")
+
+    apps = {}
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise AppConfigError(f"apps[{index}]: se esperaba un objeto")
+        app_id = entry.get("id")
+        if not isinstance(app_id, str) or not app_id:
+            raise AppConfigError(f"apps[{index}]: falta el id")
+        if app_id in apps:
+            raise AppConfigError(f"{app_id}: id duplicado")
+
+        section = entry.get("section", "main")
+        if section not in SECTIONS:
+            raise AppConfigError(f"{app_id}: sección desconocida {section!r}")
+        color = entry.get("color", "cyan")
+        if color not in COLORS:
+            raise AppConfigError(f"{app_id}: color desconocido {color!r}")
+
+        # command=None: la app es solo una vista del frontend, no un proceso externo
+        command = entry.get("command")
+        if command is not None and (
+            not isinstance(command, list) or not command
+            or not all(isinstance(arg, str) for arg in command)
+        ):
+            raise AppConfigError(f"{app_id}: command debe ser una lista de strings")
+        prewarm_paths = entry.get("prewarm_paths", [])
+        if not isinstance(prewarm_paths, list) or not all(isinstance(path, str) for path in prewarm_paths):
+            raise AppConfigError(f"{app_id}: prewarm_paths debe ser una lista de strings")
+
+        apps[app_id] = {
+            "id": app_id,
+            "label": str(entry.get("label", app_id)),
+            "icon": str(entry.get("icon", "")),
+            "color": color,
+            "section": section,
+            "command": command,
+            "external": command is not None,
+            # prewarm=True: dejar el ejecutable (y prewarm_paths) en la page cache
+            "prewarm": bool(entry.get("prewarm", False)) and command is not None,
+            # Archivos o directorios que el ejecutable carga después, p. ej. los
+            # de chromium cuando el comando es su script lanzador
+            "prewarm_paths": prewarm_paths,
+        }
+    return apps
+
+
+class _Snapshot:
+    """Resultado inmutable de una carga del archivo"""
+
+    __slots__ = ("key", "apps", "sections", "payload", "etag")
+
+    def __init__(self, key, apps):
+        self.key = key
+        self.apps = apps
+        self.sections = {
+            section: tuple(app_id for app_id, app in apps.items() if app["section"] == section)
+            for section in SECTIONS
+        }
+        public = [{field: app[field] for field in PUBLIC_FIELDS} for app in apps.values()]
+        self.payload = json.dumps({"apps": public}, separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.blake2b(self.payload, digest_size=8).hexdigest() + '"'
+
+
+class AppRegistry(Mapping):
+    """Registro de apps con recarga en caliente
+
+    Se comporta como un diccionario de solo lectura {app_id: app}. Cada
+    acceso hace un stat() del archivo y solo vuelve a parsear si cambió el
+    inodo (reemplazo atómico), el mtime o el tamaño. Si la nueva versión no
+    es válida se mantiene la anterior.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.environ.get("NEOPILOT_APPS_CONFIG", DEFAULT_CONFIG_PATH))
+        self.reloads = 0
+        self._snapshot = None
+        self._rejected_key = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Carga vigente del registro, recargando si el archivo cambió"""
+        try:
+            st = os.stat(self.path)
+        except OSError as e:
+            if self._snapshot is None:
+                raise AppConfigError(f"No se pudo leer {self.path}: {e}") from e
+            return self._snapshot
+
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        snapshot = self._snapshot
+        if snapshot is not None and key in (snapshot.key, self._rejected_key):
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.key == key:
+                return self._snapshot
+            try:
+                with open(self.path, "rb") as f:
+                    apps = _validate(json.loads(f.read()))
+            except (OSError, ValueError) as e:
+                if self._snapshot is None:
+                    raise AppConfigError(f"{self.path}: {e}") from e
+                # No volver a parsear la misma versión inválida en cada acceso
+                self._rejected_key = key
+                print(f"⚠️  Configuración de apps inválida, se mantiene la anterior: {e}")
+                return self._snapshot
+            self._snapshot = _Snapshot(key, apps)
+            self.reloads += 1
+            return self._snapshot
+
+    def __getitem__(self, app_id):
+        return self.snapshot().apps[app_id]
+
+    def __iter__(self):
+        return iter(self.snapshot().apps)
+
+    def __len__(self):
+        return len(self.snapshot().apps)
+
+    # Una sola comprobación del archivo por llamada, no una por elemento
+    def get(self, app_id, default=None):
+        return self.snapshot().apps.get(app_id, default)
+
+    def items(self):
+        return self.snapshot().apps.items()
+
+    def values(self):
+        return self.snapshot().apps.values()
+
+    def section(self, name):
+        """Ids de las apps de una sección, en el orden del archivo"""
+        return self.snapshot().sections.get(name, ())
+
+    def serialized(self):
+        """(payload JSON compacto para el frontend, ETag)"""
+        snapshot = self.snapshot()
+        return snapshot.payload, snapshot.etag
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def get_registry():
+    """Registro compartido por el proceso (NEOPILOT_APPS_CONFIG cambia la ruta)"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = AppRegistry()
+    return _default_registry
+
+
+def export(path):
+    """Escribe el payload público en `path` (copia de respaldo dentro del build)"""
+    payload, _ = get_registry().serialized()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+    return len(payload)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--export":
+        try:
+            size = export(sys.argv[2])
+        except AppConfigError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Registro de apps exportado a {sys.argv[2]} ({size} bytes)")
+        sys.exit(0)
+
+    registry = get_registry()
+    for name in SECTIONS:
+        print(f"{name}: {', '.join(registry.section(name))}")
+    payload, etag = registry.serialized()
+    print(f"{len(payload)} bytes, ETag {etag}")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Caché de assets en memoria
+Guarda frontend/build en RAM con variantes gzip/brotli precomprimidas y ETags fuertes
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Memoria máxima por defecto para el caché completo
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Archivos más grandes se sirven desde disco
+DEFAULT_MAX_ENTRY_BYTES = 2 * 1024 * 1024
+
+# Por debajo de este tamaño no compensa comprimir
+MIN_COMPRESS_BYTES = 512
+
+# Nombres con hash de contenido de CRA: main.d10c6229.js, 787.3f2a9c1b.chunk.js
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+# Los source maps solo se cargan si alguien los pide
+WARM_SKIP_SUFFIXES = (".map",)
+
+
+def is_spa_route(path):
+    """Rutas sin extensión pertenecen al router del SPA (se sirven con index.html)"""
+    return "." not in posixpath.basename(path)
+
+
+def normalize_url_path(url_path):
+    """Convierte la ruta de la URL en ruta relativa segura dentro del build"""
+    path = unquote(url_path.split("?", 1)[0].split("#", 1)[0])
+    if path.endswith("/"):
+        path += "index.html"
+    path = posixpath.normpath("/" + path).lstrip("/")
+    if not path or path == ".":
+        return "index.html"
+    return path
+
+
+def guess_content_type(path):
+    """Content-Type de un asset; los tipos de texto se sirven como UTF-8"""
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if content_type.startswith("text/") and "charset" not in content_type:
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def compress_variants(data, content_type, use_brotli=True, brotli_quality=9):
+    """Devuelve (gzip, br); cada variante es None si no reduce al menos un 10%"""
+    gzip_body = br_body = None
+
+    if len(data) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE_TYPES):
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data) * 0.9:
+            gzip_body = compressed
+        if use_brotli and brotli is not None:
+            compressed = brotli.compress(data, quality=brotli_quality)
+            if len(compressed) < len(data) * 0.9:
+                br_body = compressed
+
+    return gzip_body, br_body
+
+
+class CachedAsset:
+    """Contenido de un archivo y sus variantes comprimidas"""
+
+    __slots__ = (
+        "path", "content_type", "mtime_ns", "size", "etag",
+        "identity", "gzip", "br", "immutable",
+    )
+
+    def __init__(self, path, content_type, mtime_ns, identity, gzip_body=None, br_body=None):
+        self.path = path
+        self.content_type = content_type
+        self.mtime_ns = mtime_ns
+        self.size = len(identity)
+        self.identity = identity
+        self.gzip = gzip_body
+        self.br = br_body
+        self.etag = hashlib.blake2b(identity, digest_size=16).hexdigest()
+        self.immutable = bool(HASHED_NAME.search(posixpath.basename(path)))
+
+    @property
+    def memory_bytes(self):
+        return self.size + len(self.gzip or b"") + len(self.br or b"")
+
+    @property
+    def cache_control(self):
+        return IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL
+
+    def etag_for(self, encoding):
+        """ETag fuerte distinto para cada representación"""
+        if encoding:
+            return f'"{self.etag}-{encoding}"'
+        return f'"{self.etag}"'
+
+    def matches(self, if_none_match):
+        """Comprueba un If-None-Match (comparación débil, como exige RFC 9110)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag.split("-", 1)[0] == self.etag:
+                return True
+        return False
+
+    def select(self, accept_encoding):
+        """Elige la mejor variante según Accept-Encoding
+
+        Devuelve (encoding, body); encoding es None para la versión sin comprimir.
+        """
+        accepted = set()
+        for token in (accept_encoding or "").split(","):
+            name, _, params = token.partition(";")
+            params = params.replace(" ", "")
+            if params.startswith("q="):
+                try:
+                    if float(params[2:]) == 0:
+                        continue  # q=0 significa "no aceptable"
+                except ValueError:
+                    continue
+            accepted.add(name.strip().lower())
+
+        if self.br is not None and "br" in accepted:
+            return "br", self.br
+        if self.gzip is not None and "gzip" in accepted:
+            return "gzip", self.gzip
+        return None, self.identity
+
+
+class AssetCache:
+    """Caché LRU de assets del frontend con límite de memoria"""
+
+    # Origen del contenido en las métricas del servidor
+    source = "memory"
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES,
+                 max_entry_bytes=DEFAULT_MAX_ENTRY_BYTES, use_brotli=True):
+        self.root = Path(root).resolve()
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.use_brotli = use_brotli and brotli is not None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url_path):
+        """Devuelve el CachedAsset de una ruta, cargándolo si hace falta
+
+        Devuelve None si el archivo no existe o no cabe en el caché;
+        en ese caso debe servirse desde disco.
+        """
+        path = normalize_url_path(url_path)
+
+        with self._lock:
+            asset = self._entries.get(path)
+            if asset is not None:
+                self._entries.move_to_end(path)
+
+        # Los archivos con hash nunca cambian; el resto se valida por mtime
+        if asset is not None and (asset.immutable or self._is_fresh(asset)):
+            self.hits += 1
+            return asset
+
+        self.misses += 1
+        asset = self._load(path)
+        if asset is not None:
+            self._store(asset)
+        return asset
+
+    def lookup(self, url_path):
+        """Como get(), pero devuelve index.html para rutas del SPA"""
+        asset = self.get(url_path)
+        if asset is None and is_spa_route(normalize_url_path(url_path)):
+            asset = self.get("index.html")
+        return asset
+
+    def warm(self):
+        """Precarga todo el build (hasta el límite de memoria)"""
+        loaded = 0
+        for file_path in sorted(self.root.rglob("*")):
+            if not file_path.is_file() or file_path.name.endswith(WARM_SKIP_SUFFIXES):
+                continue
+            if self.current_bytes >= self.max_bytes:
+                break
+            if self.get(file_path.relative_to(self.root).as_posix()) is not None:
+                loaded += 1
+        return loaded
+
+    def shrink(self, target_bytes):
+        """Libera entradas LRU hasta quedar por debajo de target_bytes"""
+        with self._lock:
+            self._evict(target_bytes)
+
+    def clear(self):
+        """Vacía el caché por completo"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Resumen del estado del caché"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _is_fresh(self, asset):
+        try:
+            return os.stat(self.root / asset.path).st_mtime_ns == asset.mtime_ns
+        except OSError:
+            return False
+
+    def _load(self, path):
+        file_path = self.root / path
+        try:
+            # Evitar salir del directorio del build mediante symlinks
+            if not str(file_path.resolve()).startswith(str(self.root) + os.sep):
+                return None
+            st = os.stat(file_path)
+        except OSError:
+            return None
+
+        if not os.path.isfile(file_path) or st.st_size > self.max_entry_bytes:
+            return None
+
+        try:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        content_type = guess_content_type(path)
+        gzip_body, br_body = compress_variants(data, content_type, self.use_brotli)
+
+        return CachedAsset(path, content_type, st.st_mtime_ns, data, gzip_body, br_body)
+
+    def _store(self, asset):
+        with self._lock:
+            previous = self._entries.pop(asset.path, None)
+            if previous is not None:
+                self.current_bytes -= previous.memory_bytes
+
+            if asset.memory_bytes > self.max_bytes:
+                return
+
+            self._evict(self.max_bytes - asset.memory_bytes)
+            self._entries[asset.path] = asset
+            self.current_bytes += asset.memory_bytes
+
+    def _evict(self, target_bytes):
+        while self._entries and self.current_bytes > target_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.memory_bytes
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Paquete de assets de un solo archivo
+Empaqueta frontend/build en un único archivo con índice precalculado
+(ruta → offset, longitud, hash, Content-Type y variantes gzip/brotli).
+Los servidores lo mapean en memoria y sirven cada asset como un slice,
+sin stat/open/read por petición en la tarjeta SD
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+from asset_cache import (
+    AssetCache, CachedAsset, DEFAULT_MAX_BYTES, HASHED_NAME,
+    compress_variants, guess_content_type, is_spa_route, normalize_url_path,
+)
+
+# Cabecera: magic, offset del índice, longitud del índice
+PACK_MAGIC = b"NEOPACK1"
+HEADER = struct.Struct("<8sQQ")
+PACK_VERSION = 1
+
+# frontend/build -> frontend/build.neopack
+PACK_SUFFIX = ".neopack"
+
+# Los source maps solo hacen falta al depurar
+SKIP_SUFFIXES = (".map",)
+
+# El empaquetado se hace una vez por build: brotli a máxima calidad
+PACK_BROTLI_QUALITY = 11
+
+VARIANTS = ("identity", "gzip", "br")
+
+
+class AssetPackError(ValueError):
+    """El archivo no es un paquete de assets válido"""
+
+
+def pack_path_for(build_dir):
+    """Ruta del paquete de un build (NEOPILOT_ASSET_PACK la sustituye)"""
+    override = os.environ.get("NEOPILOT_ASSET_PACK")
+    if override:
+        return Path(override)
+    build_dir = Path(build_dir)
+    return build_dir.with_name(build_dir.name + PACK_SUFFIX)
+
+
+class PackedAsset(CachedAsset):
+    """CachedAsset cuyos cuerpos son slices del paquete mapeado
+
+    El ETag viene del índice: no se recalcula el hash al abrir el paquete.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, path, entry, view):
+        bodies = {}
+        for name in VARIANTS:
+            if name in entry:
+                offset, length = entry[name]
+                bodies[name] = view[offset:offset + length]
+
+        self.path = path
+        self.content_type = entry["type"]
+        self.mtime_ns = entry["mtime_ns"]
+        self.identity = bodies["identity"]
+        self.size = len(self.identity)
+        self.gzip = bodies.get("gzip")
+        self.br = bodies.get("br")
+        self.etag = entry["etag"]
+        self.immutable = bool(HASHED_NAME.search(path.rsplit("/", 1)[-1]))
+
+
+class AssetPack:
+    """Assets del frontend servidos desde un paquete mapeado en memoria
+
+    Tiene la misma interfaz que AssetCache (get/lookup/warm/shrink/stats),
+    así que StaticHTTPServer, neopilot:// y el monitor de memoria lo usan
+    sin cambios. Las páginas son del page cache: el kernel puede
+    reclamarlas y vuelven a leerse del paquete cuando hacen falta.
+    """
+
+    source = "pack"
+
+    def __init__(self, path, root=None):
+        self.path = Path(path)
+        # Directorio del build, para los archivos que no están en el paquete
+        self.root = Path(root).resolve() if root else self.path.with_suffix("")
+
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+            if magic != PACK_MAGIC or index_offset + index_length > len(self._map):
+                raise AssetPackError(f"{self.path} no es un paquete de NeoPilot")
+            index = json.loads(self._map[index_offset:index_offset + index_length])
+            if index.get("version") != PACK_VERSION:
+                raise AssetPackError(f"versión de paquete no soportada: {index.get('version')}")
+        except (struct.error, ValueError):
+            self._map.close()
+            raise
+
+        self.build_info = index.get("source", {})
+        self.created = index.get("created")
+        self.hits = 0
+        self.misses = 0
+
+        view = memoryview(self._map)
+        self._entries = {
+            path: PackedAsset(path, entry, view)
+            for path, entry in index["assets"].items()
+        }
+
+    def is_stale(self):
+        """True si el index.html del build no es el del paquete
+
+        CRA cambia los nombres con hash del bundle en index.html con cada
+        build, así que basta con comparar su contenido. Si mtime y tamaño
+        coinciden no se lee el archivo; si no (una copia con cp -r, scp o
+        rsync sin -t cambia el mtime) se compara el hash. Si no hay build
+        (despliegue con solo el paquete) el paquete nunca está desactualizado.
+        """
+        index_path = self.root / "index.html"
+        try:
+            st = os.stat(index_path)
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) == (self.build_info.get("index_mtime_ns"), self.build_info.get("index_size")):
+            return False
+
+        expected = self.build_info.get("index_etag")
+        if expected is None:
+            # Paquetes anteriores sin hash: solo un build estrictamente más nuevo
+            return st.st_mtime_ns > self.build_info.get("index_mtime_ns", 0)
+        try:
+            return _content_hash(index_path.read_bytes()) != expected
+        except OSError:
+            return False
+
+    def get(self, url_path):
+        """Devuelve el asset de una ruta o None si no está en el paquete"""
+        asset = self._entries.get(normalize_url_path(url_path))
+        if asset is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return asset
+
+    def lookup(self, url_path):
+        """Como get(), pero devuelve index.html para rutas del SPA"""
+        asset = self.get(url_path)
+        if asset is None and is_spa_route(normalize_url_path(url_path)):
+            asset = self.get("index.html")
+        return asset
+
+    def warm(self):
+        """Pide al kernel que lea el paquete por adelantado (lectura secuencial)"""
+        if hasattr(self._map, "madvise"):
+            self._map.madvise(mmap.MADV_WILLNEED)
+        return len(self._entries)
+
+    def shrink(self, target_bytes):
+        """Suelta las páginas mapeadas; se vuelven a leer al pedirlas"""
+        if target_bytes < len(self._map) and hasattr(mmap, "MADV_DONTNEED"):
+            self._map.madvise(mmap.MADV_DONTNEED)
+
+    def clear(self):
+        self.shrink(0)
+
+    def stats(self):
+        """Resumen del estado del paquete"""
+        return {
+            "entries": len(self._entries),
+            "bytes": len(self._map),
+            "max_bytes": len(self._map),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pack": str(self.path),
+        }
+
+
+def _content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_pack(build_dir):
+    """Abre el paquete del build si existe y está al día; si no, None"""
+    path = pack_path_for(build_dir)
+    if not path.is_file():
+        return None
+
+    try:
+        pack = AssetPack(path, root=build_dir)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Paquete de assets ignorado ({e})")
+        return None
+
+    if pack.is_stale():
+        print(f"⚠️  {path.name} no corresponde al build, se sirve desde disco")
+        print("💡 Regenera el paquete con: python3 backend/asset_pack.py")
+        return None
+
+    print(f"📦 Assets servidos desde {path} ({len(pack._entries)} archivos)")
+    return pack
+
+
+def open_assets(build_dir, max_bytes=DEFAULT_MAX_BYTES):
+    """El paquete del build si lo hay; si no, un AssetCache sobre el directorio"""
+    pack = load_pack(build_dir)
+    if pack is not None:
+        return pack
+    return AssetCache(build_dir, max_bytes)
+
+
+def build_pack(build_dir, output=None, include_maps=False, use_brotli=True):
+    """Crea el paquete de un build de forma atómica
+
+    El paquete anterior se reemplaza con os.replace: un servidor que lo
+    tenga mapeado sigue sirviendo el antiguo hasta que se reinicie.
+    """
+    build_dir = Path(build_dir).resolve()
+    index_stat = os.stat(build_dir / "index.html")
+    output = Path(output) if output else pack_path_for(build_dir)
+    tmp_path = output.with_name(output.name + ".tmp")
+
+    assets = {}
+    source_bytes = 0
+
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(PACK_MAGIC, 0, 0))
+
+            for file_path in sorted(build_dir.rglob("*")):
+                if not file_path.is_file():
+                    continue
+                if not include_maps and file_path.name.endswith(SKIP_SUFFIXES):
+                    continue
+
+                path = file_path.relative_to(build_dir).as_posix()
+                data = file_path.read_bytes()
+                content_type = guess_content_type(path)
+                gzip_body, br_body = compress_variants(
+                    data, content_type, use_brotli, brotli_quality=PACK_BROTLI_QUALITY
+                )
+
+                entry = {
+                    "type": content_type,
+                    "etag": _content_hash(data),
+                    "mtime_ns": file_path.stat().st_mtime_ns,
+                }
+                for name, body in zip(VARIANTS, (data, gzip_body, br_body)):
+                    if body is not None:
+                        entry[name] = [f.tell(), len(body)]
+                        f.write(body)
+
+                assets[path] = entry
+                source_bytes += len(data)
+
+            index = json.dumps({
+                "version": PACK_VERSION,
+                "created": time.time(),
+                "source": {
+                    "index_mtime_ns": index_stat.st_mtime_ns,
+                    "index_size": index_stat.st_size,
+                    "index_etag": assets["index.html"]["etag"],
+                },
+                "assets": assets,
+            }, separators=(",", ":")).encode()
+
+            index_offset = f.tell()
+            f.write(index)
+            f.seek(0)
+            f.write(HEADER.pack(PACK_MAGIC, index_offset, len(index)))
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp_path, output)
+    return {
+        "path": str(output),
+        "assets": len(assets),
+        "source_bytes": source_bytes,
+        "pack_bytes": output.stat().st_size,
+    }
+
+
+def main():
+    from launcher_core import FRONTEND_BUILD
+
+    parser = argparse.ArgumentParser(description="NeoPilot - Empaqueta frontend/build en un solo archivo")
+    parser.add_argument("build_dir", nargs="?", default=str(FRONTEND_BUILD))
+    parser.add_argument("-o", "--output", default=None,
+                        help="ruta del paquete (por defecto junto al build: build.neopack)")
+    parser.add_argument("--include-maps", action="store_true", help="incluir los source maps")
+    parser.add_argument("--no-brotli", action="store_true", help="no generar variantes brotli")
+    parser.add_argument("--info", action="store_true", help="mostrar el contenido de un paquete existente")
+    args = parser.parse_args()
+
+    if args.info:
+        path = Path(args.output) if args.output else pack_path_for(args.build_dir)
+        try:
+            pack = AssetPack(path, root=args.build_dir)
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudo abrir el paquete: {e}")
+            return 1
+        for name, asset in sorted(pack._entries.items()):
+            variants = "+".join(v for v in VARIANTS[1:] if getattr(asset, v) is not None) or "-"
+            print(f"  {asset.size:>9}  {variants:<8} {name}")
+        print(json.dumps(pack.stats()))
+        print("⚠️  No corresponde al build" if pack.is_stale() else "✅ Al día con el build")
+        return 0
+
+    try:
+        summary = build_pack(args.build_dir, args.output, args.include_maps, not args.no_brotli)
+    except FileNotFoundError:
+        print(f"❌ Build no encontrado en {args.build_dir}. Ejecuta: npm run build")
+        return 1
+
+    print(f"✅ Paquete creado: {summary['path']}")
+    print(f"📦 {summary['assets']} archivos, {summary['source_bytes'] // 1024} KB de build, "
+          f"{summary['pack_bytes'] // 1024} KB con variantes comprimidas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Servicios del backend para el modo navegador
+Sin Qt no hay puente QWebChannel: el frontend usa la API REST (api.py) y
+el servidor WebSocket (websocket_server.py). Los launchers con navegador
+del sistema los arrancan junto al servidor estático y los paran al salir
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# (nombre, script): los puertos son los que espera frontend/src/backendClient.js
+SERVICES = (
+    ("api", "api.py"),
+    ("websocket", "websocket_server.py"),
+)
+
+
+class BackendServices:
+    """Procesos hijos con la API y el servidor WebSocket"""
+
+    def __init__(self, services=SERVICES):
+        self.services = services
+        self.processes = {}
+
+    def start(self):
+        """Arranca los servicios; NEOPILOT_BACKEND_SERVICES=0 lo desactiva
+
+        Si a uno le falta una dependencia (flask, websockets) o su puerto
+        ya lo tiene otra instancia, el proceso termina solo y el frontend
+        se queda sin ese transporte, pero la interfaz sigue cargando.
+        """
+        if os.environ.get("NEOPILOT_BACKEND_SERVICES", "1") == "0":
+            return
+        for name, script in self.services:
+            try:
+                self.processes[name] = subprocess.Popen(
+                    [sys.executable, str(BACKEND_DIR / script)],
+                    stdin=subprocess.DEVNULL,
+                )
+            except OSError as e:
+                print(f"⚠️  No se pudo iniciar {script}: {e}")
+        if self.processes:
+            print(f"🧩 Servicios del backend: {', '.join(self.processes)}")
+
+    def stop(self, timeout=5):
+        processes, self.processes = self.processes, {}
+        for process in processes.values():
+            if process.poll() is None:
+                process.terminate()
+        for name, process in processes.items():
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                print(f"⚠️  {name} no terminó a tiempo, forzando cierre")
+                process.kill()
+                process.wait()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Benchmark de los servidores HTTP
+Compara los caminos que sirven el frontend (StaticServer de KioskLauncher,
+static_server.py en subproceso de SimpleKioskLauncher y server_web.py)
+sobre un build sintético fijo: peticiones/s, latencia p50/p99, carga de
+página en frío y en caliente, y escalado con conexiones concurrentes.
+Guarda el resultado en JSON y lo compara con una línea base
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import select
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+TARGETS = ("kiosk", "simple", "web")
+VARIANTS = ("cache", "pack")
+DEFAULT_CONCURRENCY = (1, 8, 32)
+DEFAULT_DURATION = 5.0
+WARMUP_DURATION = 1.0
+
+# Conexiones en paralelo de un navegador al cargar la página
+PAGE_LOAD_CONNECTIONS = 6
+WARM_PAGE_LOADS = 5
+
+# Cambios mayores que este porcentaje respecto a la línea base son regresiones
+DEFAULT_THRESHOLD = 10.0
+
+REQUEST_HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+FIXTURE_SEED = 20240101
+FIXTURE_VERSION = 1
+
+JS_WORDS = (
+    "function", "return", "const", "let", "var", "if", "else", "for", "while",
+    "React", "useState", "useEffect", "props", "children", "className", "onClick",
+    "null", "undefined", "true", "false", "this", "new", "Promise", "await", "async",
+    "export", "import", "default", "=>", "===", "&&", "||", "(", ")", "{", "}", ";",
+)
+
+
+# --- Build sintético -------------------------------------------------------
+
+def _text_blob(rng, size, words=JS_WORDS):
+    parts = []
+    length = 0
+    while length < size:
+        word = words[rng.randrange(len(words))]
+        if rng.random() < 0.1:
+            word += str(rng.randrange(10000))
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size].encode()
+
+
+def _hashed(name, data):
+    stem, _, extension = name.partition(".")
+    digest = hashlib.blake2b(data, digest_size=4).hexdigest()
+    return f"{stem}.{digest}.{extension}"
+
+
+def make_fixture(root, seed=FIXTURE_SEED):
+    """Genera un build parecido al de CRA; mismo seed, mismos bytes
+
+    Devuelve (lista de rutas URL, digest del contenido).
+    """
+    import random
+
+    rng = random.Random(seed)
+    build = Path(root) / "build"
+    files = {}
+
+    files[_hashed("static/js/main.js", b"main")] = _text_blob(rng, 480 * 1024)
+    for i in range(40):
+        files[_hashed(f"static/js/{i}.chunk.js", str(i).encode())] = _text_blob(rng, rng.randrange(2, 40) * 1024)
+    files[_hashed("static/css/main.css", b"css")] = _text_blob(
+        rng, 60 * 1024, (".app", "{", "}", "color:", "#fff;", "display:flex;", "margin:0;", "padding:4px;")
+    )
+    for i in range(12):
+        # Imágenes: contenido aleatorio, no comprimible
+        files[_hashed(f"static/media/icon{i}.png", str(i).encode())] = rng.randbytes(rng.randrange(4, 64) * 1024)
+    files["manifest.json"] = json.dumps({"short_name": "NeoPilot", "icons": []}).encode()
+    files["favicon.ico"] = rng.randbytes(4 * 1024)
+
+    scripts = "".join(f'<script defer src="/{name}"></script>' for name in files if name.endswith(".js"))
+    files["index.html"] = (
+        "<!doctype html><html><head><meta charset=\"utf-8\"><title>NeoPilot</title>"
+        f"{scripts}</head><body><div id=\"root\"></div></body></html>"
+    ).encode()
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(files):
+        path = build / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(files[name])
+        digest.update(name.encode())
+        digest.update(files[name])
+
+    paths = ["/"] + [f"/{name}" for name in sorted(files) if name != "index.html"]
+    return paths, f"v{FIXTURE_VERSION}-{digest.hexdigest()}"
+
+
+def evict_page_cache(root):
+    """Saca los archivos del build de la page cache (sin root: fadvise)"""
+    for path in Path(root).rglob("*"):
+        if not path.is_file():
+            continue
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            # DONTNEED no descarta páginas sucias: el fixture recién escrito
+            # seguiría en caché hasta el writeback y la medida "fría" sería caliente
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+# --- Servidores ------------------------------------------------------------
+
+def serve(target, directory, ready_fd):
+    """Modo --serve: arranca el servidor de `target` y escribe su puerto en ready_fd"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    import signal
+
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+
+    if target == "kiosk":
+        # Como KioskLauncher.start_http_server (NEOPILOT_ASSET_CACHE_MB por defecto)
+        from static_server import StaticServer
+
+        server = StaticServer(directory, 0, host="127.0.0.1", cache_max_bytes=32 * 1024 * 1024)
+        server.start()
+        port = server.httpd.server_address[1]
+    elif target == "web":
+        # Como server_web.main, sin abrir el navegador
+        from access_log import access_log_from_env
+        from asset_pack import open_assets
+        from server_web import NeoPilotHTTPHandler
+        from static_server import StaticHTTPServer
+
+        class Handler(NeoPilotHTTPHandler):
+            def get_frontend_dir(self):
+                return directory
+
+        server = StaticHTTPServer(
+            ("127.0.0.1", 0), Handler, asset_cache=open_assets(directory),
+            access_log=access_log_from_env(default="-", default_format="text"),
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        server.ready.wait(5)
+        port = server.server_address[1]
+    else:
+        raise SystemExit(f"target desconocido: {target}")
+
+    os.write(ready_fd, str(port).encode())
+    os.close(ready_fd)
+    signal.sigwait({signal.SIGINT, signal.SIGTERM})
+
+
+def _free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(target, directory, env):
+    """Lanza el servidor en su propio proceso; devuelve (proceso, puerto)"""
+    ready_r, ready_w = os.pipe()
+    if target == "simple":
+        # Exactamente como SimpleKioskLauncher.start_http_server
+        port = _free_port()
+        cmd = [sys.executable, str(BACKEND_DIR / "static_server.py"), str(port),
+               "--directory", str(directory), "--bind", "127.0.0.1", "--ready-fd", str(ready_w)]
+    else:
+        port = None
+        cmd = [sys.executable, str(Path(__file__).resolve()), "--serve", target,
+               "--directory", str(directory), "--ready-fd", str(ready_w)]
+
+    try:
+        process = subprocess.Popen(cmd, env=env, pass_fds=(ready_w,),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        os.close(ready_w)
+
+    try:
+        readable, _, _ = select.select([ready_r], [], [], 15)
+        message = os.read(ready_r, 16) if readable else b""
+    finally:
+        os.close(ready_r)
+
+    if not message:
+        process.kill()
+        raise RuntimeError(f"el servidor {target} no arrancó")
+    if port is None:
+        port = int(message)
+    return process, port
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# --- Cliente ---------------------------------------------------------------
+
+def _client_thread(port, paths, offset, deadline, results):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    latencies = []
+    errors = 0
+    index = offset
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=REQUEST_HEADERS)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    results.append((latencies, errors))
+
+
+def _client_process(port, paths, threads, first_offset, duration):
+    results = []
+    deadline = time.perf_counter() + duration
+    workers = [
+        threading.Thread(target=_client_thread, args=(port, paths, first_offset + i * 7, deadline, results))
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    latencies = [value for thread_latencies, _ in results for value in thread_latencies]
+    return latencies, sum(errors for _, errors in results)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_load(pool, pool_size, port, paths, concurrency, duration):
+    """Carga sostenida con `concurrency` conexiones keep-alive
+
+    Las conexiones se reparten entre los procesos del pool para que el
+    cliente no quede limitado por el GIL.
+    """
+    processes = min(concurrency, pool_size)
+    per_process = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+    offsets = [sum(per_process[:i]) for i in range(processes)]
+
+    started = time.perf_counter()
+    chunks = pool.starmap(_client_process, [
+        (port, paths, threads, offset, duration) for threads, offset in zip(per_process, offsets)
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(value for chunk, _ in chunks for value in chunk)
+    errors = sum(count for _, count in chunks)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+    }
+
+
+def page_load(port, paths):
+    """Descarga todos los assets una vez, como un navegador; devuelve ms"""
+    pending = list(paths)
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        while True:
+            with lock:
+                if not pending:
+                    break
+                path = pending.pop(0)
+            try:
+                conn.request("GET", path, headers=REQUEST_HEADERS)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(path)
+            except (OSError, http.client.HTTPException):
+                errors.append(path)
+                conn.close()
+        conn.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(PAGE_LOAD_CONNECTIONS)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise RuntimeError(f"{len(errors)} assets fallaron, p. ej. {errors[0]}")
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+# --- Ejecución y comparación -----------------------------------------------
+
+def bench_target(target, variant, fixture, paths, pool, pool_size, concurrency, duration):
+    env = dict(os.environ)
+    env.pop("NEOPILOT_ACCESS_LOG", None)
+    pack_path = fixture / "build.neopack"
+    # Sin paquete: una ruta inexistente obliga a servir desde el directorio
+    env["NEOPILOT_ASSET_PACK"] = str(pack_path if variant == "pack" else fixture / "sin-paquete.neopack")
+
+    # Frío: page cache vacía y servidor recién arrancado (caché en memoria vacío)
+    evict_page_cache(fixture)
+    process, port = start_server(target, fixture / "build", env)
+    try:
+        result = {"cold_page_load_ms": page_load(port, paths)}
+        # Una carga en caliente es muy corta: mediana de varias
+        result["warm_page_load_ms"] = statistics.median(page_load(port, paths) for _ in range(WARM_PAGE_LOADS))
+
+        run_load(pool, pool_size, port, paths, max(concurrency), WARMUP_DURATION)
+        result["concurrency"] = {
+            str(level): run_load(pool, pool_size, port, paths, level, duration) for level in concurrency
+        }
+    finally:
+        stop_server(process)
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Lista de (clave, métrica, base, actual, cambio %, es_regresión)"""
+    rows = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+
+        for metric in ("cold_page_load_ms", "warm_page_load_ms"):
+            rows.append(_row(name, metric, previous.get(metric), current.get(metric), threshold, lower_is_better=True))
+
+        for level, stats in current["concurrency"].items():
+            old = previous.get("concurrency", {}).get(level)
+            if old is None:
+                continue
+            key = f"{name} c={level}"
+            rows.append(_row(key, "rps", old.get("rps"), stats["rps"], threshold, lower_is_better=False))
+            rows.append(_row(key, "p99_ms", old.get("p99_ms"), stats["p99_ms"], threshold, lower_is_better=True))
+    return [row for row in rows if row is not None]
+
+
+def _row(key, metric, old, new, threshold, lower_is_better):
+    if not old or new is None:
+        return None
+    change = (new - old) / old * 100
+    regression = change > threshold if lower_is_better else change < -threshold
+    return key, metric, old, new, round(change, 1), regression
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NeoPilot - Benchmark de los servidores HTTP")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="kiosk,simple,web")
+    parser.add_argument("--variants", default=",".join(VARIANTS),
+                        help="cache (directorio + caché en memoria) y/o pack (build.neopack)")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)))
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="segundos por nivel")
+    parser.add_argument("--fixture-dir", default=None, help="directorio del build sintético (temporal por defecto)")
+    parser.add_argument("-o", "--output", default=None, help="archivo JSON de resultados")
+    parser.add_argument("--baseline", default=None, help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="porcentaje de empeoramiento que cuenta como regresión")
+    # Modo interno: proceso servidor
+    parser.add_argument("--serve", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--directory", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--ready-fd", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.directory, args.ready_fd)
+        return 0
+
+    import tempfile
+
+    targets = [t for t in args.targets.split(",") if t]
+    variants = [v for v in args.variants.split(",") if v]
+    concurrency = [int(level) for level in args.concurrency.split(",") if level]
+    unknown = set(targets) - set(TARGETS) | set(variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"valores desconocidos: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="neopilot-bench-") as tmp:
+        fixture = Path(args.fixture_dir or tmp)
+        paths, fixture_digest = make_fixture(fixture)
+        if "pack" in variants:
+            sys.path.insert(0, str(BACKEND_DIR))
+            from asset_pack import build_pack
+            build_pack(fixture / "build", fixture / "build.neopack")
+
+        print(f"🔧 Build sintético: {len(paths)} assets en {fixture}")
+        results = {
+            "meta": {
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "fixture": fixture_digest,
+                "duration_s": args.duration,
+                "concurrency": concurrency,
+            },
+            "results": {},
+        }
+
+        pool_size = min(os.cpu_count() or 1, max(concurrency))
+        with multiprocessing.Pool(pool_size) as pool:
+            for target in targets:
+                for variant in variants:
+                    name = f"{target}/{variant}"
+                    print(f"⏱️  {name}...")
+                    result = bench_target(
+                        target, variant, fixture, paths, pool, pool_size, concurrency, args.duration
+                    )
+                    results["results"][name] = result
+                    summary = ", ".join(
+                        f"c={level}: {stats['rps']:.0f} req/s p99 {stats['p99_ms']} ms"
+                        for level, stats in result["concurrency"].items()
+                    )
+                    print(f"   frío {result['cold_page_load_ms']} ms, caliente {result['warm_page_load_ms']} ms; {summary}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"✅ Resultados guardados en {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if not args.baseline:
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if baseline.get("meta", {}).get("fixture") != fixture_digest:
+        print("⚠️  La línea base usa otro build sintético: la comparación no es fiable")
+
+    rows = compare(results, baseline, args.threshold)
+    regressions = [row for row in rows if row[5]]
+    print(f"\n📊 Comparación con {args.baseline} (umbral {args.threshold}%)")
+    for key, metric, old, new, change, regression in rows:
+        flag = "❌" if regression else "  "
+        print(f"{flag} {key:<22} {metric:<18} {old:>10} -> {new:<10} {change:+.1f}%")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regresiones respecto a la línea base")
+        return 1
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
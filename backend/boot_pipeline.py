@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Arranque por etapas en paralelo
+El import de QtWebEngine, el bind del servidor y la lectura del build
+desde la SD se solapan en lugar de ir uno tras otro; el launcher espera
+a todas las etapas antes de cargar la página, así que el camino crítico
+se acerca a la etapa más lenta y no a la suma
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from asset_pack import SKIP_SUFFIXES, pack_path_for
+from boot_trace import tracer
+
+
+class _Stage:
+    __slots__ = ("name", "thread", "result", "error")
+
+    def __init__(self, name):
+        self.name = name
+        self.thread = None
+        self.result = None
+        self.error = None
+
+
+class BootPipeline:
+    """Etapas del arranque que corren en hilos y se esperan con join()
+
+    Cada etapa aparece en la traza de arranque en su propio hilo, de modo
+    que el solapamiento se ve directamente en chrome://tracing.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def start(self, name, fn, *args):
+        """Lanza fn(*args) en segundo plano como etapa `name`"""
+        stage = self.stages[name] = _Stage(name)
+
+        def run():
+            with tracer.phase(name):
+                try:
+                    stage.result = fn(*args)
+                except Exception as e:
+                    stage.error = e
+
+        stage.thread = threading.Thread(target=run, name=f"neopilot-boot-{name}", daemon=True)
+        stage.thread.start()
+        return stage
+
+    def join(self, name, timeout=None):
+        """Espera a una etapa y devuelve su resultado (o relanza su error)"""
+        stage = self.stages.get(name)
+        if stage is None:
+            return None
+        with tracer.phase("boot_join", stage=name):
+            stage.thread.join(timeout)
+        if stage.thread.is_alive():
+            raise TimeoutError(f"La etapa {name} no terminó a tiempo")
+        if stage.error is not None:
+            raise stage.error
+        return stage.result
+
+    def join_all(self, timeout=None):
+        """Espera a todas las etapas; {nombre: resultado}"""
+        return {name: self.join(name, timeout) for name in list(self.stages)}
+
+    def wait(self, timeout=None):
+        """Espera a que terminen las etapas sin relanzar sus errores (al salir)"""
+        for stage in list(self.stages.values()):
+            stage.thread.join(timeout)
+
+
+def readahead_build(build_dir):
+    """Pide al kernel que lea el build a la page cache (POSIX_FADV_WILLNEED)
+
+    Con build.neopack basta con el paquete; si no, cada archivo del build
+    salvo los source maps. fadvise no bloquea: la lectura la hace el
+    kernel mientras el proceso sigue con otras etapas. Devuelve los bytes
+    pedidos.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return 0
+
+    build_dir = Path(build_dir)
+    pack = pack_path_for(build_dir)
+    if pack.is_file():
+        paths = [pack]
+    else:
+        paths = [
+            path for path in build_dir.rglob("*")
+            if not path.name.endswith(SKIP_SUFFIXES) and path.is_file()
+        ]
+
+    requested = 0
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            requested += os.fstat(fd).st_size
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    return requested
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Trazado de arranque
+Registra cada fase del arranque con relojes monotónicos y la guarda
+en formato Chrome trace (chrome://tracing, Perfetto) por cada boot
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Directorio por defecto de las trazas (NEOPILOT_TRACE_DIR lo cambia)
+DEFAULT_TRACE_DIR = Path.home() / ".cache" / "neopilot" / "boot-traces"
+
+# Número de trazas que se conservan
+MAX_TRACES = 20
+
+# Eventos como máximo por traza; el resto se cuenta en otherData.dropped_events
+MAX_EVENTS = 4096
+
+
+def _process_start_offset_us():
+    """Microsegundos transcurridos desde que el kernel creó el proceso
+
+    Permite medir el arranque del intérprete, que ocurre antes de
+    cualquier import de NeoPilot. None si no se puede calcular.
+    """
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            stat = f.read()
+        # El nombre del proceso va entre paréntesis y puede contener espacios
+        fields = stat[stat.rindex(b")") + 2:].split()
+        start_ticks = int(fields[19])
+        start_s = start_ticks / os.sysconf("SC_CLK_TCK")
+        now_s = time.clock_gettime(time.CLOCK_BOOTTIME)
+        return max(int((now_s - start_s) * 1_000_000), 0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class BootTracer:
+    """Acumula eventos de arranque y los exporta como Chrome trace"""
+
+    def __init__(self, name="neopilot"):
+        self.name = name
+        self.enabled = os.environ.get("NEOPILOT_TRACE", "1") != "0"
+        self.trace_dir = Path(os.environ.get("NEOPILOT_TRACE_DIR", DEFAULT_TRACE_DIR))
+        self.pid = os.getpid()
+        self.events = []
+        self.metadata = {}
+        self._open = {}
+        self._lock = threading.Lock()
+        self._written = None
+        # Tras finish() la traza del boot está completa: no se añade ni se reescribe nada
+        self.finished = False
+        self.dropped = 0
+
+        # El origen de la traza es la creación del proceso, de modo que el
+        # arranque del intérprete aparece como primera fase
+        offset = _process_start_offset_us() or 0
+        self._origin_ns = time.monotonic_ns() - offset * 1000
+        if offset:
+            self._add({
+                "name": "interpreter_start", "ph": "X", "cat": "boot",
+                "ts": 0, "dur": offset,
+            })
+
+    def now_us(self):
+        """Microsegundos desde el inicio del proceso"""
+        return (time.monotonic_ns() - self._origin_ns) // 1000
+
+    def begin(self, name, **args):
+        """Abre una fase; se cierra con end(name)"""
+        self._open[name] = self.now_us()
+        self._add({"name": name, "ph": "B", "cat": "boot", "ts": self._open[name], "args": args})
+
+    def end(self, name, **args):
+        """Cierra una fase abierta con begin(name)"""
+        if self._open.pop(name, None) is None:
+            return
+        self._add({"name": name, "ph": "E", "cat": "boot", "ts": self.now_us(), "args": args})
+
+    @contextmanager
+    def phase(self, name, **args):
+        """Mide un bloque como evento completo"""
+        start = self.now_us()
+        try:
+            yield
+        finally:
+            self._add({
+                "name": name, "ph": "X", "cat": "boot",
+                "ts": start, "dur": self.now_us() - start, "args": args,
+            })
+
+    def mark(self, name, **args):
+        """Evento instantáneo (hito)"""
+        self._add({"name": name, "ph": "i", "s": "p", "cat": "boot", "ts": self.now_us(), "args": args})
+
+    def counter(self, name, value):
+        """Serie numérica, p. ej. el progreso de carga"""
+        self._add({"name": name, "ph": "C", "cat": "boot", "ts": self.now_us(), "args": {name: value}})
+
+    def attach_webview(self, view):
+        """Engancha las señales de carga de un QWebEngineView
+
+        Registra loadStarted/loadProgress/loadFinished y, al terminar la
+        carga, consulta first-contentful-paint en el Performance API.
+        Solo se mide la primera carga: después las señales se desconectan,
+        así que recargas, reinicios del renderer o el modo reposo no
+        añaden eventos a la traza del boot.
+        """
+        def on_load_started():
+            self.begin("page_load")
+
+        def on_load_progress(progress):
+            self.counter("load_progress", progress)
+
+        def on_load_finished(ok):
+            view.loadStarted.disconnect(on_load_started)
+            view.loadProgress.disconnect(on_load_progress)
+            view.loadFinished.disconnect(on_load_finished)
+            self.end("page_load", ok=ok)
+            self.mark("load_finished", ok=ok)
+            view.page().runJavaScript(
+                "(function(){var e=performance.getEntriesByName('first-contentful-paint')[0];"
+                "return e ? e.startTime : null;})()",
+                on_paint_timing
+            )
+
+        def on_paint_timing(fcp_ms):
+            if fcp_ms is not None:
+                self.mark("first_contentful_paint", page_ms=fcp_ms)
+            self.finish()
+
+        view.loadStarted.connect(on_load_started)
+        view.loadProgress.connect(on_load_progress)
+        view.loadFinished.connect(on_load_finished)
+
+    def finish(self):
+        """Cierra la traza del boot y la guarda por última vez"""
+        if self.finished:
+            return self._written
+        path = self.write()
+        self.finished = True
+        return path
+
+    def write(self):
+        """Guarda la traza del boot actual; devuelve la ruta o None"""
+        if not self.enabled or self.finished:
+            return self._written
+
+        with self._lock:
+            events = list(self.events)
+
+        trace = {
+            "traceEvents": [
+                {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                 "args": {"name": self.name}},
+            ] + events,
+            "displayTimeUnit": "ms",
+            "otherData": dict(self.metadata, boot_id=_boot_id(), wall_time=time.time(),
+                              dropped_events=self.dropped),
+        }
+
+        try:
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            if self._written is None:
+                stamp = time.strftime("%Y%m%d-%H%M%S")
+                self._written = self.trace_dir / f"boot-{stamp}-{self.pid}.json"
+            tmp = self._written.with_suffix(".tmp")
+            tmp.write_text(json.dumps(trace))
+            tmp.replace(self._written)
+            self._prune()
+        except OSError as e:
+            print(f"⚠️  No se pudo guardar la traza de arranque: {e}")
+            return None
+        return self._written
+
+    def _add(self, event):
+        if not self.enabled or self.finished:
+            return
+        event.setdefault("pid", self.pid)
+        event.setdefault("tid", threading.get_native_id())
+        with self._lock:
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    def _prune(self):
+        traces = sorted(self.trace_dir.glob("boot-*.json"))
+        for old in traces[:-MAX_TRACES]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def _boot_id():
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+# Tracer compartido por todos los módulos del proceso
+tracer = BootTracer()
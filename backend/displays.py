@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Pantallas del kiosko
+Reparte las rutas del frontend entre las pantallas conectadas según
+NEOPILOT_DISPLAYS, para abrir todas desde un solo proceso (una
+QApplication, un perfil, un servidor y un caché de assets)
+"""
+
+import os
+
+# Sin configuración: la ruta principal en la pantalla principal
+DEFAULT_DISPLAYS = "primary=/"
+
+
+def parse_displays(spec):
+    """"HDMI-A-1=/,HDMI-A-2=/rear" -> [("HDMI-A-1", "/"), ("HDMI-A-2", "/rear")]
+
+    La pantalla puede ser su nombre (QScreen.name()), su índice en
+    QApplication.screens() o "primary"; la ruta es la del SPA que se abre.
+    """
+    layout = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        selector, sep, route = entry.partition("=")
+        if not sep or not selector.strip():
+            print(f"⚠️  Entrada ignorada en NEOPILOT_DISPLAYS: {entry!r} (formato pantalla=ruta)")
+            continue
+        layout.append((selector.strip(), "/" + route.strip().lstrip("/")))
+    return layout
+
+
+def display_layout():
+    """Pantallas configuradas; la principal con "/" si no hay ninguna válida"""
+    return parse_displays(os.environ.get("NEOPILOT_DISPLAYS", DEFAULT_DISPLAYS)) or parse_displays(DEFAULT_DISPLAYS)
+
+
+def assign_screens(screens, primary, layout):
+    """Empareja cada entrada con una QScreen conectada: [(screen, ruta)]
+
+    Las pantallas que no están conectadas se omiten y el kiosko arranca
+    con las que haya; si no queda ninguna, la primera ruta va a la principal.
+    """
+    by_name = {screen.name(): screen for screen in screens}
+    assigned = []
+    used = set()
+
+    for selector, route in layout:
+        if selector == "primary":
+            screen = primary
+        elif selector.isdigit():
+            index = int(selector)
+            screen = screens[index] if index < len(screens) else None
+        else:
+            screen = by_name.get(selector)
+
+        if screen is None:
+            print(f"⚠️  Pantalla {selector} no conectada, se omite {route}")
+            continue
+        if screen.name() in used:
+            print(f"⚠️  La pantalla {screen.name()} ya tiene ventana, se omite {route}")
+            continue
+        used.add(screen.name())
+        assigned.append((screen, route))
+
+    if not assigned:
+        assigned.append((primary, layout[0][1] if layout else "/"))
+    return assigned
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Telemetría de hardware
+Muestrea CPU, frecuencia por núcleo, temperatura del SoC, memoria y estado
+de throttling leyendo /proc y /sys con descriptores abiertos y pread
+"""
+
+import glob
+import math
+import os
+import re
+import threading
+import time
+from array import array
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Campos fijos de cada muestra; después van las frecuencias por núcleo (MHz)
+FIELDS = (
+    "timestamp",
+    "cpu_percent",
+    "temperature_c",
+    "memory_percent",
+    "memory_available_mb",
+    "throttled",
+)
+
+# Bits de get_throttled del firmware de Raspberry Pi
+THROTTLE_FLAGS = {
+    0: "under_voltage",
+    1: "freq_capped",
+    2: "throttled",
+    3: "soft_temp_limit",
+    16: "under_voltage_occurred",
+    17: "freq_capped_occurred",
+    18: "throttled_occurred",
+    19: "soft_temp_limit_occurred",
+}
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_CAPACITY = 600
+
+PROC_STAT = "/proc/stat"
+PROC_MEMINFO = "/proc/meminfo"
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+CPUFREQ_GLOB = "/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"
+CORE_PATTERN = re.compile(r"cpu(\d+)/cpufreq")
+# La ruta del firmware cambia entre Pi 4 (soc:firmware) y Pi 5 (soc@.../...:firmware)
+THROTTLED_GLOB = "/sys/devices/platform/soc*/*firmware/get_throttled"
+
+
+def decode_throttled(value):
+    """Convierte el valor de get_throttled en la lista de flags activos"""
+    value = int(value)
+    return [name for bit, name in THROTTLE_FLAGS.items() if value & (1 << bit)]
+
+
+class SampleRing:
+    """Buffer circular de tamaño fijo sobre un array('d') contiguo"""
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.width = width
+        self.data = array("d", bytes(8 * capacity * width))
+        self.count = 0
+        self.head = 0
+
+    def append(self, values):
+        start = self.head * self.width
+        self.data[start:start + self.width] = array("d", values)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n=None):
+        """Las n muestras más recientes, de la más antigua a la más nueva"""
+        n = self.count if n is None else min(n, self.count)
+        rows = []
+        for i in range(n):
+            index = (self.head - n + i) % self.capacity
+            start = index * self.width
+            rows.append(self.data[start:start + self.width])
+        return rows
+
+
+def _pread_file(fd, size):
+    return os.pread(fd, size, 0)
+
+
+class _ProcSource:
+    """Lecturas de /proc y /sys con descriptores abiertos una sola vez"""
+
+    def __init__(self):
+        self.stat_fd = os.open(PROC_STAT, os.O_RDONLY)
+        self.meminfo_fd = os.open(PROC_MEMINFO, os.O_RDONLY)
+        self.temp_fd = self._open_optional(THERMAL_ZONE)
+        paths = glob.glob(THROTTLED_GLOB)
+        self.throttled_fd = self._open_optional(paths[0]) if paths else None
+        freq_paths = sorted(glob.glob(CPUFREQ_GLOB), key=_core_number)
+        self.freq_fds = [fd for fd in map(self._open_optional, freq_paths) if fd is not None]
+        self.core_count = len(self.freq_fds) or os.cpu_count() or 1
+        self._prev_busy = self._prev_total = 0
+
+    @staticmethod
+    def _open_optional(path):
+        try:
+            return os.open(path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    def cpu_percent(self):
+        # Solo hace falta la primera línea ("cpu  user nice system idle iowait ...")
+        line = _pread_file(self.stat_fd, 256).split(b"\n", 1)[0]
+        values = [int(v) for v in line.split()[1:9]]
+        idle = values[3] + values[4]
+        total = sum(values)
+        busy = total - idle
+
+        delta_total = total - self._prev_total
+        delta_busy = busy - self._prev_busy
+        self._prev_busy, self._prev_total = busy, total
+
+        if delta_total <= 0:
+            return 0.0
+        return 100.0 * delta_busy / delta_total
+
+    def memory(self):
+        # MemTotal, MemFree y MemAvailable son las tres primeras líneas
+        info = {}
+        for line in _pread_file(self.meminfo_fd, 256).split(b"\n")[:3]:
+            key, _, rest = line.partition(b":")
+            if rest:
+                info[key] = int(rest.split()[0])
+        total = info.get(b"MemTotal", 0)
+        available = info.get(b"MemAvailable", info.get(b"MemFree", 0))
+        percent = 100.0 * (total - available) / total if total else 0.0
+        return percent, available / 1024.0
+
+    def temperature(self):
+        if self.temp_fd is None:
+            return math.nan
+        return int(_pread_file(self.temp_fd, 16)) / 1000.0
+
+    def throttled(self):
+        if self.throttled_fd is None:
+            return 0
+        return int(_pread_file(self.throttled_fd, 16).strip() or b"0", 16)
+
+    def frequencies(self):
+        return [int(_pread_file(fd, 16)) / 1000.0 for fd in self.freq_fds]
+
+    def close(self):
+        fds = [self.stat_fd, self.meminfo_fd, self.temp_fd, self.throttled_fd] + self.freq_fds
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+
+
+class _PortableSource:
+    """Alternativa para hosts sin /proc (desarrollo en macOS, etc.)"""
+
+    def __init__(self):
+        self.core_count = os.cpu_count() or 1
+
+    def cpu_percent(self):
+        if psutil:
+            return psutil.cpu_percent(interval=None)
+        try:
+            return min(100.0, 100.0 * os.getloadavg()[0] / self.core_count)
+        except OSError:
+            return math.nan
+
+    def memory(self):
+        if psutil:
+            mem = psutil.virtual_memory()
+            return mem.percent, mem.available / (1024.0 * 1024.0)
+        return math.nan, math.nan
+
+    def temperature(self):
+        if psutil and hasattr(psutil, "sensors_temperatures"):
+            for entries in psutil.sensors_temperatures().values():
+                if entries:
+                    return entries[0].current
+        return math.nan
+
+    def throttled(self):
+        return 0
+
+    def frequencies(self):
+        if psutil:
+            try:
+                return [f.current for f in psutil.cpu_freq(percpu=True)][:self.core_count]
+            except (AttributeError, NotImplementedError, OSError):
+                pass
+        return []
+
+    def close(self):
+        pass
+
+
+class HardwareSampler:
+    """Muestreo periódico de hardware en un hilo de fondo"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, capacity=DEFAULT_CAPACITY):
+        self.interval = interval
+        try:
+            self.source = _ProcSource()
+        except OSError:
+            self.source = _PortableSource()
+        self.core_count = self.source.core_count
+        self.ring = SampleRing(capacity, len(FIELDS) + self.core_count)
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        """Toma una muestra, la guarda en el ring buffer y la devuelve"""
+        memory_percent, available_mb = self.source.memory()
+        frequencies = self.source.frequencies()
+        frequencies += [math.nan] * (self.core_count - len(frequencies))
+
+        values = [
+            time.time(),
+            self.source.cpu_percent(),
+            self.source.temperature(),
+            memory_percent,
+            available_mb,
+            float(self.source.throttled()),
+        ] + frequencies[:self.core_count]
+
+        with self._lock:
+            self.ring.append(values)
+
+        # Un listener que falla no debe parar el muestreo ni a los demás
+        for listener in list(self.listeners):
+            try:
+                listener(values)
+            except Exception as e:
+                print(f"⚠️  Error en listener de hardware {getattr(listener, '__qualname__', listener)}: {e}")
+        return values
+
+    def latest(self):
+        """Última muestra como diccionario (None si aún no hay muestras)"""
+        with self._lock:
+            rows = self.ring.last(1)
+        return self.to_dict(rows[0]) if rows else None
+
+    def history(self, n=None):
+        """Últimas n muestras como diccionarios"""
+        with self._lock:
+            rows = self.ring.last(n)
+        return [self.to_dict(row) for row in rows]
+
+    def to_dict(self, row):
+        sample = {name: _clean(row[i]) for i, name in enumerate(FIELDS)}
+        sample["throttled"] = int(row[5])
+        sample["throttled_flags"] = decode_throttled(row[5])
+        sample["cpu_freq_mhz"] = [_clean(v) for v in row[len(FIELDS):]]
+        return sample
+
+    def add_listener(self, callback):
+        """callback(values) se llama desde el hilo de muestreo en cada muestra"""
+        self.listeners.append(callback)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # Primera lectura para tener la base del cálculo de CPU
+        self.source.cpu_percent()
+        self._thread = threading.Thread(target=self._run, name="neopilot-hardware", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        self.source.close()
+
+    def _run(self):
+        # Intervalos anclados al reloj monotónico para no acumular deriva
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Error leyendo hardware: {e}")
+            next_tick += self.interval
+            self._stop.wait(max(0.0, next_tick - time.monotonic()))
+
+
+def _core_number(path):
+    """Número de núcleo de .../cpu3/cpufreq/scaling_cur_freq (3)"""
+    match = CORE_PATTERN.search(path)
+    return int(match.group(1)) if match else -1
+
+
+def _clean(value):
+    """NaN no es JSON válido: se reporta como None"""
+    return None if math.isnan(value) else round(value, 2)
+
+
+_default_sampler = None
+_default_lock = threading.Lock()
+
+
+def get_sampler(interval=None):
+    """Sampler compartido por el proceso, iniciado bajo demanda
+
+    El intervalo por defecto se puede cambiar con NEOPILOT_SAMPLE_INTERVAL.
+    Las muestras también se guardan en el historial de telemetry_history.
+    """
+    global _default_sampler
+    with _default_lock:
+        if _default_sampler is None:
+            if interval is None:
+                interval = float(os.environ.get("NEOPILOT_SAMPLE_INTERVAL", DEFAULT_INTERVAL))
+            _default_sampler = HardwareSampler(interval=interval)
+            from telemetry_history import attach_history
+            attach_history(_default_sampler)
+            _default_sampler.start()
+    return _default_sampler
+
+
+if __name__ == "__main__":
+    sampler = HardwareSampler(interval=1.0)
+    sampler.source.cpu_percent()
+    try:
+        while True:
+            time.sleep(sampler.interval)
+            print(sampler.to_dict(sampler.sample()))
+    except KeyboardInterrupt:
+        sampler.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Modo reposo del kiosko
+Tras N minutos sin toques congela la página (timers, animaciones y
+render se detienen) y deja la pantalla en negro; el primer toque la
+reactiva al instante sin llegar a pulsar nada en la interfaz
+"""
+
+import os
+import shlex
+import subprocess
+import time
+
+# Minutos sin entrada hasta el reposo (0 lo desactiva)
+DEFAULT_IDLE_MINUTES = 5
+
+_controller_class = None
+
+
+def idle_timeout_ms():
+    minutes = float(os.environ.get("NEOPILOT_IDLE_MINUTES", DEFAULT_IDLE_MINUTES))
+    return int(minutes * 60 * 1000)
+
+
+def _run_display_command(variable):
+    """Ejecuta NEOPILOT_DISPLAY_OFF_CMD / NEOPILOT_DISPLAY_ON_CMD si están definidos
+
+    Por ejemplo "wlr-randr --output HDMI-A-1 --off" o "xset dpms force off".
+    """
+    command = os.environ.get(variable)
+    if not command:
+        return
+    try:
+        subprocess.Popen(shlex.split(command), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"⚠️  No se pudo ejecutar {variable}: {e}")
+
+
+def install_idle_mode(window, view, timeout_ms=None):
+    """Activa el modo reposo para una ventana con un QWebEngineView
+
+    Devuelve el controlador, o None si el reposo está desactivado.
+    """
+    if timeout_ms is None:
+        timeout_ms = idle_timeout_ms()
+    if timeout_ms <= 0:
+        return None
+    return create_idle_controller(window, view, timeout_ms)
+
+
+def create_idle_controller(window, view, timeout_ms):
+    """Crea el IdleController (PyQt5 se importa aquí, no al cargar el módulo)"""
+    global _controller_class
+
+    if _controller_class is None:
+        from PyQt5.QtCore import QEvent, QObject, QTimer
+        from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+        input_events = frozenset((
+            QEvent.MouseButtonPress,
+            QEvent.MouseMove,
+            QEvent.Wheel,
+            QEvent.KeyPress,
+            QEvent.TouchBegin,
+            QEvent.TouchUpdate,
+        ))
+        wake_events = frozenset((
+            QEvent.MouseButtonPress,
+            QEvent.MouseButtonRelease,
+            QEvent.MouseButtonDblClick,
+            QEvent.KeyPress,
+            QEvent.KeyRelease,
+            QEvent.TouchBegin,
+            QEvent.TouchUpdate,
+            QEvent.TouchEnd,
+        ))
+        watched_events = input_events | wake_events
+        # setLifecycleState/setVisible existen desde Qt 5.14
+        lifecycle = getattr(QWebEnginePage, "LifecycleState", None)
+
+        class IdleController(QObject):
+            def __init__(self, window, view, timeout_ms):
+                super().__init__(window)
+                self.window = window
+                self.view = view
+                self.timeout_ms = timeout_ms
+                self.idle = False
+                self.paused = False
+                self.last_input = time.monotonic()
+
+                # Un solo timer de disparo único: la entrada solo anota la
+                # hora y el timer se reprograma al vencer, sin despertar la CPU
+                self.timer = QTimer(self)
+                self.timer.setSingleShot(True)
+                self.timer.timeout.connect(self._check_idle)
+                self.timer.start(timeout_ms)
+
+                window.setStyleSheet("QMainWindow { background: #000; }")
+                # Solo la ventana (recibe los toques con la vista oculta) y el
+                # widget de QtWebEngine que recibe la entrada, no toda la app
+                self._proxy = None
+                window.installEventFilter(self)
+                view.installEventFilter(self)
+                self._attach_proxy()
+
+            def _attach_proxy(self):
+                """El focus proxy de la vista se crea con la página y cambia si se reinicia el render"""
+                proxy = self.view.focusProxy()
+                if proxy is not None and proxy is not self._proxy:
+                    proxy.installEventFilter(self)
+                    self._proxy = proxy
+
+            def eventFilter(self, obj, event):
+                event_type = event.type()
+                if event_type not in watched_events:
+                    if event_type == QEvent.ChildAdded and obj is self.view:
+                        QTimer.singleShot(0, self._attach_proxy)
+                    return False
+                if self.idle:
+                    if event_type in wake_events:
+                        self.wake()
+                        # El toque que despierta no llega a la interfaz
+                        return True
+                    return False
+                if event_type in input_events:
+                    self.last_input = time.monotonic()
+                return False
+
+            def set_paused(self, paused):
+                """Sin contar reposo mientras una app externa tiene la pantalla"""
+                if paused == self.paused:
+                    return
+                self.paused = paused
+                if paused:
+                    self.timer.stop()
+                else:
+                    # El plazo empieza de nuevo al volver al kiosko
+                    self.last_input = time.monotonic()
+                    self.timer.start(self.timeout_ms)
+
+            def _check_idle(self):
+                if self.paused:
+                    return
+                remaining = self.timeout_ms - (time.monotonic() - self.last_input) * 1000
+                if remaining > 0:
+                    self.timer.start(int(remaining) + 1)
+                else:
+                    self.sleep()
+
+            def sleep(self):
+                if self.idle:
+                    return
+                self.idle = True
+                page = self.view.page()
+                if lifecycle is not None:
+                    # Página oculta y congelada: sin rAF, timers ni animaciones
+                    page.setVisible(False)
+                    page.setLifecycleState(lifecycle.Frozen)
+                self.view.hide()
+                _run_display_command("NEOPILOT_DISPLAY_OFF_CMD")
+                print("🌙 Modo reposo")
+
+            def wake(self):
+                if not self.idle:
+                    return
+                self.idle = False
+                self.last_input = time.monotonic()
+                _run_display_command("NEOPILOT_DISPLAY_ON_CMD")
+                page = self.view.page()
+                if lifecycle is not None:
+                    page.setLifecycleState(lifecycle.Active)
+                    page.setVisible(True)
+                self.view.show()
+                self.timer.start(self.timeout_ms)
+                print("☀️  Saliendo del modo reposo")
+
+        _controller_class = IdleController
+
+    return _controller_class(window, view, timeout_ms)
@@ -6,85 +6,88 @@ Aplicación de kiosko en pantalla completa usando PyQt5 + QtWebEngine
 
 import sys
 import os
-import subprocess
 import signal
-import time
-import platform
-import socket
-from pathlib import Path
+import errno
+
+from boot_pipeline import BootPipeline, readahead_build
+from boot_trace import tracer
+from displays import assign_screens, display_layout
+from launcher_core import frontend_available, frontend_index, get_environment
+from socket_handoff import HandoffListener, request_handoff
+from supervisor import Supervisor, supervise_renderer, supervise_server
 
 class KioskLauncher:
     def __init__(self):
-        self.is_rpi = platform.machine().startswith(('arm', 'aarch'))
-        self.frontend_path = Path(__file__).parent.parent / "frontend" / "build" / "index.html"
+        self.environment = get_environment()
+        self.is_rpi = self.environment["is_rpi"]
+        self.frontend_path = frontend_index()
         self.server_port = 8080
+        # Memoria para el caché de assets del servidor (0 = desactivado)
+        self.asset_cache_mb = int(os.environ.get("NEOPILOT_ASSET_CACHE_MB", "32"))
+        # "http": servidor local en server_port; "scheme": neopilot:// sin sockets
+        self.serve_mode = os.environ.get("NEOPILOT_SERVE_MODE", "http")
         self.server_process = None
+        self.server = None
+        self.asset_cache = None
+        self.app = None
+        # Relevo del socket HTTP entre la instancia anterior y la nueva
+        self.handoff_lease = None
+        self.handoff_listener = None
+        # Reinicia el servidor o el renderer que falle sin relanzar el proceso;
+        # si fallan sin parar se sale con error y systemd relanza el proceso
+        self.exit_code = 0
+        self.supervisor = Supervisor(on_exhausted=self.on_component_exhausted)
+        
+    def app_url(self, route="/"):
+        """URL que carga una ventana del kiosko según el modo de servicio"""
+        if self.serve_mode == "scheme":
+            from app_scheme import APP_URL
+            return APP_URL.rstrip("/") + route
+        return f"http://localhost:{self.server_port}{route}"
         
     def start_http_server(self):
         """Inicia el servidor HTTP integrado para servir el frontend"""
         try:
-            import http.server
-            import socketserver
-            import threading
+            from static_server import StaticServer
             
             # Directorio del frontend compilado
             frontend_dir = self.frontend_path.parent
             
             print(f"🔍 Sirviendo archivos desde: {frontend_dir}")
             
-            class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-                def __init__(self, *args, **kwargs):
-                    super().__init__(*args, directory=str(frontend_dir), **kwargs)
-                
-                def log_message(self, format, *args):
-                    # Silenciar logs HTTP
-                    pass
+            # Servidor concurrente HTTP/1.1 con keep-alive y caché en memoria
+            self.server = StaticServer(
+                frontend_dir,
+                self.server_port,
+                cache_max_bytes=self.asset_cache_mb * 1024 * 1024
+            )
             
             # Intentar crear servidor HTTP
             try:
-                self.httpd = socketserver.TCPServer(("", self.server_port), CustomHTTPRequestHandler)
-                # Permitir reutilizar el puerto inmediatamente
-                self.httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                self.server.start()
             except OSError as e:
-                if e.errno == 98:  # Address already in use
-                    print(f"❌ Puerto {self.server_port} ya está en uso")
-                    print("💡 Esperando 3 segundos para liberar puerto...")
-                    
-                    # Intentar matar procesos que usen el puerto y esperar
-                    try:
-                        import subprocess
-                        subprocess.run(["pkill", "-f", "kiosk_launcher.py"], check=False)
-                        time.sleep(3)
-                        # Reintentar con reutilización de puerto
-                        self.httpd = socketserver.TCPServer(("", self.server_port), CustomHTTPRequestHandler)
-                        self.httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                        print("✅ Puerto liberado, servidor iniciado")
-                    except Exception as retry_error:
-                        print(f"❌ No se pudo liberar puerto: {retry_error}")
-                        return False
-                else:
-                    raise e
-            
-            print(f"✅ Servidor HTTP iniciado en puerto {self.server_port}")
+                if e.errno != errno.EADDRINUSE:
+                    raise
+                # Otra instancia de NeoPilot tiene el puerto: pedirle el socket
+                handoff = request_handoff(self.server_port)
+                if handoff is None:
+                    print(f"❌ Puerto {self.server_port} ya está en uso por otro proceso")
+                    return False
+                listen_socket, self.handoff_lease = handoff
+                self.server.start(listen_socket=listen_socket)
+                print("🔁 Socket HTTP recibido de la instancia anterior")
             
-            # Ejecutar servidor en hilo separado
-            def serve_forever():
-                self.httpd.serve_forever()
+            # Una futura instancia podrá pedirnos el socket del mismo modo
+            self.handoff_listener = HandoffListener(self.server, self.server_port, on_released=self.on_handed_off)
+            self.handoff_listener.start()
             
-            self.server_thread = threading.Thread(target=serve_forever, daemon=True)
-            self.server_thread.start()
+            self.httpd = self.server.httpd
+            self.server_thread = self.server.thread
+            supervise_server(self.supervisor, self.server)
+            print(f"✅ Servidor HTTP iniciado en puerto {self.server_port}")
             
-            # Pequeña pausa para asegurar que el servidor está listo
-            time.sleep(1)
-            
-            # Verificar que el servidor responde
-            try:
-                import urllib.request
-                test_url = f"http://localhost:{self.server_port}"
-                urllib.request.urlopen(test_url, timeout=2)
-                print(f"🌐 Servidor verificado: {test_url}")
-            except Exception as e:
-                print(f"⚠️  Advertencia: No se pudo verificar servidor: {e}")
+            # start() retorna cuando el servidor ya acepta conexiones
+            print(f"🌐 Servidor listo: http://localhost:{self.server_port}")
             
             # Guardar referencia al servidor
             self.server_process = self.httpd
@@ -94,38 +97,110 @@ class KioskLauncher:
             print(f"❌ Error iniciando servidor HTTP: {e}")
             return False
     
-    def start_pyqt5_kiosk(self):
-        """Inicia el modo kiosko con PyQt5"""
+    def release_previous_instance(self, ok=True):
+        """La ventana nueva ya cargó: la instancia anterior puede cerrarse
+
+        Con una carga fallida (ok=False) la anterior sigue sirviendo; si
+        ninguna carga termina bien, recupera el puerto al vencer su plazo.
+        """
+        if ok and self.handoff_lease is not None:
+            self.handoff_lease.ready()
+            self.handoff_lease = None
+    
+    def on_handed_off(self):
+        """Otra instancia tomó el socket y ya muestra su ventana: salir"""
+        print("👋 Relevo completado, cerrando esta instancia")
+        if self.app is not None:
+            # Llamado desde el hilo del relevo: quit() se encola en el de Qt
+            from PyQt5.QtCore import QMetaObject, Qt
+            QMetaObject.invokeMethod(self.app, "quit", Qt.QueuedConnection)
+    
+    def on_component_exhausted(self, name):
+        """Un componente agotó sus reinicios: salir con error"""
+        self.exit_code = 1
+        if self.app is not None:
+            from PyQt5.QtCore import QMetaObject, Qt
+            QMetaObject.invokeMethod(self.app, "quit", Qt.QueuedConnection)
+    
+    def start_pyqt5_kiosk(self, pipeline=None):
+        """Inicia el modo kiosko con PyQt5
+
+        Con `pipeline`, el servidor y la lectura del build avanzan en
+        paralelo mientras aquí se importa Qt; se esperan antes de load().
+        """
+        pipeline = pipeline or BootPipeline()
         try:
             # Configuración para evitar conflictos
             os.environ.pop('SNAP', None)
             os.environ.pop('SNAP_DESKTOP_RUNTIME', None)
             
-            from PyQt5.QtWidgets import QApplication, QMainWindow
-            from PyQt5.QtWebEngineWidgets import QWebEngineView
-            from PyQt5.QtCore import QUrl, Qt
+            with tracer.phase("qt_import"):
+                from PyQt5.QtWidgets import QApplication, QMainWindow
+                from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
+                from PyQt5.QtCore import QEvent, QUrl, Qt
+            
+            from memory_monitor import install_memory_guard
+            from web_bridge import install_web_bridge
+            from web_profile import create_kiosk_profile
             
             class KioskBrowser(QMainWindow):
-                def __init__(self, server_port, parent_launcher):
+                def __init__(self, url, profile, parent_launcher, screen=None, bridge=None, trace=True):
                     super().__init__()
-                    self.server_port = server_port
+                    self.url = url
                     self.parent_launcher = parent_launcher
                     
                     # Configurar ventana kiosko
                     self.setWindowTitle("NeoPilot Kiosk")
                     self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
                     
+                    # Fijar la pantalla antes de mostrarla: el modo pantalla completa usa la suya
+                    if screen is not None:
+                        self.create()
+                        self.windowHandle().setScreen(screen)
+                        self.setGeometry(screen.geometry())
+                    
                     # Crear WebEngine view
                     self.browser = QWebEngineView()
+                    # Página sobre el perfil persistente (caché HTTP y de código V8)
+                    self.browser.setPage(QWebEnginePage(profile, self.browser))
                     self.setCentralWidget(self.browser)
+                    if trace:
+                        tracer.attach_webview(self.browser)
+                    
+                    # Backend en proceso por QWebChannel; sin él la página usa la red
+                    self.bridge = install_web_bridge(self.browser, profile, bridge)
+                    if self.bridge is not None:
+                        self.bridge.apps_running.connect(self.on_apps_running)
                     
                     # Cargar URL local
-                    url = f"http://localhost:{self.server_port}"
-                    self.browser.load(QUrl(url))
+                    tracer.mark("webview_load", url=self.url)
+                    self.browser.load(QUrl(self.url))
                     
                     # Pantalla completa
                     self.showFullScreen()
                     
+                def on_apps_running(self, count):
+                    """Una app externa abierta queda encima del kiosko hasta que se cierra"""
+                    on_top = count == 0
+                    handle = self.windowHandle()
+                    if bool(handle.flags() & Qt.WindowStaysOnTopHint) == on_top:
+                        return
+                    # En la QWindow: QWidget.setWindowFlag recrea y oculta la ventana
+                    handle.setFlag(Qt.WindowStaysOnTopHint, on_top)
+                    if on_top:
+                        self.raise_()
+                    else:
+                        self.lower()
+                    
+                def changeEvent(self, event):
+                    """Otro proceso tomó la activación: la ventana de la app lanzada ya se ve"""
+                    launcher = self.bridge.launcher if self.bridge is not None else None
+                    if (event.type() == QEvent.ActivationChange and not self.isActiveWindow()
+                            and launcher is not None and launcher.running
+                            and QApplication.activeWindow() is None):
+                        launcher.app_ready()
+                    super().changeEvent(event)
+                    
                 def keyPressEvent(self, event):
                     """Control de teclas en modo kiosko"""
                     # Solo Alt+F4 para salir en desarrollo
@@ -142,18 +217,62 @@ class KioskLauncher:
                     if self.parent_launcher:
                         self.parent_launcher.cleanup()
                     event.accept()
+                    # Cerrar una pantalla cierra el kiosko entero (las demás comparten servidor)
+                    QApplication.instance().quit()
             
-            app = QApplication(sys.argv)
-            app.setQuitOnLastWindowClosed(True)
+            if self.serve_mode == "scheme":
+                # El esquema debe registrarse antes de crear QApplication
+                from app_scheme import register_app_scheme
+                register_app_scheme()
             
-            window = KioskBrowser(self.server_port, self)
+            with tracer.phase("qapplication_init"):
+                app = QApplication(sys.argv)
+                app.setQuitOnLastWindowClosed(True)
+                self.app = app
+            
+            with tracer.phase("profile_init"):
+                self.profile = create_kiosk_profile(self.frontend_path.parent, parent=app)
+            
+            if self.serve_mode == "scheme":
+                self.install_app_scheme(self.profile, pipeline.join("asset_open"))
+            elif "server_bind" in pipeline.stages and not pipeline.join("server_bind"):
+                print("❌ No se pudo iniciar el servidor HTTP")
+                return 1
+            pipeline.join_all()
+            
+            # Una ventana por pantalla configurada; todas comparten perfil,
+            # servidor y caché de assets, así que cada pantalla extra es un renderer más
+            displays = assign_screens(app.screens(), app.primaryScreen(), display_layout())
+            self.windows = []
+            with tracer.phase("window_create", displays=len(displays)):
+                for screen, route in displays:
+                    bridge = self.windows[0].bridge if self.windows else None
+                    window = KioskBrowser(
+                        self.app_url(route), self.profile, self,
+                        screen=screen, bridge=bridge, trace=not self.windows
+                    )
+                    self.windows.append(window)
+                    print(f"🖥️  {screen.name()}: {window.url}")
+            
+            main_window = self.windows[0]
+            for index, window in enumerate(self.windows):
+                supervise_renderer(self.supervisor, window.browser, name="renderer" if index == 0 else f"renderer-{index}")
+            # La instancia anterior (si nos pasó el socket) cierra cuando esta ya se ve
+            main_window.browser.loadFinished.connect(self.release_previous_instance)
+            
+            # Libera cachés (y si hace falta reinicia el renderer) antes del OOM
+            asset_cache = self.asset_cache or (self.server.asset_cache if self.server else None)
+            self.memory_guard = install_memory_guard(main_window.browser, asset_cache)
+            if self.memory_guard is not None:
+                for window in self.windows[1:]:
+                    self.memory_guard.add_view(window.browser)
             
             print("✅ NeoPilot Kiosk iniciado - Presiona Alt+F4 para salir")
             result = app.exec_()
             
             # Asegurar cleanup al salir
             self.cleanup()
-            return result
+            return self.exit_code or result
             
         except ImportError as e:
             print(f"❌ PyQt5 no disponible: {e}")
@@ -163,39 +282,51 @@ class KioskLauncher:
             print(f"❌ Error con PyQt5: {e}")
             return 1
     
+    def open_assets(self):
+        """Paquete o caché de assets del build (sin Qt: puede ir en paralelo al import)"""
+        from asset_pack import open_assets
+        
+        return open_assets(
+            self.frontend_path.parent,
+            max_bytes=self.asset_cache_mb * 1024 * 1024
+        )
+    
+    def install_app_scheme(self, profile, asset_cache=None):
+        """Sirve el frontend por neopilot:// desde el caché de assets en proceso"""
+        import threading
+        from app_scheme import install_app_scheme
+        
+        self.asset_cache = asset_cache or self.open_assets()
+        install_app_scheme(profile, self.asset_cache)
+        threading.Thread(target=self.asset_cache.warm, name="neopilot-cache-warm", daemon=True).start()
+        print(f"🔗 Frontend servido en proceso: {self.app_url()}")
+    
     def cleanup(self):
         """Limpia procesos al salir"""
         try:
-            if hasattr(self, 'httpd') and self.httpd:
+            if self.handoff_listener:
+                self.handoff_listener.close()
+                self.handoff_listener = None
+            
+            if getattr(self, 'server', None):
                 print("🔧 Cerrando servidor HTTP...")
                 try:
-                    self.httpd.shutdown()
-                    self.httpd.server_close()
-                    
-                    # Cerrar el socket explícitamente
-                    if hasattr(self.httpd, 'socket'):
-                        self.httpd.socket.close()
-                    
+                    self.server.stop(timeout=2)
                     print("✅ Servidor HTTP cerrado")
                 except Exception as e:
                     print(f"⚠️  Error cerrando servidor: {e}")
-            
-            if hasattr(self, 'server_thread') and self.server_thread:
-                try:
-                    self.server_thread.join(timeout=2)
-                except Exception as e:
-                    print(f"⚠️  Error esperando hilo servidor: {e}")
                     
         except Exception as e:
             print(f"⚠️  Error en cleanup: {e}")
         finally:
             # Asegurar que las referencias se limpien
+            self.server = None
             self.httpd = None
             self.server_thread = None
             self.server_process = None
             
-            # Pequeña pausa para asegurar liberación del puerto
-            time.sleep(0.5)
+            # Guardar la traza aunque la página no haya terminado de cargar
+            tracer.write()
     
     def run(self):
         """Ejecuta el launcher de kiosko PyQt5"""
@@ -207,21 +338,29 @@ class KioskLauncher:
             print("🚀 NeoPilot Kiosk Launcher (PyQt5)")
             print(f"📱 Sistema detectado: {'Raspberry Pi' if self.is_rpi else 'Ubuntu'}")
             
+            tracer.metadata.update(launcher="kiosk_launcher", rpi=self.is_rpi)
+            
             # Verificar frontend
-            if not self.frontend_path.exists():
+            if not frontend_available():
                 print("❌ Frontend no encontrado. Ejecuta: npm run build")
                 return 1
             
-            # Iniciar servidor HTTP
-            if not self.start_http_server():
-                print("❌ No se pudo iniciar el servidor HTTP")
-                return 1
+            # Etapas en paralelo con el import de Qt (que va en el hilo principal):
+            # lectura del build a la page cache y servidor HTTP o assets de neopilot://
+            pipeline = BootPipeline()
+            pipeline.start("asset_readahead", readahead_build, self.frontend_path.parent)
+            if self.serve_mode == "scheme":
+                pipeline.start("asset_open", self.open_assets)
+            else:
+                pipeline.start("server_bind", self.start_http_server)
             
             try:
                 # Ejecutar kiosko PyQt5
-                return self.start_pyqt5_kiosk()
+                return self.start_pyqt5_kiosk(pipeline)
                     
             finally:
+                # Un bind aún en curso no debe dejar el servidor abierto tras el cleanup
+                pipeline.wait(timeout=5)
                 self.cleanup()
                 
         except KeyboardInterrupt:
@@ -1,139 +1,131 @@
 #!/usr/bin/env python3
 """
-NeoPilot - Launcher simplificado para modo kiosko
-Version que intenta diferentes approaches para funcionar en Ubuntu y RPi
+NeoPilot - Launcher universal
+Elige entre PyQt5 y el navegador del sistema a partir del entorno
+cacheado por launcher_core; PyQt5 solo se importa si es el camino elegido
 """
 
 import sys
-import os
+import signal
 import subprocess
-import platform
 
-def detect_environment():
-    """Detectar si estamos en Ubuntu, Raspberry Pi, o otro"""
+from boot_trace import tracer
+from launcher_core import (
+    FRONTEND_BUILD, browser_command, choose_backend, frontend_available, frontend_index, get_environment,
+)
+
+def launch_with_system_browser(env):
+    """Lanzar usando el navegador del sistema en modo kiosko"""
+    if not frontend_available():
+        print(f"❌ Frontend no encontrado: {frontend_index()}")
+        return False
+
+    from backend_services import BackendServices
+    from static_server import StaticServer
+    from supervisor import RestartBudgetExceeded
+
+    # Servidor en proceso en un puerto libre: las rutas del SPA funcionan
+    # y no hay conflictos con otros launchers
+    server = StaticServer(FRONTEND_BUILD, 0, host="127.0.0.1")
+    server.start()
+    url = f"http://127.0.0.1:{server.httpd.server_address[1]}/"
+
+    cmd = browser_command(env, url)
+    if not cmd:
+        server.stop()
+        print("❌ No se pudo encontrar un navegador compatible")
+        return False
+
+    # Sin Qt el frontend habla con el backend por la API REST y el WebSocket
+    services = BackendServices()
+    services.start()
+
+    print(f"🌐 Lanzando con: {cmd[0]}")
+    # SIGTERM (systemd) cierra igual que Ctrl+C: servidor y servicios se paran
+    signal.signal(signal.SIGTERM, _raise_interrupt)
     try:
-        with open('/proc/cpuinfo', 'r') as f:
-            if 'Raspberry Pi' in f.read():
-                return 'raspberry'
-    except:
+        supervise_browser(cmd)
+        # Código 0: el usuario cerró el navegador o este pasó la URL a un
+        # Chromium ya abierto, que sigue cargando la página de este servidor
+        print("💡 El navegador terminó; el servidor sigue activo hasta Ctrl+C o SIGTERM")
+        signal.pause()
+    except KeyboardInterrupt:
         pass
-    
+    except RestartBudgetExceeded:
+        # El navegador no llega a arrancar: salir con error (tras el finally) para que systemd decida
+        sys.exit(1)
+    finally:
+        services.stop()
+        server.stop()
+    return True
+
+def supervise_browser(cmd):
+    """Relanza el navegador con backoff mientras termine con error (como SimpleKioskLauncher)"""
+    from supervisor import Supervisor, blocking_schedule
+
+    supervisor = Supervisor()
+    browser = []
+
+    def spawn():
+        browser[:] = [subprocess.Popen(cmd)]
+        supervisor.recovered("browser")
+
+    supervisor.register("browser", spawn, schedule=blocking_schedule)
+    spawn()
     try:
-        with open('/etc/os-release', 'r') as f:
-            if 'Ubuntu' in f.read():
-                return 'ubuntu'
-    except:
-        pass
-    
-    return 'unknown'
-
-def get_frontend_path():
-    """Obtener ruta al frontend"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    frontend_path = os.path.join(project_root, 'frontend', 'build', 'index.html')
-    print(f"🔍 Ruta del frontend: {frontend_path}")
-    return frontend_path
-
-def launch_with_system_browser():
-    """Lanzar usando el navegador del sistema en modo kiosko"""
-    frontend_path = get_frontend_path()
-    
-    if not os.path.exists(frontend_path):
-        print(f"❌ Frontend no encontrado: {frontend_path}")
-        return False
-    
-    file_url = f"file://{frontend_path}"
-    
-    # Intentar diferentes navegadores en modo kiosko
-    browsers = [
-        ['chromium-browser', '--kiosk', '--no-first-run', '--disable-restore-session-state'],
-        ['google-chrome', '--kiosk', '--no-first-run', '--disable-restore-session-state'],
-        ['firefox', '--kiosk'],
-        ['chromium', '--kiosk', '--no-first-run'],
-    ]
-    
-    for browser_cmd in browsers:
-        try:
-            print(f"🌐 Intentando lanzar con: {browser_cmd[0]}")
-            cmd = browser_cmd + [file_url]
-            subprocess.run(cmd, check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            continue
-    
-    print("❌ No se pudo encontrar un navegador compatible")
-    return False
+        while browser[0].wait() != 0:
+            supervisor.failed("browser", f"código {browser[0].returncode}")
+    except KeyboardInterrupt:
+        browser[0].terminate()
+        browser[0].wait()
+        raise
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
 
 def launch_with_pyqt():
-    """Lanzar usando PyQt5"""
+    """Lanzar usando PyQt5 (la ventana completa de main.py)"""
     try:
-        from PyQt5.QtWidgets import QApplication, QMainWindow
-        from PyQt5.QtWebEngineWidgets import QWebEngineView
-        from PyQt5.QtCore import QUrl, Qt
-        from PyQt5.QtGui import QKeySequence
-        
-        print("✅ PyQt5 disponible, lanzando modo kiosko completo...")
-        
-        class SimpleKiosk(QMainWindow):
-            def __init__(self):
-                super().__init__()
-                self.setWindowTitle("NeoPilot")
-                self.setWindowFlags(Qt.FramelessWindowHint)
-                
-                self.webview = QWebEngineView()
-                self.setCentralWidget(self.webview)
-                
-                # Cargar frontend
-                frontend_path = get_frontend_path()
-                if os.path.exists(frontend_path):
-                    file_url = QUrl.fromLocalFile(frontend_path)
-                    self.webview.load(file_url)
-                else:
-                    self.webview.setHtml("""
-                    <html><body style='background:#1e3c72;color:white;font-family:Arial;text-align:center;padding:50px'>
-                    <h1>NeoPilot</h1><p>Frontend no encontrado</p>
-                    <p>Ejecuta: cd frontend && npm run build</p>
-                    </body></html>
-                    """)
-                
-                self.showFullScreen()
-        
-        app = QApplication(sys.argv)
-        window = SimpleKiosk()
-        
-        print("💡 Presiona Alt+F4 para salir")
-        app.exec_()
-        return True
-        
+        # main importa PyQt5 al cargarse; solo se llega aquí si es el backend elegido
+        import main as kiosk_main
     except ImportError as e:
         print(f"❌ PyQt5 no disponible: {e}")
         return False
 
+    print("✅ PyQt5 disponible, lanzando modo kiosko completo...")
+    result = kiosk_main.run(launcher="launcher")
+    if result:
+        # Código de error (p. ej. componente sin más reinicios): para systemd
+        sys.exit(result)
+    return True
+
 def main():
     print("🚀 NeoPilot - Launcher Universal")
     print("=" * 40)
-    
-    env = detect_environment()
-    print(f"🔍 Entorno: {env}")
-    
-    # Intentar PyQt5 primero
-    if launch_with_pyqt():
-        return
-    
-    print("🌐 PyQt5 no disponible, intentando con navegador...")
-    
-    # Fallback a navegador del sistema
-    if launch_with_system_browser():
+
+    with tracer.phase("detect_environment"):
+        env = get_environment()
+    print(f"🔍 Entorno: {env['platform']}{' (caché)' if env['cached'] else ''}")
+    tracer.metadata.update(launcher="launcher", environment=env["platform"], environment_cached=env["cached"])
+
+    backend = choose_backend(env)
+
+    if backend == "pyqt" and launch_with_pyqt():
         return
-    
+
+    if env["browsers"]:
+        print("🌐 Usando navegador del sistema...")
+        if launch_with_system_browser(env):
+            return
+
     # Si nada funciona, mostrar ayuda
     print("\n❌ No se pudo lanzar NeoPilot")
     print("\n💡 Opciones disponibles:")
     print("  1. Instalar PyQt5: sudo apt-get install python3-pyqt5 python3-pyqt5.qtwebengine")
     print("  2. Usar modo web: ./run-web.sh")
     print("  3. Instalar Chromium: sudo apt-get install chromium-browser")
-    
+    print("  4. Si se instaló algo sin reiniciar: python3 backend/launcher_core.py --refresh")
+
     return 1
 
 if __name__ == "__main__":
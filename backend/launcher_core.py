@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Núcleo común de los launchers
+Rutas del proyecto, detección del entorno y de navegadores con resultado
+cacheado en disco por arranque (boot ID), y elección del backend sin
+lanzar subprocesos de prueba ni importar PyQt5 antes de tiempo
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+FRONTEND_BUILD = PROJECT_ROOT / "frontend" / "build"
+FRONTEND_INDEX = FRONTEND_BUILD / "index.html"
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "neopilot" / "environment.json"
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+# Archivos pequeños con el modelo de la placa (evita leer todo /proc/cpuinfo)
+MODEL_PATHS = ("/proc/device-tree/model", "/sys/firmware/devicetree/base/model")
+
+# Se cambia al modificar el formato de la sonda para descartar cachés viejos
+PROBE_VERSION = 1
+
+# Navegadores en orden de preferencia y sus flags de kiosko
+BROWSERS = (
+    ("chromium-browser", ["--kiosk", "--no-first-run", "--disable-infobars",
+                          "--disable-session-crashed-bubble", "--disable-restore-session-state"]),
+    ("chromium", ["--kiosk", "--no-first-run", "--disable-infobars",
+                  "--disable-session-crashed-bubble", "--disable-restore-session-state"]),
+    ("google-chrome", ["--kiosk", "--no-first-run", "--disable-infobars",
+                       "--disable-restore-session-state"]),
+    ("firefox", ["--kiosk"]),
+)
+# Flags extra de Chromium en Raspberry Pi (poca /dev/shm, sesión como root)
+RPI_CHROMIUM_FLAGS = ["--disable-dev-shm-usage", "--no-sandbox"]
+
+BACKENDS = ("pyqt", "browser")
+
+
+def frontend_index():
+    """Ruta a frontend/build/index.html"""
+    return FRONTEND_INDEX
+
+
+def frontend_available():
+    """True si hay build del frontend o su paquete (despliegue con solo build.neopack)"""
+    if FRONTEND_INDEX.exists():
+        return True
+    from asset_pack import pack_path_for
+    return pack_path_for(FRONTEND_BUILD).is_file()
+
+
+def read_boot_id():
+    try:
+        with open(BOOT_ID_PATH) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _read_small(paths):
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                return f.read(256).rstrip(b"\0\n").decode(errors="replace")
+        except OSError:
+            continue
+    return None
+
+
+def _os_release_id():
+    try:
+        with open("/etc/os-release") as f:
+            for line in f:
+                if line.startswith("ID="):
+                    return line[3:].strip().strip('"')
+    except OSError:
+        pass
+    return None
+
+
+def _has_module(name):
+    import importlib.util
+
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def probe_environment():
+    """Detecta plataforma, PyQt5 y navegadores (sin subprocesos)"""
+    # Solo hacen falta sin caché: fuera del camino rápido de arranque
+    import shutil
+
+    machine = os.uname().machine
+    model = _read_small(MODEL_PATHS)
+    os_id = _os_release_id()
+    if model and "Raspberry Pi" in model:
+        name = "raspberry"
+    elif os_id == "ubuntu":
+        name = "ubuntu"
+    else:
+        name = "unknown"
+
+    browsers = {}
+    for browser, _ in BROWSERS:
+        path = shutil.which(browser)
+        if path:
+            browsers[browser] = path
+
+    return {
+        "platform": name,
+        "model": model,
+        "os_id": os_id,
+        "machine": machine,
+        "is_rpi": name == "raspberry" or machine.startswith(("arm", "aarch")),
+        # find_spec no ejecuta el módulo: QtWebEngine no se carga aquí
+        "pyqt": _has_module("PyQt5") and _has_module("PyQt5.QtWebEngineWidgets"),
+        "browsers": browsers,
+    }
+
+
+def _cache_key():
+    # El resultado depende del arranque, del intérprete y del PATH
+    return {
+        "version": PROBE_VERSION,
+        "boot_id": read_boot_id(),
+        "python": sys.executable,
+        "path": os.environ.get("PATH", ""),
+    }
+
+
+def _cache_path():
+    return Path(os.environ.get("NEOPILOT_ENV_CACHE", DEFAULT_CACHE_PATH))
+
+
+def _write_cache(path, data):
+    import tempfile
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".environment-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar la detección del entorno: {e}")
+
+
+def get_environment(refresh=False):
+    """Entorno detectado, leído del caché si es del mismo arranque
+
+    El caché se invalida al reiniciar (boot ID), al cambiar de intérprete
+    o de PATH, o si un navegador cacheado ya no existe.
+    """
+    path = _cache_path()
+    key = _cache_key()
+
+    if not refresh and key["boot_id"]:
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+            env = cached["environment"]
+            if cached.get("key") == key and all(os.access(p, os.X_OK) for p in env["browsers"].values()):
+                env["cached"] = True
+                return env
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    env = probe_environment()
+    if key["boot_id"]:
+        _write_cache(path, {"key": key, "environment": env})
+    env["cached"] = False
+    return env
+
+
+def choose_backend(env, preferred=None):
+    """Backend a usar ("pyqt", "browser" o None); NEOPILOT_BACKEND lo fuerza"""
+    preferred = preferred or os.environ.get("NEOPILOT_BACKEND")
+    if preferred in BACKENDS:
+        order = [preferred] + [b for b in BACKENDS if b != preferred]
+    else:
+        order = list(BACKENDS)
+
+    for backend in order:
+        if backend == "pyqt" and env["pyqt"]:
+            return "pyqt"
+        if backend == "browser" and env["browsers"]:
+            return "browser"
+    return None
+
+
+def browser_command(env, url):
+    """Comando del primer navegador disponible en modo kiosko, o None"""
+    for browser, flags in BROWSERS:
+        path = env["browsers"].get(browser)
+        if not path:
+            continue
+        flags = list(flags)
+        if env["is_rpi"] and browser != "firefox":
+            flags += RPI_CHROMIUM_FLAGS
+        return [path] + flags + [url]
+    return None
+
+
+if __name__ == "__main__":
+    environment = get_environment(refresh="--refresh" in sys.argv)
+    print(json.dumps(environment, indent=2))
+    print(f"backend: {choose_backend(environment)}")
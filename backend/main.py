@@ -1,10 +1,36 @@
+from boot_trace import tracer
+from boot_pipeline import BootPipeline, readahead_build
+from launcher_core import FRONTEND_BUILD
+
+# El kernel lee el build de la SD mientras se importa QtWebEngine
+boot = BootPipeline()
+boot.start("asset_readahead", readahead_build, FRONTEND_BUILD)
+
+tracer.begin("qt_import")
 from PyQt5.QtWidgets import QApplication, QMainWindow, QShortcut
-from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineSettings
-from PyQt5.QtCore import QUrl, Qt, QTimer
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineSettings, QWebEnginePage
+from PyQt5.QtCore import QEvent, QMetaObject, QSocketNotifier, QUrl, Qt, QTimer
 from PyQt5.QtGui import QKeySequence
+tracer.end("qt_import")
 import sys
 import os
 import signal
+import socket
+
+from app_scheme import APP_URL, install_app_scheme, register_app_scheme
+from asset_pack import open_assets
+from idle_mode import install_idle_mode
+from launcher_core import frontend_available, frontend_index
+from memory_monitor import install_memory_guard
+from web_bridge import install_web_bridge
+from static_server import StaticServer
+from supervisor import Supervisor, supervise_renderer, supervise_server
+from web_profile import create_kiosk_profile
+
+# "http": servidor local (Chromium guarda la caché de código V8 del bundle
+# solo para http/https); "scheme": neopilot:// en proceso, sin puerto
+SERVE_MODE = os.environ.get("NEOPILOT_SERVE_MODE", "http")
+SERVER_PORT = int(os.environ.get("NEOPILOT_PORT", "8080"))
 
 class KioskWindow(QMainWindow):
     def __init__(self):
@@ -15,12 +41,25 @@ class KioskWindow(QMainWindow):
         self.setWindowTitle("NeoPilot")
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         
-        # Crear vista web
+        # Crear vista web sobre el perfil persistente (caché HTTP y de código V8)
+        frontend_path = self.get_frontend_path()
+        self.profile = create_kiosk_profile(os.path.dirname(frontend_path), parent=QApplication.instance())
         self.webview = QWebEngineView()
+        self.webview.setPage(QWebEnginePage(self.profile, self.webview))
         self.setCentralWidget(self.webview)
+        tracer.attach_webview(self.webview)
         
-        # Configurar WebEngine para modo kiosko
-        settings = self.webview.settings()
+        # Sondas y lanzador de apps en proceso (QWebChannel) antes de cargar la página
+        self.bridge = install_web_bridge(self.webview, self.profile)
+        # Las apps externas (Waze, Spotify...) se abren encima del kiosko
+        self.external_app = False
+        self.idle_mode = None
+        if self.bridge is not None:
+            self.bridge.apps_running.connect(self.on_apps_running)
+        
+        # Configurar WebEngine para modo kiosko (en el perfil: también vale
+        # para las páginas que se crean al reiniciar el renderer)
+        settings = self.profile.settings()
         settings.setAttribute(QWebEngineSettings.FullScreenSupportEnabled, True)
         settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
         settings.setAttribute(QWebEngineSettings.LocalContentCanAccessRemoteUrls, True)
@@ -30,17 +69,31 @@ class KioskWindow(QMainWindow):
         # Deshabilitar menú contextual
         self.webview.setContextMenuPolicy(Qt.NoContextMenu)
         
-        # Obtener ruta del frontend
-        frontend_path = self.get_frontend_path()
-        
-        if os.path.exists(frontend_path):
-            file_url = QUrl.fromLocalFile(frontend_path)
+        # Si el servidor o el renderer fallan se reinician, no toda la aplicación;
+        # si fallan sin parar se sale con error y systemd relanza el proceso
+        self.exit_code = 0
+        self.supervisor = Supervisor(on_exhausted=self.on_component_exhausted)
+        self.server = None
+        self.asset_cache = None
+        if frontend_available():
+            build_dir = os.path.dirname(frontend_path)
+            if SERVE_MODE != "scheme" and self.start_server(build_dir):
+                url = f"http://localhost:{SERVER_PORT}/"
+            else:
+                # neopilot:// sirve el build (o build.neopack) desde memoria y respeta las rutas del SPA
+                self.asset_cache = open_assets(build_dir)
+                install_app_scheme(self.profile, self.asset_cache)
+                url = APP_URL
+            boot.join_all()
             print(f"Cargando frontend desde: {frontend_path}")
-            self.webview.load(file_url)
+            tracer.mark("webview_load", url=url)
+            self.webview.load(QUrl(url))
         else:
             print(f"Frontend no encontrado en: {frontend_path}")
             self.load_fallback_html()
         
+        supervise_renderer(self.supervisor, self.webview)
+        
         # Configurar atajos de teclado para salir (solo para desarrollo)
         exit_shortcut = QShortcut(QKeySequence("Ctrl+Q"), self)
         exit_shortcut.activated.connect(self.close)
@@ -51,19 +104,41 @@ class KioskWindow(QMainWindow):
         # Mostrar en pantalla completa
         self.showFullScreen()
         
-        # Timer para mantener foco
-        self.focus_timer = QTimer()
-        self.focus_timer.timeout.connect(self.maintain_focus)
-        self.focus_timer.start(1000)  # Revisar cada segundo
+        # Recuperar el foco solo cuando se pierde, sin sondeo periódico
+        QApplication.instance().focusChanged.connect(self.on_focus_changed)
         
+        # Reposo tras NEOPILOT_IDLE_MINUTES sin toques
+        self.idle_mode = install_idle_mode(self, self.webview)
+        
+        # Libera cachés (y si hace falta reinicia el renderer) antes del OOM
+        self.memory_guard = install_memory_guard(self.webview, self.asset_cache)
+        
+    def start_server(self, build_dir):
+        """Servidor HTTP local del build; False si el puerto no está disponible"""
+        cache_mb = int(os.environ.get("NEOPILOT_ASSET_CACHE_MB", "32"))
+        server = StaticServer(build_dir, SERVER_PORT, host="127.0.0.1", cache_max_bytes=cache_mb * 1024 * 1024)
+        try:
+            server.start()
+        except OSError as e:
+            print(f"⚠️  Puerto {SERVER_PORT} no disponible ({e}), se usa neopilot://")
+            return False
+        self.server = server
+        self.asset_cache = server.asset_cache
+        supervise_server(self.supervisor, server)
+        return True
+    
+    def on_component_exhausted(self, name):
+        """Un componente agotó sus reinicios (puede llamarse desde otro hilo)"""
+        self.exit_code = 1
+        QMetaObject.invokeMethod(QApplication.instance(), "quit", Qt.QueuedConnection)
+    
+    def stop_server(self):
+        if self.server is not None:
+            self.server.stop(timeout=2)
+            self.server = None
+    
     def get_frontend_path(self):
-        # Obtener directorio del script actual
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Ir un nivel arriba para llegar a la raíz del proyecto
-        project_root = os.path.dirname(script_dir)
-        # Construir ruta al frontend
-        frontend_path = os.path.join(project_root, 'frontend', 'build', 'index.html')
-        return frontend_path
+        return str(frontend_index())
         
     def load_fallback_html(self):
         """Cargar HTML de respaldo si no se encuentra el frontend"""
@@ -105,12 +180,55 @@ class KioskWindow(QMainWindow):
         """
         self.webview.setHtml(fallback_html)
         
+    def on_apps_running(self, count):
+        """Con una app externa abierta el kiosko deja de estar encima y de recuperar el foco"""
+        external = count > 0
+        if external == self.external_app:
+            return
+        self.external_app = external
+        if self.idle_mode is not None:
+            # Los toques en la app no llegan al kiosko: no contar reposo mientras tanto
+            self.idle_mode.set_paused(external)
+        # En la QWindow: QWidget.setWindowFlag la recrea y la oculta, y la
+        # activación debe cambiar solo cuando aparece la ventana de la app
+        self.windowHandle().setFlag(Qt.WindowStaysOnTopHint, not external)
+        if external:
+            self.lower()
+        else:
+            self.raise_()
+            self.activateWindow()
+        
     def maintain_focus(self):
         """Mantener la aplicación siempre en primer plano (modo kiosko)"""
-        if not self.isActiveWindow():
+        if not self.external_app and not self.isActiveWindow():
             self.raise_()
             self.activateWindow()
             
+    def apps_running(self):
+        """Hay apps lanzadas por el kiosko abiertas (el foco es suyo)"""
+        launcher = self.bridge.launcher if self.bridge is not None else None
+        return bool(launcher is not None and launcher.running)
+        
+    def schedule_focus(self):
+        if self.apps_running():
+            return
+        # Fuera del manejador del evento de activación que lo provocó
+        QTimer.singleShot(0, self.maintain_focus)
+        
+    def on_focus_changed(self, old, now):
+        """El foco salió de la aplicación (now es None)"""
+        if now is None:
+            self.schedule_focus()
+            
+    def changeEvent(self, event):
+        """La ventana dejó de estar activa"""
+        if event.type() == QEvent.ActivationChange and not self.isActiveWindow():
+            if self.apps_running() and QApplication.activeWindow() is None:
+                # La activación pasó a otro proceso: la ventana de la app ya se ve
+                self.bridge.launcher.app_ready()
+            self.schedule_focus()
+        super().changeEvent(event)
+            
     def toggle_fullscreen(self):
         """Alternar pantalla completa (para desarrollo)"""
         if self.isFullScreen():
@@ -128,30 +246,65 @@ class KioskWindow(QMainWindow):
         else:
             super().keyPressEvent(event)
 
+def install_signal_wakeup(app):
+    """Despierta el event loop de Qt cuando llega una señal
+    
+    Los manejadores de Python solo corren cuando el intérprete recupera el
+    control; sin timers periódicos eso ocurre a través de este socket.
+    """
+    read_sock, write_sock = socket.socketpair()
+    read_sock.setblocking(False)
+    write_sock.setblocking(False)
+    signal.set_wakeup_fd(write_sock.fileno())
+    
+    notifier = QSocketNotifier(read_sock.fileno(), QSocketNotifier.Read, app)
+    notifier.activated.connect(lambda: read_sock.recv(64))
+    app._signal_sockets = (read_sock, write_sock)
+    return notifier
+
 def signal_handler(signum, frame):
     """Manejar señales del sistema para cierre limpio"""
     print("Cerrando NeoPilot...")
+    tracer.write()
     app.quit()
 
-if __name__ == '__main__':
+def run(launcher="main"):
+    """Crea la aplicación y la ventana del kiosko y ejecuta el event loop"""
+    global app
+    
     # Configurar manejo de señales
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Crear aplicación Qt
-    app = QApplication(sys.argv)
-    app.setApplicationName("NeoPilot")
-    app.setQuitOnLastWindowClosed(True)
+    tracer.metadata.update(launcher=launcher)
+    
+    # El esquema neopilot:// debe registrarse antes de crear QApplication
+    # (también hace falta en modo http, si el puerto está ocupado)
+    register_app_scheme()
     
-    # Configuraciones para kiosko
-    app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
-    app.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+    # Crear aplicación Qt
+    with tracer.phase("qapplication_init"):
+        app = QApplication(sys.argv)
+        app.setApplicationName("NeoPilot")
+        app.setQuitOnLastWindowClosed(True)
+        
+        # Configuraciones para kiosko
+        app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
+        app.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
+        install_signal_wakeup(app)
     
     print("Iniciando NeoPilot en modo kiosko...")
     print("Presiona Ctrl+Q para salir")
     
     # Crear y mostrar ventana principal
-    window = KioskWindow()
+    with tracer.phase("window_create"):
+        window = KioskWindow()
     
     # Ejecutar aplicación
-    sys.exit(app.exec_())
\ No newline at end of file
+    result = app.exec_()
+    window.stop_server()
+    tracer.write()
+    return window.exit_code or result
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Monitor de presión de memoria
+Lee /proc/pressure/memory (PSI) y /proc/meminfo y aplica respuestas
+graduadas al kiosko antes de que el OOM killer mate el renderer:
+con presión moderada libera cachés, con presión severa recarga la
+página en un renderer nuevo
+"""
+
+import gc
+import os
+import select
+import threading
+import time
+
+PSI_MEMORY = "/proc/pressure/memory"
+PROC_MEMINFO = "/proc/meminfo"
+
+NORMAL, MODERATE, SEVERE = 0, 1, 2
+LEVEL_NAMES = {NORMAL: "normal", MODERATE: "moderate", SEVERE: "severe"}
+
+# Umbrales: % del tiempo con tareas esperando memoria (avg10) y % disponible
+MODERATE_SOME_AVG10 = 10.0
+SEVERE_FULL_AVG10 = 10.0
+MODERATE_AVAILABLE_PERCENT = 15.0
+SEVERE_AVAILABLE_PERCENT = 5.0
+
+# Trigger PSI: 150 ms de bloqueo en una ventana de 2 s despierta al monitor
+PSI_TRIGGER = b"some 150000 2000000"
+
+DEFAULT_INTERVAL = 5.0
+# Tiempo mínimo entre dos respuestas del mismo nivel
+MODERATE_COOLDOWN = 30.0
+SEVERE_COOLDOWN = 120.0
+
+
+def parse_psi(data):
+    """{"some": {"avg10": ...}, "full": {...}} a partir del contenido de PSI"""
+    result = {}
+    for line in data.decode().splitlines():
+        kind, _, fields = line.partition(" ")
+        values = {}
+        for field in fields.split():
+            key, _, value = field.partition("=")
+            values[key] = float(value)
+        result[kind] = values
+    return result
+
+
+def classify(psi, available_percent):
+    """Nivel de presión a partir de PSI (puede ser None) y la memoria disponible"""
+    some = psi.get("some", {}).get("avg10", 0.0) if psi else 0.0
+    full = psi.get("full", {}).get("avg10", 0.0) if psi else 0.0
+    if full >= SEVERE_FULL_AVG10 or available_percent < SEVERE_AVAILABLE_PERCENT:
+        return SEVERE
+    if some >= MODERATE_SOME_AVG10 or available_percent < MODERATE_AVAILABLE_PERCENT:
+        return MODERATE
+    return NORMAL
+
+
+class MemoryMonitor:
+    """Hilo que vigila la presión de memoria y avisa al subir de nivel
+
+    Con un trigger PSI el hilo duerme en poll() hasta que el kernel detecta
+    bloqueos por memoria; sin él (kernel sin PSI o sin permiso para
+    registrar triggers) revisa cada `interval` segundos.
+    on_pressure(level, info) se llama desde este hilo.
+    """
+
+    def __init__(self, on_pressure, interval=DEFAULT_INTERVAL):
+        self.on_pressure = on_pressure
+        self.interval = interval
+        self.level = NORMAL
+        self.info = {}
+        self._last_response = {MODERATE: 0.0, SEVERE: 0.0}
+        self._psi_fd = None
+        self._trigger_fd = None
+        self._meminfo_fd = os.open(PROC_MEMINFO, os.O_RDONLY)
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = None
+
+        try:
+            self._psi_fd = os.open(PSI_MEMORY, os.O_RDONLY)
+        except OSError:
+            pass
+        try:
+            self._trigger_fd = os.open(PSI_MEMORY, os.O_RDWR | os.O_NONBLOCK)
+            os.write(self._trigger_fd, PSI_TRIGGER + b"\0")
+        except OSError:
+            if self._trigger_fd is not None:
+                os.close(self._trigger_fd)
+            self._trigger_fd = None
+
+    def read(self):
+        """Lee PSI y meminfo y devuelve (nivel, info)"""
+        psi = parse_psi(os.pread(self._psi_fd, 256, 0)) if self._psi_fd is not None else None
+
+        info = {}
+        for line in os.pread(self._meminfo_fd, 256, 0).split(b"\n")[:3]:
+            key, _, rest = line.partition(b":")
+            if rest:
+                info[key] = int(rest.split()[0])
+        total = info.get(b"MemTotal", 0)
+        available = info.get(b"MemAvailable", info.get(b"MemFree", 0))
+        available_percent = 100.0 * available / total if total else 100.0
+
+        level = classify(psi, available_percent)
+        return level, {
+            "level": LEVEL_NAMES[level],
+            "available_mb": round(available / 1024.0, 1),
+            "available_percent": round(available_percent, 1),
+            "psi_some_avg10": psi["some"]["avg10"] if psi else None,
+            "psi_full_avg10": psi["full"]["avg10"] if psi and "full" in psi else None,
+        }
+
+    def check(self):
+        """Una lectura; llama a on_pressure si hay que responder"""
+        level, info = self.read()
+        self.level, self.info = level, info
+        if level == NORMAL:
+            return level
+
+        now = time.monotonic()
+        cooldown = SEVERE_COOLDOWN if level == SEVERE else MODERATE_COOLDOWN
+        if now - self._last_response[level] < cooldown:
+            return level
+        self._last_response[level] = now
+        # Una respuesta severa incluye la moderada
+        if level == SEVERE:
+            self._last_response[MODERATE] = now
+
+        print(f"⚠️  Presión de memoria {info['level']}: {info['available_mb']} MB disponibles")
+        try:
+            self.on_pressure(level, info)
+        except Exception as e:
+            print(f"⚠️  Error respondiendo a la presión de memoria: {e}")
+        return level
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="neopilot-memory", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        os.write(self._stop_w, b"\0")
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def close(self):
+        self.stop()
+        for fd in (self._psi_fd, self._trigger_fd, self._meminfo_fd, self._stop_r, self._stop_w):
+            if fd is not None:
+                os.close(fd)
+
+    def _run(self):
+        poller = select.poll()
+        poller.register(self._stop_r, select.POLLIN)
+        if self._trigger_fd is not None:
+            poller.register(self._trigger_fd, select.POLLPRI)
+
+        while True:
+            # Bajo presión se revisa con frecuencia para detectar la salida;
+            # en reposo solo despierta el trigger (o el intervalo sin trigger)
+            if self.level != NORMAL or self._trigger_fd is None:
+                timeout = self.interval * 1000
+            else:
+                timeout = None
+            events = poller.poll(timeout)
+            if any(fd == self._stop_r for fd, _ in events):
+                return
+            try:
+                self.check()
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Error leyendo presión de memoria: {e}")
+
+
+_responder_class = None
+
+
+def install_memory_guard(view, asset_cache=None, interval=None):
+    """Vigila la memoria y aplica las respuestas sobre un QWebEngineView
+
+    Devuelve el responder (con .monitor), o None si no hay /proc/meminfo.
+    """
+    if interval is None:
+        interval = float(os.environ.get("NEOPILOT_MEMORY_INTERVAL", DEFAULT_INTERVAL))
+    try:
+        responder = create_pressure_responder(view, asset_cache)
+        responder.monitor = MemoryMonitor(responder.pressure.emit, interval=interval)
+    except OSError as e:
+        print(f"⚠️  Monitor de memoria desactivado: {e}")
+        return None
+    responder.monitor.start()
+    return responder
+
+
+def create_pressure_responder(view, asset_cache=None):
+    """Crea el PressureResponder (PyQt5 se importa aquí, no al cargar el módulo)"""
+    global _responder_class
+
+    if _responder_class is None:
+        from PyQt5.QtCore import QObject, pyqtSignal
+        from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+        class PressureResponder(QObject):
+            # Emitida desde el hilo del monitor; el slot corre en el hilo de Qt
+            pressure = pyqtSignal(int, dict)
+
+            def __init__(self, view, asset_cache=None):
+                super().__init__(view)
+                # Ventanas del kiosko (una por pantalla); todas sobre el mismo perfil
+                self.views = [view]
+                self.asset_cache = asset_cache
+                self.monitor = None
+                self.renderer_restarts = 0
+                self.pressure.connect(self.respond)
+                view.destroyed.connect(self.shutdown)
+
+            def add_view(self, view):
+                """Aplica las mismas respuestas a otra vista, sin un segundo monitor"""
+                self.views.append(view)
+                view.destroyed.connect(lambda: self.views.remove(view) if view in self.views else None)
+
+            def respond(self, level, info):
+                self.release_caches()
+                if level == SEVERE:
+                    for view in list(self.views):
+                        self.restart_renderer(view)
+
+            def release_caches(self):
+                # Caché HTTP del perfil (en memoria y en disco)
+                for profile in {view.page().profile() for view in self.views}:
+                    profile.clearHttpCache()
+                for view in self.views:
+                    # El frontend suelta sus cachés; gc() solo existe con --expose-gc
+                    view.page().runJavaScript(
+                        "window.dispatchEvent(new Event('neopilot:memorypressure'));"
+                        "if (window.gc) { window.gc(); }"
+                    )
+                if self.asset_cache is not None:
+                    # Mantener solo lo más usado (index.html y el bundle principal)
+                    self.asset_cache.shrink(self.asset_cache.stats()["bytes"] // 4)
+                gc.collect()
+
+            def restart_renderer(self, view):
+                """Página nueva en el mismo perfil: el renderer anterior termina"""
+                old_page = view.page()
+                url = old_page.url()
+                page = QWebEnginePage(old_page.profile(), view)
+                # El puente QWebChannel (si lo hay) pasa a la página nueva
+                if old_page.webChannel() is not None:
+                    page.setWebChannel(old_page.webChannel())
+                view.setPage(page)
+                old_page.deleteLater()
+                view.load(url)
+                self.renderer_restarts += 1
+                print(f"♻️  Renderer reiniciado por presión de memoria ({self.renderer_restarts})")
+
+            def shutdown(self):
+                if self.monitor is not None:
+                    self.monitor.close()
+                    self.monitor = None
+
+        _responder_class = PressureResponder
+
+    return _responder_class(view, asset_cache)
+
+
+if __name__ == "__main__":
+    monitor = MemoryMonitor(lambda level, info: None)
+    print(monitor.read())
+    monitor.close()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Sondas del backend
+Consultas por nombre (sistema, historial, apps) con caché TTL y
+single-flight, compartidas por la API REST y el puente QWebChannel
+"""
+
+import json
+import threading
+import time
+
+
+class TTLCache:
+    """Caché de respuestas con expiración por entrada"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Cambia en cada invalidación: descarta resultados calculados antes
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, keys=None):
+        """Invalida las claves indicadas (o todo el caché)"""
+        with self._lock:
+            self.generation += 1
+            if keys is None:
+                self._entries.clear()
+            else:
+                for key in keys:
+                    self._entries.pop(key, None)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Ejecuta una sola vez las llamadas concurrentes con la misma clave"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class ProbeRegistry:
+    """Sondas consultables por nombre, con TTL y single-flight"""
+
+    def __init__(self):
+        self.probes = {}
+        self.cache = TTLCache()
+        self.flight = SingleFlight()
+
+    def register(self, name, fn, ttl=0):
+        """fn() -> dict; ttl=0 desactiva el caché de esa sonda"""
+        self.probes[name] = (fn, ttl)
+
+    def query(self, name):
+        if name not in self.probes:
+            raise KeyError(name)
+        fn, ttl = self.probes[name]
+
+        cached = self.cache.get(name)
+        if cached is not None:
+            return cached
+
+        def run():
+            generation = self.cache.generation
+            value = fn()
+            if ttl:
+                self.cache.set(name, value, ttl, generation=generation)
+            return value
+
+        return self.flight.do(name, run)
+
+
+def probe_system():
+    from hardware import get_sampler
+    return get_sampler().latest() or {}
+
+
+def probe_system_history():
+    from hardware import get_sampler
+    return {"samples": get_sampler().history(60)}
+
+
+def probe_apps():
+    from app_launcher import running_apps
+    from apps_config import get_registry
+    return {"running": running_apps(get_registry())}
+
+
+def probe_apps_config():
+    """Registro de apps para el frontend: {"etag": ..., "config": {"apps": [...]}}"""
+    from apps_config import get_registry
+
+    payload, etag = get_registry().serialized()
+    return {"etag": etag, "config": json.loads(payload)}
+
+
+def telemetry_history(start=None, end=None, tier=None, points=500):
+    """Rango del historial de telemetría; sin caché, cada consulta trae su rango"""
+    from hardware import get_sampler
+    from telemetry_history import get_history
+
+    # El sampler (y con él el registro de muestras) arranca con la primera consulta
+    get_sampler()
+    return get_history().query(start, end, tier=tier, max_points=points)
+
+
+def create_registry():
+    registry = ProbeRegistry()
+    registry.register("system", probe_system, ttl=1.0)
+    registry.register("system_history", probe_system_history, ttl=5.0)
+    registry.register("apps", probe_apps, ttl=2.0)
+    # Sin TTL: el registro ya solo relee config/apps.json cuando cambia
+    registry.register("apps_config", probe_apps_config)
+    return registry
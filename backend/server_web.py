@@ -4,15 +4,18 @@ NeoPilot - Servidor HTTP simple para desarrollo
 Alternativa que funciona sin PyQt5 para pruebas básicas
 """
 
-import http.server
-import socketserver
 import webbrowser
 import os
 import sys
 import threading
 import time
 
-class NeoPilotHTTPHandler(http.server.SimpleHTTPRequestHandler):
+from asset_cache import AssetCache
+from access_log import METRICS_PATH, access_log_from_env
+from asset_pack import load_pack
+from static_server import StaticHTTPServer, StaticRequestHandler
+
+class NeoPilotHTTPHandler(StaticRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=self.get_frontend_dir(), **kwargs)
     
@@ -24,16 +27,11 @@ class NeoPilotHTTPHandler(http.server.SimpleHTTPRequestHandler):
         return frontend_dir
     
     def end_headers(self):
-        # Agregar headers para CORS y cache
+        # Agregar headers para CORS (el Cache-Control lo decide el caché de assets)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
         super().end_headers()
-    
-    def log_message(self, format, *args):
-        # Log personalizado
-        print(f"🌐 {self.address_string()} - {format % args}")
 
 def open_browser(url, delay=2):
     """Abrir el navegador después de un delay"""
@@ -55,25 +53,35 @@ def main():
     project_root = os.path.dirname(script_dir)
     frontend_dir = os.path.join(project_root, 'frontend', 'build')
     
-    if not os.path.exists(frontend_dir):
-        print(f"❌ Frontend no encontrado en: {frontend_dir}")
-        print("💡 Asegúrate de que existe frontend/build/index.html")
-        sys.exit(1)
+    # frontend/build.neopack (si existe y está al día) evita leer el build archivo a archivo
+    asset_cache = load_pack(frontend_dir)
     
-    if not os.path.exists(os.path.join(frontend_dir, 'index.html')):
-        print(f"❌ index.html no encontrado en: {frontend_dir}")
-        sys.exit(1)
+    if asset_cache is None:
+        if not os.path.exists(frontend_dir):
+            print(f"❌ Frontend no encontrado en: {frontend_dir}")
+            print("💡 Asegúrate de que existe frontend/build/index.html")
+            sys.exit(1)
+        
+        if not os.path.exists(os.path.join(frontend_dir, 'index.html')):
+            print(f"❌ index.html no encontrado en: {frontend_dir}")
+            sys.exit(1)
+        
+        asset_cache = AssetCache(frontend_dir)
     
     print(f"📁 Sirviendo archivos desde: {frontend_dir}")
     print(f"🌐 Servidor iniciando en puerto {PORT}")
     
-    # Crear servidor
+    # Crear servidor concurrente HTTP/1.1
     try:
-        with socketserver.TCPServer(("", PORT), NeoPilotHTTPHandler) as httpd:
+        # Log de accesos en otro hilo: el servidor de desarrollo lo muestra por defecto
+        access_log = access_log_from_env(default="-", default_format="text")
+        with StaticHTTPServer(("", PORT), NeoPilotHTTPHandler, asset_cache=asset_cache,
+                              access_log=access_log) as httpd:
             url = f"http://localhost:{PORT}"
             
             print(f"✅ Servidor HTTP activo en: {url}")
             print("📱 NeoPilot disponible en tu navegador")
+            print(f"📊 Métricas (Prometheus): {url}{METRICS_PATH}")
             print("")
             print("💡 Controles:")
             print("   - Ctrl+C para detener el servidor")
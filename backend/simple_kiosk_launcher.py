@@ -8,18 +8,26 @@ import sys
 import os
 import subprocess
 import signal
-import time
-import platform
+import select
 import socket
 import webbrowser
 from pathlib import Path
 
+from backend_services import BackendServices
+from launcher_core import browser_command, frontend_available, frontend_index, get_environment
+from supervisor import RestartBudgetExceeded, Supervisor, blocking_schedule
+
 class SimpleKioskLauncher:
     def __init__(self):
-        self.is_rpi = platform.machine().startswith(('arm', 'aarch'))
-        self.frontend_path = Path(__file__).parent.parent / "frontend" / "build" / "index.html"
+        self.environment = get_environment()
+        self.is_rpi = self.environment["is_rpi"]
+        self.frontend_path = frontend_index()
         self.server_port = 8082
         self.server_process = None
+        self.browser_process = None
+        # API REST y WebSocket: sin Qt el frontend usa el transporte de red
+        self.services = BackendServices()
+        self.supervisor = Supervisor()
         
     def start_http_server(self):
         """Inicia el servidor HTTP usando Python"""
@@ -27,12 +35,16 @@ class SimpleKioskLauncher:
             frontend_dir = self.frontend_path.parent
             print(f"🔍 Sirviendo archivos desde: {frontend_dir}")
             
-            # Usar el servidor HTTP de Python
+            # Pipe de arranque: el servidor escribe un byte cuando acepta conexiones
+            ready_r, ready_w = os.pipe()
+            
+            # Usar el servidor estático de NeoPilot
             cmd = [
                 sys.executable, 
-                "-m", "http.server", 
+                str(Path(__file__).parent / "static_server.py"), 
                 str(self.server_port), 
-                "--directory", str(frontend_dir)
+                "--directory", str(frontend_dir),
+                "--ready-fd", str(ready_w)
             ]
             
             # Verificar si el puerto está libre
@@ -41,28 +53,34 @@ class SimpleKioskLauncher:
                     s.bind(('localhost', self.server_port))
             except OSError:
                 print(f"❌ Puerto {self.server_port} ya está en uso")
+                os.close(ready_r)
+                os.close(ready_w)
                 return False
             
-            self.server_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # Esperar un momento para que el servidor inicie
-            time.sleep(2)
+            try:
+                self.server_process = subprocess.Popen(
+                    cmd,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    pass_fds=(ready_w,)
+                )
+            finally:
+                os.close(ready_w)
             
-            # Verificar que el servidor responde
+            # Esperar la señal de listo (EOF sin datos = el servidor falló)
             try:
-                import urllib.request
-                test_url = f"http://localhost:{self.server_port}"
-                urllib.request.urlopen(test_url, timeout=2)
-                print(f"✅ Servidor HTTP iniciado en puerto {self.server_port}")
-                print(f"🌐 Servidor verificado: {test_url}")
-                return True
-            except Exception as e:
-                print(f"❌ Error verificando servidor: {e}")
+                readable, _, _ = select.select([ready_r], [], [], 10)
+                ready = bool(readable) and os.read(ready_r, 1) == b"1"
+            finally:
+                os.close(ready_r)
+            
+            if not ready:
+                print("❌ El servidor HTTP no llegó a estar listo")
                 return False
+            
+            print(f"✅ Servidor HTTP iniciado en puerto {self.server_port}")
+            print(f"🌐 Servidor listo: http://localhost:{self.server_port}")
+            return True
                 
         except Exception as e:
             print(f"❌ Error iniciando servidor HTTP: {e}")
@@ -73,56 +91,32 @@ class SimpleKioskLauncher:
         try:
             url = f"http://localhost:{self.server_port}"
             
-            if self.is_rpi:
-                # En Raspberry Pi, usar Chromium
-                cmd = [
-                    "chromium-browser",
-                    "--kiosk",
-                    "--disable-infobars",
-                    "--disable-session-crashed-bubble",
-                    "--disable-restore-session-state",
-                    "--no-first-run",
-                    "--disable-dev-shm-usage",
-                    "--no-sandbox",
-                    url
-                ]
-            else:
-                # En Ubuntu, intentar varios navegadores
-                browsers = [
-                    ["google-chrome", "--kiosk", "--disable-infobars", url],
-                    ["chromium-browser", "--kiosk", "--disable-infobars", url],
-                    ["firefox", "--kiosk", url]
-                ]
-                
-                cmd = None
-                for browser_cmd in browsers:
-                    try:
-                        # Verificar si el navegador existe
-                        subprocess.run(["which", browser_cmd[0]], check=True, capture_output=True)
-                        cmd = browser_cmd
-                        break
-                    except subprocess.CalledProcessError:
-                        continue
-                
-                if not cmd:
-                    print("❌ No se encontró navegador compatible")
-                    print("💡 Abriendo en navegador por defecto...")
-                    webbrowser.open(url)
-                    return 0
+            # Navegadores detectados por launcher_core (cacheado, sin `which`)
+            cmd = browser_command(self.environment, url)
+            if not cmd:
+                print("❌ No se encontró navegador compatible")
+                print("💡 Abriendo en navegador por defecto...")
+                webbrowser.open(url)
+                return 0
             
             print(f"✅ Iniciando navegador en modo kiosko: {cmd[0]}")
             print("💡 Presiona Alt+F4 o Ctrl+C para salir")
             
-            # Ejecutar navegador
-            browser_process = subprocess.Popen(cmd)
+            # Si el navegador se cae se relanza con backoff; el servidor HTTP sigue
+            self.supervisor.register("browser", lambda: self.spawn_browser(cmd), schedule=blocking_schedule)
+            self.spawn_browser(cmd)
             
-            # Esperar a que termine
+            # Esperar a que termine (código 0: el usuario cerró el navegador)
             try:
-                browser_process.wait()
+                while self.browser_process.wait() != 0:
+                    self.supervisor.failed("browser", f"código {self.browser_process.returncode}")
             except KeyboardInterrupt:
                 print("\n⚡ Cerrando navegador...")
-                browser_process.terminate()
-                browser_process.wait()
+                self.browser_process.terminate()
+                self.browser_process.wait()
+            except RestartBudgetExceeded:
+                # El navegador no llega a arrancar: que systemd decida
+                return 1
             
             return 0
             
@@ -130,8 +124,14 @@ class SimpleKioskLauncher:
             print(f"❌ Error con navegador: {e}")
             return 1
     
+    def spawn_browser(self, cmd):
+        """Lanza el navegador y lo da por recuperado si venía de un fallo"""
+        self.browser_process = subprocess.Popen(cmd)
+        self.supervisor.recovered("browser")
+    
     def cleanup(self):
         """Limpia procesos al salir"""
+        self.services.stop()
         try:
             if self.server_process:
                 print("🔧 Cerrando servidor HTTP...")
@@ -154,7 +154,7 @@ class SimpleKioskLauncher:
             print(f"📱 Sistema detectado: {'Raspberry Pi' if self.is_rpi else 'Ubuntu'}")
             
             # Verificar frontend
-            if not self.frontend_path.exists():
+            if not frontend_available():
                 print("❌ Frontend no encontrado. Ejecuta: npm run build")
                 return 1
             
@@ -162,6 +162,7 @@ class SimpleKioskLauncher:
             if not self.start_http_server():
                 print("❌ No se pudo iniciar el servidor HTTP")
                 return 1
+            self.services.start()
             
             try:
                 # Ejecutar navegador en modo kiosko
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Relevo del socket HTTP entre instancias
+La instancia en marcha entrega su socket de escucha a la nueva por un
+socket Unix (SCM_RIGHTS), deja de aceptar y drena sus peticiones; la
+nueva sigue sirviendo en el mismo puerto sin ningún hueco
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+
+HANDOFF_REQUEST = b"HANDOFF"
+HANDOFF_OK = b"OK"
+READY = b"READY"
+
+# Tiempo máximo para completar el intercambio del descriptor
+EXCHANGE_TIMEOUT = 2.0
+DEFAULT_DRAIN_TIMEOUT = 5.0
+# Si la instancia nueva muere antes de estar lista se recupera el puerto
+RECLAIM_TIMEOUT = 3.0
+# Lo que puede tardar la instancia nueva en cargar su ventana antes de darla por colgada
+READY_TIMEOUT = float(os.environ.get("NEOPILOT_HANDOFF_READY_TIMEOUT", "60"))
+
+
+def control_path(port):
+    """Socket Unix de control para el servidor en `port`"""
+    base = os.environ.get("NEOPILOT_RUNTIME_DIR") or os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        base = f"/tmp/neopilot-{os.getuid()}"
+    return Path(base) / f"neopilot-http-{port}.sock"
+
+
+def _peer_uid(conn):
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+class HandoffLease:
+    """Lado de la instancia nueva: avisa cuando la anterior puede salir"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def ready(self):
+        """La instancia nueva ya muestra su ventana: la anterior puede cerrar"""
+        if self._conn is None:
+            return
+        try:
+            self._conn.sendall(READY)
+        except OSError:
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+def request_handoff(port, timeout=EXCHANGE_TIMEOUT):
+    """Pide el socket de escucha a la instancia que ocupa `port`
+
+    Devuelve (socket, HandoffLease), o None si no hay una instancia de
+    NeoPilot que lo pueda entregar (el puerto lo usa otro proceso).
+    """
+    path = control_path(port)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(str(path))
+        conn.sendall(HANDOFF_REQUEST)
+        message, fds, _, _ = socket.recv_fds(conn, 16, 1)
+    except OSError:
+        conn.close()
+        return None
+
+    if message != HANDOFF_OK or not fds:
+        for fd in fds:
+            os.close(fd)
+        conn.close()
+        return None
+
+    conn.settimeout(None)
+    return socket.socket(fileno=fds[0]), HandoffLease(conn)
+
+
+class HandoffListener:
+    """Lado de la instancia en marcha: entrega el socket a la siguiente
+
+    Tras entregar el descriptor llama a server.release() (deja de aceptar
+    y drena) y, cuando la nueva instancia avisa de que está lista, a
+    on_released() para que esta instancia termine. Si la nueva instancia
+    muere antes, esta vuelve a abrir el puerto y sigue sirviendo.
+    """
+
+    def __init__(self, server, port, on_released=None, drain_timeout=DEFAULT_DRAIN_TIMEOUT):
+        self.server = server
+        self.path = control_path(port)
+        self.on_released = on_released
+        self.drain_timeout = drain_timeout
+        self._sock = None
+        self._inode = None
+        self._thread = None
+
+    def start(self):
+        self._bind()
+        self._thread = threading.Thread(target=self._run, name="neopilot-handoff", daemon=True)
+        self._thread.start()
+
+    def _bind(self):
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Este proceso ya tiene el puerto: un socket de control previo es
+        # de una instancia que terminó o que nos acaba de entregar el suyo
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(str(self.path))
+        os.chmod(self.path, 0o600)
+        self._inode = os.stat(self.path).st_ino
+        self._sock.listen(1)
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                # Desbloquea el accept() del hilo
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        self._unlink()
+
+    def _unlink(self):
+        # Solo si la ruta sigue siendo nuestra (la nueva instancia ya pudo crear la suya)
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _run(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except (OSError, AttributeError):
+                return
+            with conn:
+                if self._handle(conn):
+                    return
+
+    def _handle(self, conn):
+        conn.settimeout(EXCHANGE_TIMEOUT)
+        try:
+            if _peer_uid(conn) != os.getuid() or conn.recv(16) != HANDOFF_REQUEST:
+                return False
+            httpd = self.server.httpd
+            if httpd is None:
+                return False
+            socket.send_fds(conn, [HANDOFF_OK], [httpd.fileno()])
+        except OSError:
+            return False
+
+        print("🔁 Socket HTTP entregado a la nueva instancia, drenando conexiones...")
+        self._unlink()
+        self.server.release(self.drain_timeout)
+
+        # Esperar a que la nueva instancia esté lista, desaparezca o se pase del plazo
+        conn.settimeout(READY_TIMEOUT)
+        try:
+            message = conn.recv(16)
+        except socket.timeout:
+            print(f"⚠️  La nueva instancia no estuvo lista en {READY_TIMEOUT:.0f} s, recuperando el puerto")
+            message = None
+        except OSError:
+            message = b""
+
+        if message == READY:
+            if self.on_released:
+                self.on_released()
+            return True
+
+        if message is not None:
+            print("⚠️  La nueva instancia terminó antes de estar lista, recuperando el puerto")
+        if not self._reclaim():
+            # Sin puerto esta instancia no sirve nada: salir y que systemd decida
+            if self.on_released:
+                self.on_released()
+            return True
+        return False
+
+    def _reclaim(self):
+        """Vuelve a abrir el puerto en cuanto la instancia fallida lo suelte; False si no se pudo"""
+        deadline = time.monotonic() + RECLAIM_TIMEOUT
+        delay = 0.02
+        while True:
+            try:
+                self.server.start()
+                break
+            except OSError:
+                if time.monotonic() + delay > deadline:
+                    print("❌ No se pudo recuperar el puerto HTTP")
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 0.25)
+
+        self._sock.close()
+        self._bind()
+        return True
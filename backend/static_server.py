@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Servidor estático concurrente
+Motor HTTP/1.1 con keep-alive compartido por kiosk_launcher y server_web
+"""
+
+import argparse
+import email.utils
+import http.server
+import ipaddress
+import os
+import selectors
+import signal
+import socket
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+from access_log import METRICS_PATH, HTTPMetrics, access_log_from_env, route_label
+from asset_cache import AssetCache, DEFAULT_MAX_BYTES, is_spa_route, normalize_url_path
+from asset_pack import load_pack
+
+# A partir de este tamaño los archivos van de la page cache al socket con sendfile
+SENDFILE_THRESHOLD = 64 * 1024
+
+
+def parse_range(header, size):
+    """Interpreta un header Range de un solo intervalo
+
+    Devuelve (inicio, fin) inclusivo, None si debe ignorarse (se sirve
+    completo) o False si el rango no es satisfacible (416).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        # Varios rangos: se permite responder con el archivo completo
+        return None
+
+    start, sep, end = spec.partition("-")
+    if not sep:
+        return None
+
+    try:
+        if not start:
+            # bytes=-N: los últimos N bytes
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(size - length, 0), size - 1
+
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+
+    if end and last < first:
+        # Sintácticamente inválido (bytes=5-2): RFC 9110 pide ignorarlo
+        return None
+    if first >= size:
+        return False
+    return first, min(last, size - 1)
+
+
+class StaticRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Handler HTTP/1.1 con conexiones persistentes (keep-alive)"""
+
+    protocol_version = "HTTP/1.1"
+
+    # Cerrar conexiones inactivas para no retener hilos indefinidamente
+    timeout = 15
+
+    # Cabeceras y cuerpo van en escrituras separadas: con Nagle el cuerpo
+    # espera al ACK retardado del cliente (~40 ms por petición en keep-alive)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == METRICS_PATH:
+            self.send_metrics(include_body=True)
+        elif not self.send_asset(include_body=True):
+            super().do_GET()
+
+    def do_HEAD(self):
+        if self.path.split("?", 1)[0] == METRICS_PATH:
+            self.send_metrics(include_body=False)
+        elif not self.send_asset(include_body=False):
+            super().do_HEAD()
+
+    def send_asset(self, include_body):
+        """Caché, disco y, para rutas del SPA (/rear, /settings...), index.html"""
+        if self.send_cached_asset(include_body) or self.send_file(include_body):
+            return True
+        if not is_spa_route(normalize_url_path(self.path)):
+            return False
+
+        # La ruta original se conserva para el log y las métricas
+        path, self.path = self.path, "/index.html"
+        try:
+            return self.send_cached_asset(include_body) or self.send_file(include_body)
+        finally:
+            self.path = path
+
+    def requested_range(self, size, etag):
+        """Rango pedido por el cliente, respetando If-Range"""
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range.strip() != etag:
+            return None
+        return parse_range(self.headers.get("Range"), size)
+
+    def send_range_not_satisfiable(self, size):
+        self.send_response(416)
+        self.send_header("Content-Range", f"bytes */{size}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_metrics(self, include_body):
+        """Responde /metrics en formato Prometheus; 404 si están desactivadas
+        o si el cliente no es local (salvo NEOPILOT_METRICS=all)"""
+        metrics = getattr(self.server, "metrics", None)
+        if metrics is None or not (getattr(self.server, "metrics_public", False) or self.client_is_local()):
+            self.send_error(404)
+            return
+
+        body = metrics.render(self.server).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def client_is_local(self):
+        try:
+            address = ipaddress.ip_address(self.client_address[0])
+        except (ValueError, IndexError):
+            return False
+        # ::ffff:127.0.0.1 en sockets de doble pila
+        address = getattr(address, "ipv4_mapped", None) or address
+        return address.is_loopback
+
+    def send_cached_asset(self, include_body):
+        """Responde desde el caché en memoria; False si hay que ir a disco"""
+        cache = getattr(self.server, "asset_cache", None)
+        if cache is None:
+            return False
+
+        asset = cache.get(self.path)
+        if asset is None:
+            return False
+
+        self._source = getattr(cache, "source", "memory")
+        encoding, body = asset.select(self.headers.get("Accept-Encoding"))
+
+        if asset.matches(self.headers.get("If-None-Match")):
+            self.send_response(304)
+            self.send_header("ETag", asset.etag_for(encoding))
+            self.send_header("Cache-Control", asset.cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return True
+
+        # Los rangos solo se sirven sobre la representación sin comprimir
+        byte_range = self.requested_range(asset.size, asset.etag_for(None))
+        if byte_range is False:
+            self.send_range_not_satisfiable(asset.size)
+            return True
+        if byte_range:
+            encoding, body = None, memoryview(asset.identity)[byte_range[0]:byte_range[1] + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {byte_range[0]}-{byte_range[1]}/{asset.size}")
+        else:
+            self.send_response(200)
+
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", asset.etag_for(encoding))
+        self.send_header("Cache-Control", asset.cache_control)
+        self.end_headers()
+
+        if include_body:
+            self.wfile.write(body)
+        return True
+
+    def send_file(self, include_body):
+        """Sirve un archivo de disco con soporte de Range
+
+        Los archivos grandes se envían con sendfile, sin copias en Python.
+        Devuelve False para directorios y rutas inexistentes.
+        """
+        path = self.translate_path(self.path)
+        if path.endswith("/") or os.path.isdir(path):
+            return False
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return False
+
+        self._source = "disk"
+        with f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return True
+
+            byte_range = self.requested_range(size, etag)
+            if byte_range is False:
+                self.send_range_not_satisfiable(size)
+                return True
+
+            if byte_range:
+                offset, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {byte_range[0]}-{byte_range[1]}/{size}")
+            else:
+                offset, count = 0, size
+                self.send_response(200)
+
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Length", str(count))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", email.utils.formatdate(st.st_mtime, usegmt=True))
+            self.end_headers()
+
+            if not include_body or count == 0:
+                return True
+
+            if count >= SENDFILE_THRESHOLD:
+                # socket.sendfile usa os.sendfile (zero-copy) cuando está disponible
+                self.connection.sendfile(f, offset, count)
+            else:
+                f.seek(offset)
+                self.wfile.write(f.read(count))
+        return True
+
+    def handle_one_request(self):
+        self._counted = False
+        self._status = None
+        self._length = 0
+        self._source = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._counted:
+                self.server.request_finished()
+                if self._status is not None:
+                    self.record_request()
+
+    def parse_request(self):
+        # La petición cuenta como en curso desde que se leyó la línea inicial
+        self._started = time.perf_counter()
+        ok = super().parse_request()
+        if ok and hasattr(self.server, "request_started"):
+            self.server.request_started()
+            self._counted = True
+        return ok
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword == "Content-Length":
+            self._length = int(value)
+        super().send_header(keyword, value)
+
+    def record_request(self):
+        """Métricas y log de accesos de la petición que acaba de terminar"""
+        metrics = getattr(self.server, "metrics", None)
+        access_log = getattr(self.server, "access_log", None)
+        if metrics is None and access_log is None:
+            return
+
+        duration = time.perf_counter() - self._started
+        status = self._status
+        size = 0 if self.command == "HEAD" or status in (204, 304) else self._length
+
+        if metrics is not None:
+            metrics.observe(route_label(self.path, status), self.command, status, size, duration, self._source)
+        if access_log is not None:
+            access_log.record(self.client_address[0], self.command, self.path, status, size,
+                              duration * 1000, self._source)
+
+    def end_headers(self):
+        # Durante el drenaje cada respuesta cierra su conexión: el cliente
+        # reconecta y el socket compartido lo lleva a la nueva instancia
+        if getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        # Las peticiones van al log de accesos asíncrono (record_request)
+        pass
+
+
+class StaticHTTPServer(http.server.ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión"""
+
+    daemon_threads = True
+    # SO_REUSEADDR antes del bind para poder reiniciar sin esperar TIME_WAIT
+    allow_reuse_address = True
+    # WebEngine abre muchas conexiones en paralelo durante el arranque
+    request_queue_size = 64
+
+    def __init__(self, server_address, RequestHandlerClass, asset_cache=None, listen_socket=None,
+                 metrics=None, access_log=None):
+        # Caché de assets compartido por todos los hilos (None = servir desde disco)
+        self.asset_cache = asset_cache
+        # NEOPILOT_METRICS: "1" solo para clientes locales, "all" para
+        # cualquiera, "0" desactivado; access_log=None no registra peticiones
+        metrics_mode = os.environ.get("NEOPILOT_METRICS", "1")
+        if metrics is None and metrics_mode != "0":
+            metrics = HTTPMetrics()
+        self.metrics = metrics
+        self.metrics_public = metrics_mode == "all"
+        self.access_log = access_log
+        # Se activa cuando el bucle de aceptación está corriendo
+        self.ready = threading.Event()
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._stopping = False
+        # Conexiones abiertas y peticiones en curso, para drenar antes de cerrar
+        self.draining = False
+        self._connections = set()
+        self._in_flight = 0
+        self._idle = threading.Condition()
+
+        if listen_socket is None:
+            super().__init__(server_address, RequestHandlerClass)
+        else:
+            # Socket ya escuchando, recibido de la instancia anterior
+            super().__init__(server_address, RequestHandlerClass, bind_and_activate=False)
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()
+        # Después del bind: si falla (puerto ocupado) no queda un pipe abierto
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    def serve_forever(self, poll_interval=None):
+        """Bucle de aceptación sin sondeo periódico
+
+        A diferencia de BaseServer.serve_forever no despierta cada 0.5 s:
+        shutdown() lo desbloquea al instante escribiendo en un pipe.
+        """
+        self._stopped.clear()
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(self, selectors.EVENT_READ)
+                selector.register(self._wakeup_r, selectors.EVENT_READ)
+                self.ready.set()
+
+                while not self._stopping:
+                    for key, _ in selector.select():
+                        if key.fileobj is self and not self._stopping:
+                            self._handle_request_noblock()
+                    self.service_actions()
+        finally:
+            self._stopping = False
+            self.ready.clear()
+            self._stopped.set()
+
+    def process_request(self, request, client_address):
+        with self._idle:
+            self._connections.add(request)
+        if self.metrics is not None:
+            self.metrics.connection_opened()
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        with self._idle:
+            self._connections.discard(request)
+        super().shutdown_request(request)
+
+    def connection_counts(self):
+        """(conexiones abiertas, peticiones en curso)"""
+        with self._idle:
+            return len(self._connections), self._in_flight
+
+    def request_started(self):
+        with self._idle:
+            self._in_flight += 1
+
+    def request_finished(self):
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+    def drain(self, timeout):
+        """Espera a las peticiones en curso y corta las conexiones keep-alive
+
+        Llamar después de shutdown(): ya no se aceptan conexiones nuevas.
+        Devuelve False si quedaron peticiones sin terminar al vencer el plazo.
+        """
+        self.draining = True
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+            connections = list(self._connections)
+        # Las conexiones inactivas esperan la siguiente petición: EOF las libera
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return drained
+
+    def shutdown(self):
+        """Detiene serve_forever y espera a que termine"""
+        self._stopping = True
+        os.write(self._wakeup_w, b"\0")
+        self._stopped.wait()
+
+    def server_close(self):
+        super().server_close()
+        # socketserver también lo llama si falla el bind, antes de crear el pipe
+        for fd in (getattr(self, "_wakeup_r", None), getattr(self, "_wakeup_w", None)):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._wakeup_r = self._wakeup_w = None
+
+
+class StaticServer:
+    """Sirve un directorio en segundo plano con StaticHTTPServer"""
+
+    def __init__(self, directory, port, host="", handler_class=StaticRequestHandler,
+                 cache_max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.port = port
+        self.host = host
+        self.handler_class = handler_class
+        # Con build.neopack se sirve desde el paquete mapeado; si no,
+        # desde el caché en memoria (cache_max_bytes=0 lo desactiva)
+        self.asset_cache = load_pack(self.directory)
+        if self.asset_cache is None and cache_max_bytes:
+            self.asset_cache = AssetCache(self.directory, cache_max_bytes)
+        # Log de accesos según NEOPILOT_ACCESS_LOG (desactivado por defecto)
+        self.access_log = access_log_from_env()
+        self.metrics = None
+        self.httpd = None
+        self.thread = None
+        # on_failure(error) se llama desde el hilo del servidor si serve_forever falla
+        self.on_failure = None
+        self._stop_requested = False
+
+    def start(self, timeout=5, listen_socket=None):
+        """Abre el puerto y atiende peticiones en un hilo daemon
+
+        Con listen_socket usa un socket ya escuchando (handoff) en lugar de
+        hacer bind. Retorna cuando el servidor ya acepta conexiones.
+        Lanza OSError si el puerto no está disponible.
+        """
+        handler = partial(self.handler_class, directory=str(self.directory))
+        self.httpd = StaticHTTPServer(
+            (self.host, self.port), handler,
+            asset_cache=self.asset_cache, listen_socket=listen_socket,
+            metrics=self.metrics, access_log=self.access_log
+        )
+        # Las métricas se conservan si el servidor se reinicia
+        self.metrics = self.httpd.metrics
+
+        self._stop_requested = False
+        self.thread = threading.Thread(
+            target=self._serve,
+            args=(self.httpd,),
+            name="neopilot-http",
+            daemon=True
+        )
+        self.thread.start()
+
+        if not self.httpd.ready.wait(timeout):
+            raise OSError("El servidor HTTP no arrancó a tiempo")
+
+        # Cargar el build en memoria sin retrasar la primera petición
+        if self.asset_cache:
+            threading.Thread(
+                target=self.asset_cache.warm,
+                name="neopilot-cache-warm",
+                daemon=True
+            ).start()
+
+    def _serve(self, httpd):
+        try:
+            httpd.serve_forever()
+        except Exception as e:
+            print(f"❌ El servidor HTTP se detuvo por un error: {e}")
+            if self.on_failure and not self._stop_requested:
+                self.on_failure(e)
+
+    def alive(self):
+        """True si el hilo del servidor sigue atendiendo peticiones"""
+        return bool(self.thread and self.thread.is_alive())
+
+    def release(self, drain_timeout=5):
+        """Deja de aceptar, termina las peticiones en curso y cierra
+
+        Se usa tras entregar el socket a otra instancia: el puerto sigue
+        abierto en ella y no hay ningún momento sin servidor.
+        """
+        self._stop_requested = True
+        if self.httpd:
+            self.httpd.shutdown()
+            if not self.httpd.drain(drain_timeout):
+                print("⚠️  Peticiones sin terminar al vencer el drenaje")
+        self.stop()
+
+    def stop(self, timeout=2):
+        """Detiene el servidor y libera el puerto"""
+        self._stop_requested = True
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+        if self.thread:
+            self.thread.join(timeout=timeout)
+
+        self.httpd = None
+        self.thread = None
+
+
+def main():
+    """Servidor independiente, usado por SimpleKioskLauncher"""
+    parser = argparse.ArgumentParser(description="NeoPilot - Servidor estático")
+    parser.add_argument("port", type=int, nargs="?", default=8080)
+    parser.add_argument("--directory", default=str(Path(__file__).parent.parent / "frontend" / "build"))
+    parser.add_argument("--bind", default="")
+    parser.add_argument("--ready-fd", type=int, default=None,
+                        help="descriptor donde se escribe un byte cuando el servidor está listo")
+    args = parser.parse_args()
+
+    # Las señales se atienden con sigwait en el hilo principal
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+
+    server = StaticServer(args.directory, args.port, host=args.bind)
+    server.start()
+
+    if args.ready_fd is not None:
+        os.write(args.ready_fd, b"1")
+        os.close(args.ready_fd)
+
+    signal.sigwait({signal.SIGINT, signal.SIGTERM})
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Supervisor en proceso
+Reinicia solo el componente que falló (renderer de WebEngine, hilo del
+servidor HTTP o navegador hijo) con backoff exponencial, sin relanzar
+todo el proceso, y mide el tiempo de recuperación de cada fallo. Un
+componente que falla una y otra vez agota su presupuesto de reinicios y
+el proceso termina con error para que systemd tome el relevo
+"""
+
+import statistics
+import threading
+import time
+from collections import deque
+
+from boot_trace import tracer
+
+INITIAL_DELAY = 0.5
+MAX_DELAY = 30.0
+BACKOFF_FACTOR = 2.0
+# Tras este tiempo sano el siguiente fallo vuelve a empezar por INITIAL_DELAY
+STABLE_AFTER = 60.0
+
+# Tiempos de recuperación que se guardan por componente
+RECOVERY_HISTORY = 20
+
+# RESTART_BUDGET fallos en BUDGET_WINDOW segundos y no se reintenta más
+RESTART_BUDGET = 5
+BUDGET_WINDOW = 300.0
+
+
+class RestartBudgetExceeded(RuntimeError):
+    """Un componente falló demasiadas veces seguidas"""
+
+
+class Backoff:
+    """Retardo exponencial que se reinicia cuando el componente se estabiliza"""
+
+    def __init__(self, initial=INITIAL_DELAY, maximum=MAX_DELAY, factor=BACKOFF_FACTOR,
+                 stable_after=STABLE_AFTER):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.stable_after = stable_after
+        self.attempt = 0
+        self._healthy_since = None
+
+    def next_delay(self):
+        if self._healthy_since is not None and time.monotonic() - self._healthy_since >= self.stable_after:
+            self.attempt = 0
+        self._healthy_since = None
+        delay = min(self.maximum, self.initial * self.factor ** self.attempt)
+        self.attempt += 1
+        return delay
+
+    def healthy(self):
+        self._healthy_since = time.monotonic()
+
+
+class Component:
+    """Estado de un componente supervisado"""
+
+    def __init__(self, name, restart, schedule, backoff):
+        self.name = name
+        self.restart = restart
+        self.schedule = schedule
+        self.backoff = backoff
+        self.failures = 0
+        self.restarts = 0
+        self.failed_at = None
+        self.exhausted = False
+        self.recent_failures = deque()
+        self.recoveries = deque(maxlen=RECOVERY_HISTORY)
+
+    def stats(self):
+        result = {
+            "failures": self.failures,
+            "restarts": self.restarts,
+            "recovering": self.failed_at is not None,
+            "exhausted": self.exhausted,
+        }
+        if self.recoveries:
+            result["last_recover_ms"] = round(self.recoveries[-1], 1)
+            result["median_recover_ms"] = round(statistics.median(self.recoveries), 1)
+        return result
+
+
+def blocking_schedule(delay, callback):
+    """Espera en el propio hilo; para bucles que ya esperan a un hijo"""
+    time.sleep(delay)
+    callback()
+
+
+def _thread_schedule(delay, callback):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+
+
+class Supervisor:
+    """Registro de componentes con reinicio independiente
+
+    Cada componente avisa con failed(name, reason) y con recovered(name)
+    cuando vuelve a estar operativo (p. ej. la página terminó de cargar).
+    restart() se llama tras el backoff con el `schedule` del componente:
+    threading.Timer por defecto, QTimer.singleShot para objetos de Qt.
+
+    Con `budget` fallos dentro de `window` segundos el componente no se
+    reinicia más: se llama a on_exhausted(name) o, sin él, failed() lanza
+    RestartBudgetExceeded en el hilo que informó del fallo.
+    """
+
+    def __init__(self, on_exhausted=None, budget=RESTART_BUDGET, window=BUDGET_WINDOW):
+        self.components = {}
+        self.on_exhausted = on_exhausted
+        self.budget = budget
+        self.window = window
+        self._lock = threading.Lock()
+
+    def register(self, name, restart, schedule=None, backoff=None):
+        component = Component(name, restart, schedule or _thread_schedule, backoff or Backoff())
+        self.components[name] = component
+        return component
+
+    def failed(self, name, reason=""):
+        component = self.components[name]
+        with self._lock:
+            component.failures += 1
+            now = time.monotonic()
+            recent = component.recent_failures
+            recent.append(now)
+            while now - recent[0] > self.window:
+                recent.popleft()
+            if len(recent) >= self.budget:
+                component.exhausted = True
+            else:
+                if component.failed_at is None:
+                    component.failed_at = now
+                delay = component.backoff.next_delay()
+
+        if component.exhausted:
+            print(f"❌ {name} falló {len(recent)} veces en {self.window / 60:.0f} min ({reason}); no se reinicia más")
+            tracer.mark("component_exhausted", component=name, reason=str(reason), failures=len(recent))
+            if self.on_exhausted is None:
+                raise RestartBudgetExceeded(name)
+            self.on_exhausted(name)
+            return
+
+        print(f"⚠️  {name} falló ({reason}); reinicio en {delay:.1f} s")
+        tracer.mark("component_failed", component=name, reason=str(reason), retry_in_s=delay)
+        component.schedule(delay, lambda: self._restart(component))
+
+    def recovered(self, name):
+        component = self.components[name]
+        with self._lock:
+            if component.failed_at is None:
+                return
+            elapsed_ms = (time.monotonic() - component.failed_at) * 1000
+            component.failed_at = None
+            component.recoveries.append(elapsed_ms)
+            component.backoff.healthy()
+
+        print(f"✅ {name} recuperado en {elapsed_ms:.0f} ms")
+        tracer.mark("component_recovered", component=name, recover_ms=round(elapsed_ms, 1))
+
+    def stats(self):
+        return {name: component.stats() for name, component in self.components.items()}
+
+    def _restart(self, component):
+        component.restarts += 1
+        try:
+            component.restart()
+        except Exception as e:
+            self.failed(component.name, f"reinicio fallido: {e}")
+
+
+def supervise_server(supervisor, server, name="http_server"):
+    """Reinicia el hilo de un StaticServer si serve_forever termina con error"""
+
+    def restart():
+        server.stop(timeout=1)
+        server.start()
+        supervisor.recovered(name)
+
+    supervisor.register(name, restart)
+    server.on_failure = lambda error: supervisor.failed(name, error)
+
+
+def supervise_renderer(supervisor, view, name="renderer"):
+    """Recarga la página de un QWebEngineView cuando su renderer muere
+
+    Se usa la señal de la vista (no la de la página) para seguir funcionando
+    cuando la página se reemplaza, p. ej. desde el monitor de memoria.
+    """
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+    def schedule(delay, callback):
+        QTimer.singleShot(int(delay * 1000), callback)
+
+    supervisor.register(name, view.reload, schedule=schedule)
+
+    def on_terminated(status, exit_code):
+        # La terminación normal ocurre al descartar una página a propósito
+        if status == QWebEnginePage.NormalTerminationStatus:
+            return
+        supervisor.failed(name, f"estado {int(status)}, código {exit_code}")
+
+    def on_load_finished(ok):
+        if ok:
+            supervisor.recovered(name)
+
+    view.renderProcessTerminated.connect(on_terminated)
+    view.loadFinished.connect(on_load_finished)
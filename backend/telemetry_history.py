@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Historial de telemetría
+Guarda las muestras de hardware.py en un archivo de anillos de registros
+binarios de ancho fijo (bruto, 1 minuto y 1 hora) mapeado en memoria.
+Las escrituras se agrupan y se hacen por páginas completas una vez por
+minuto, para gastar lo mínimo de la tarjeta SD; las consultas por rango
+son búsquedas binarias sobre el mapa
+"""
+
+import atexit
+import fcntl
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH = Path.home() / ".cache" / "neopilot" / "telemetry.ring"
+
+MAGIC = b"NEOTELE1"
+PAGE_SIZE = mmap.PAGESIZE
+HEADER = struct.Struct("<8sII")
+TIER_HEADER = struct.Struct("<II")
+
+# ts, muestras, reservado, throttled, y 8 valores float16:
+# cpu media/máx, temperatura media/máx, memoria media, disponible mín (MB),
+# frecuencia media/mín (MHz). 32 bytes: 128 registros por página
+RECORD = struct.Struct("<IHHI8e4x")
+# Mayor valor finito de float16: por encima (p. ej. más de 64 GB libres) se satura
+HALF_MAX = 65504.0
+
+FIELDS = (
+    "timestamp", "samples", "throttled",
+    "cpu_percent", "cpu_percent_max",
+    "temperature_c", "temperature_max_c",
+    "memory_percent", "memory_available_min_mb",
+    "cpu_freq_mhz", "cpu_freq_min_mhz",
+)
+# Posiciones dentro de un registro (tupla con FIELDS) según cómo se agregan
+AVG_FIELDS = (3, 5, 7, 9)
+MAX_FIELDS = (4, 6)
+MIN_FIELDS = (8, 10)
+
+# (nombre, segundos por registro, capacidad): 6 h en bruto a 1 Hz,
+# 14 días por minuto y un año por hora (~1.6 MB en total)
+TIERS = (
+    ("raw", 0, 21632),
+    ("minute", 60, 20224),
+    ("hour", 3600, 8832),
+)
+
+# Las muestras pendientes se escriben como mucho una vez por intervalo
+FLUSH_INTERVAL = 60.0
+
+# Cada cuánto un proceso lector intenta pasar a ser el escritor
+WRITER_RETRY = 5.0
+
+# Puntos por defecto de una consulta (lo que dibuja una gráfica)
+DEFAULT_MAX_POINTS = 500
+
+
+def _unpack(buffer, offset):
+    ts, samples, _, throttled, *values = RECORD.unpack_from(buffer, offset)
+    return (ts, samples, throttled, *values)
+
+
+def _pack(buffer, offset, record):
+    RECORD.pack_into(buffer, offset, record[0], record[1], 0, record[2], *map(_half, record[3:]))
+
+
+def _half(value):
+    """Valor representable en float16 (NaN se conserva)"""
+    return max(-HALF_MAX, min(value, HALF_MAX)) if value == value else value
+
+
+def record_from_sample(values):
+    """Registro bruto a partir de una muestra de HardwareSampler"""
+    timestamp, cpu, temperature, memory, available, throttled = values[:6]
+    frequencies = [v for v in values[6:] if not math.isnan(v)]
+    freq_avg = sum(frequencies) / len(frequencies) if frequencies else math.nan
+    freq_min = min(frequencies) if frequencies else math.nan
+    values = map(_half, (cpu, cpu, temperature, temperature, memory, available, freq_avg, freq_min))
+    return (int(timestamp), 1, int(throttled), *values)
+
+
+class _Bucket:
+    """Agrega registros de un intervalo (medias ponderadas, máx, mín, OR de flags)"""
+
+    __slots__ = ("start", "samples", "throttled", "sums", "weights", "extremes")
+
+    def __init__(self, start):
+        self.start = start
+        self.samples = 0
+        self.throttled = 0
+        self.sums = {i: 0.0 for i in AVG_FIELDS}
+        self.weights = {i: 0 for i in AVG_FIELDS}
+        self.extremes = {i: math.nan for i in MAX_FIELDS + MIN_FIELDS}
+
+    def add(self, record):
+        weight = record[1]
+        self.samples += weight
+        self.throttled |= record[2]
+        for i in AVG_FIELDS:
+            if not math.isnan(record[i]):
+                self.sums[i] += record[i] * weight
+                self.weights[i] += weight
+        for i in MAX_FIELDS:
+            if not math.isnan(record[i]) and not record[i] <= self.extremes[i]:
+                self.extremes[i] = record[i]
+        for i in MIN_FIELDS:
+            if not math.isnan(record[i]) and not record[i] >= self.extremes[i]:
+                self.extremes[i] = record[i]
+
+    def record(self):
+        values = [self.start, min(self.samples, 0xFFFF), self.throttled] + [math.nan] * 8
+        for i in AVG_FIELDS:
+            if self.weights[i]:
+                values[i] = self.sums[i] / self.weights[i]
+        for i, value in self.extremes.items():
+            values[i] = value
+        return tuple(values)
+
+
+class _Tier:
+    """Anillo de registros dentro del archivo"""
+
+    def __init__(self, name, step, capacity, offset):
+        self.name = name
+        self.step = step
+        self.capacity = capacity
+        self.offset = offset
+        self.size = capacity * RECORD.size
+        # Registros totales (en el archivo y pendientes) y posición del siguiente
+        self.count = 0
+        self.head = 0
+        self.pending = []
+        self.bucket = None
+
+    def scan(self, view):
+        """Recupera head y count a partir de las marcas de tiempo del archivo"""
+        region = view[self.offset:self.offset + self.size]
+        stamps = [ts for (ts,) in struct.iter_unpack("<I28x", region)]
+        self.count = sum(1 for ts in stamps if ts)
+        self.head = max(range(self.capacity), key=stamps.__getitem__) + 1 if self.count else 0
+        self.head %= self.capacity
+        self.pending = []
+
+    def last_timestamp(self, view):
+        if not self.count:
+            return 0
+        return self.read(view, self.count - 1)[0]
+
+    def append(self, record):
+        self.pending.append(record)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def read(self, view, logical):
+        """Registro `logical` (0 = el más antiguo), incluidos los pendientes"""
+        in_file = self.count - len(self.pending)
+        if logical >= in_file:
+            return self.pending[logical - in_file]
+        physical = (self.head - self.count + logical) % self.capacity
+        return _unpack(view, self.offset + physical * RECORD.size)
+
+    def bisect(self, view, timestamp):
+        """Primer registro con marca de tiempo >= timestamp"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.read(view, middle)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def dirty_pages(self, view):
+        """Páginas completas con los registros pendientes aplicados"""
+        pages = {}
+        first = (self.head - len(self.pending)) % self.capacity
+        for i, record in enumerate(self.pending):
+            position = self.offset + ((first + i) % self.capacity) * RECORD.size
+            page_start = position - position % PAGE_SIZE
+            page = pages.get(page_start)
+            if page is None:
+                page = pages[page_start] = bytearray(view[page_start:page_start + PAGE_SIZE])
+            _pack(page, position - page_start, record)
+        return pages
+
+
+class TelemetryHistory:
+    """Historial de telemetría en un archivo de anillos mapeado en memoria
+
+    Un solo proceso escribe (flock); los demás abren el archivo en solo
+    lectura y reintentan ser el escritor cada WRITER_RETRY segundos, de
+    modo que durante el relevo entre instancias no se duplican muestras.
+    """
+
+    def __init__(self, path=None, tiers=TIERS, flush_interval=FLUSH_INTERVAL):
+        self.path = Path(path or os.environ.get("NEOPILOT_HISTORY_PATH", DEFAULT_PATH))
+        self.flush_interval = flush_interval
+        self.writable = False
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_retry = 0.0
+        self._mtime_ns = None
+
+        offset = PAGE_SIZE
+        self.tiers = []
+        for name, step, capacity in tiers:
+            tier = _Tier(name, step, capacity, offset)
+            self.tiers.append(tier)
+            offset += -(-tier.size // PAGE_SIZE) * PAGE_SIZE
+        self.file_size = offset
+        self.by_name = {tier.name: tier for tier in self.tiers}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not self._valid_header():
+            self._create()
+        self._map = mmap.mmap(self._fd, self.file_size, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        self._try_become_writer()
+        if not self.writable:
+            self._rescan()
+
+    # --- Archivo ---
+
+    def _header(self):
+        header = HEADER.pack(MAGIC, RECORD.size, len(self.tiers))
+        header += b"".join(TIER_HEADER.pack(tier.step, tier.capacity) for tier in self.tiers)
+        return header
+
+    def _valid_header(self):
+        expected = self._header()
+        return (os.fstat(self._fd).st_size == self.file_size
+                and os.pread(self._fd, len(expected), 0) == expected)
+
+    def _create(self):
+        """Archivo nuevo (o con otro formato): disperso, solo se escribe la cabecera
+
+        Lanza OSError si otro proceso lo está escribiendo con otro formato.
+        """
+        fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self.file_size)
+        os.pwrite(self._fd, self._header().ljust(PAGE_SIZE, b"\0"), 0)
+
+    def _try_become_writer(self):
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self.writable = True
+        self._rescan()
+        self._reseed()
+        return True
+
+    def _rescan(self):
+        for tier in self.tiers:
+            tier.scan(self._view)
+        self._mtime_ns = os.fstat(self._fd).st_mtime_ns
+
+    def _reseed(self):
+        """Rehace los intervalos a medias con lo que ya está en el archivo
+
+        Tras un reinicio, el minuto y la hora en curso siguen incluyendo
+        las muestras anteriores al reinicio.
+        """
+        # Nivel a nivel: los intervalos que se cerraron sin llegar a
+        # escribirse se recuperan y cuentan para el nivel siguiente
+        for source, target in zip(self.tiers, self.tiers[1:]):
+            since = target.last_timestamp(self._view) + target.step if target.count else 0
+            target.bucket = None
+            for logical in range(source.bisect(self._view, since), source.count):
+                self._aggregate(target, source.read(self._view, logical), propagate=False)
+
+    # --- Escritura ---
+
+    def record(self, values):
+        """Añade una muestra de HardwareSampler (listener del sampler)"""
+        with self._lock:
+            if not self.writable:
+                if time.monotonic() - self._last_retry < WRITER_RETRY:
+                    return
+                self._last_retry = time.monotonic()
+                if not self._try_become_writer():
+                    return
+
+            raw = self.tiers[0]
+            record = record_from_sample(values)
+            # Reloj hacia atrás (RTC ausente, ajuste de NTP): se descarta
+            # hasta volver a pasar la última marca para mantener el orden
+            if raw.count and record[0] < raw.read(self._view, raw.count - 1)[0]:
+                return
+
+            raw.append(record)
+            if len(self.tiers) > 1:
+                self._aggregate(self.tiers[1], record)
+
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _aggregate(self, tier, record, propagate=True):
+        """Suma el registro al intervalo abierto de `tier`; al cambiar de
+        intervalo el anterior se guarda y, con propagate, pasa al nivel siguiente"""
+        start = record[0] - record[0] % tier.step
+        if tier.bucket is not None and tier.bucket.start != start:
+            closed = tier.bucket.record()
+            tier.bucket = None
+            tier.append(closed)
+            index = self.tiers.index(tier)
+            if propagate and index + 1 < len(self.tiers):
+                self._aggregate(self.tiers[index + 1], closed)
+        if tier.bucket is None:
+            tier.bucket = _Bucket(start)
+        tier.bucket.add(record)
+
+    def flush(self):
+        """Escribe los registros pendientes (por páginas completas)"""
+        with self._lock:
+            if self.writable:
+                self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        for tier in self.tiers:
+            if not tier.pending:
+                continue
+            try:
+                pages = tier.dirty_pages(self._view)
+            except (struct.error, OverflowError) as e:
+                # Sin descartarlos, cada flush volvería a fallar y pending crecería sin límite
+                print(f"⚠️  Registros de telemetría descartados ({tier.name}): {e}")
+                tier.scan(self._view)
+                continue
+            for page_start, page in sorted(pages.items()):
+                os.pwrite(self._fd, page, page_start)
+                self.writes += 1
+            tier.pending = []
+
+    def close(self):
+        with self._lock:
+            if self._map is None:
+                return
+            if self.writable:
+                self._flush()
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._view.release()
+            self._map.close()
+            self._map = None
+            os.close(self._fd)
+
+    # --- Consulta ---
+
+    def query(self, start=None, end=None, tier=None, max_points=DEFAULT_MAX_POINTS):
+        """Registros entre start y end (epoch en segundos), en columnas por fila
+
+        Sin `tier` se elige el más detallado que cubre el rango entero; si
+        salen más de max_points filas se vuelven a agregar por grupos.
+        """
+        end = time.time() if end is None else end
+        start = end - 3600 if start is None else start
+
+        with self._lock:
+            if self._map is None:
+                return {"tier": None, "fields": list(FIELDS), "rows": []}
+            if not self.writable:
+                self._refresh()
+
+            selected = self.by_name[tier] if tier else self._tier_for(start, end, max_points)
+            first = selected.bisect(self._view, int(start))
+            last = selected.bisect(self._view, int(end) + 1)
+            records = [selected.read(self._view, i) for i in range(first, last)]
+
+        if max_points and len(records) > max_points:
+            group = -(-len(records) // max_points)
+            merged = []
+            for i in range(0, len(records), group):
+                bucket = _Bucket(records[i][0])
+                for record in records[i:i + group]:
+                    bucket.add(record)
+                merged.append(bucket.record())
+            records = merged
+
+        return {
+            "tier": selected.name,
+            "step_s": selected.step,
+            "fields": list(FIELDS),
+            "rows": [[_clean(value) for value in record] for record in records],
+        }
+
+    def _tier_for(self, start, end, max_points):
+        # Niveles que tienen el rango entero (un anillo sin llenar tiene todo el historial)
+        covering = [
+            tier for tier in self.tiers
+            if tier.count and (tier.count < tier.capacity or tier.read(self._view, 0)[0] <= start)
+        ]
+        if not covering:
+            return self.tiers[0]
+        # El más grueso que aún da max_points puntos; si ninguno, el más fino
+        for tier in reversed(covering):
+            if tier.step and max_points and (end - start) / tier.step >= max_points:
+                return tier
+        return covering[0]
+
+    def _refresh(self):
+        # Otro proceso escribe: releer las cabezas solo si el archivo cambió
+        if os.fstat(self._fd).st_mtime_ns != self._mtime_ns:
+            self._rescan()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "writable": self.writable,
+                "page_writes": self.writes,
+                "tiers": {tier.name: {"records": tier.count, "pending": len(tier.pending)} for tier in self.tiers},
+            }
+
+
+def _clean(value):
+    """NaN no es JSON válido: se reporta como None"""
+    if isinstance(value, float):
+        return None if math.isnan(value) else round(value, 2)
+    return value
+
+
+_default_history = None
+_default_lock = threading.Lock()
+
+
+def get_history():
+    """Historial compartido por el proceso (NEOPILOT_HISTORY_PATH cambia el archivo)"""
+    global _default_history
+    with _default_lock:
+        if _default_history is None:
+            _default_history = TelemetryHistory()
+            atexit.register(_default_history.close)
+    return _default_history
+
+
+def attach_history(sampler):
+    """Guarda cada muestra del sampler; NEOPILOT_HISTORY=0 lo desactiva"""
+    if os.environ.get("NEOPILOT_HISTORY", "1") == "0":
+        return None
+    try:
+        history = get_history()
+    except OSError as e:
+        print(f"⚠️  Historial de telemetría desactivado: {e}")
+        return None
+    sampler.add_listener(history.record)
+    return history
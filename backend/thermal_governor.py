@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Gobernador térmico del render
+Con el SoC caliente o con throttling activo baja el nivel de efectos de
+la interfaz (full, reduced, minimal) para que el compositor no compita
+con el throttling; vuelve a subirlo con histéresis cuando la
+temperatura se recupera
+"""
+
+import os
+import threading
+import time
+
+FULL, REDUCED, MINIMAL = "full", "reduced", "minimal"
+TIERS = (FULL, REDUCED, MINIMAL)
+
+# Umbrales de temperatura del SoC (°C); el firmware de la Pi limita a partir de 80-85
+REDUCED_TEMP_C = 70.0
+MINIMAL_TEMP_C = 78.0
+
+# Para bajar de nivel la temperatura debe quedar HYSTERESIS_C por debajo
+# del umbral durante RECOVERY_HOLD segundos
+HYSTERESIS_C = 5.0
+RECOVERY_HOLD = 30.0
+
+# Bits de get_throttled activos ahora mismo (ver hardware.THROTTLE_FLAGS)
+REDUCED_FLAGS = (1 << 1) | (1 << 3)  # frecuencia limitada, límite térmico suave
+MINIMAL_FLAGS = 1 << 2  # throttling
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class ThermalGovernor:
+    """Nivel de render según temperatura y flags de throttling
+
+    Subir de nivel es inmediato; bajar se hace de uno en uno y solo tras
+    RECOVERY_HOLD segundos por debajo del umbral menos la histéresis,
+    para no alternar estilos con cada muestra cerca del límite.
+    """
+
+    def __init__(self, reduced_c=REDUCED_TEMP_C, minimal_c=MINIMAL_TEMP_C,
+                 hysteresis_c=HYSTERESIS_C, recovery_hold=RECOVERY_HOLD):
+        self.reduced_c = reduced_c
+        self.minimal_c = minimal_c
+        self.hysteresis_c = hysteresis_c
+        self.recovery_hold = recovery_hold
+        self.tier = FULL
+        self.temperature_c = None
+        self.throttled = 0
+        self.changes = 0
+        self.listeners = []
+        self._recovering_since = None
+        self._lock = threading.Lock()
+
+    def level_for(self, temperature_c, throttled, margin=0.0):
+        """Índice en TIERS que corresponde a una lectura (NaN no cuenta)"""
+        if throttled & MINIMAL_FLAGS or temperature_c + margin >= self.minimal_c:
+            return 2
+        if throttled & REDUCED_FLAGS or temperature_c + margin >= self.reduced_c:
+            return 1
+        return 0
+
+    def update(self, temperature_c, throttled, now=None):
+        """Procesa una lectura; devuelve el nivel nuevo si cambió, o None"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.temperature_c = temperature_c
+            self.throttled = throttled
+            current = TIERS.index(self.tier)
+
+            if self.level_for(temperature_c, throttled) > current:
+                self._recovering_since = None
+                return self._set(self.level_for(temperature_c, throttled))
+
+            if self.level_for(temperature_c, throttled, self.hysteresis_c) >= current:
+                self._recovering_since = None
+                return None
+
+            if self._recovering_since is None:
+                self._recovering_since = now
+                return None
+            if now - self._recovering_since < self.recovery_hold:
+                return None
+            # Un nivel por vez; el siguiente necesita otro periodo de espera
+            self._recovering_since = now
+            return self._set(current - 1)
+
+    def on_sample(self, values):
+        """Listener del HardwareSampler (timestamp, cpu, temperatura, ..., throttled)"""
+        tier = self.update(values[2], int(values[5]))
+        if tier is not None:
+            print(f"🌡️  Nivel de render: {tier} ({values[2]:.1f} °C, throttled=0x{int(values[5]):x})")
+            for listener in self.listeners:
+                listener(self.to_dict())
+
+    def add_listener(self, callback):
+        """callback(state) se llama desde el hilo de muestreo en cada cambio de nivel"""
+        self.listeners.append(callback)
+
+    def to_dict(self):
+        temperature = self.temperature_c
+        return {
+            "tier": self.tier,
+            "temperature_c": None if temperature is None or temperature != temperature else round(temperature, 1),
+            "throttled": self.throttled,
+        }
+
+    def _set(self, level):
+        self.tier = TIERS[level]
+        self.changes += 1
+        return self.tier
+
+
+_default_governor = None
+_default_lock = threading.Lock()
+
+
+def get_governor():
+    """Gobernador compartido, enganchado al sampler de hardware
+
+    NEOPILOT_THERMAL=0 lo desactiva (devuelve None); los umbrales se
+    cambian con NEOPILOT_THERMAL_REDUCED_C y NEOPILOT_THERMAL_MINIMAL_C.
+    """
+    global _default_governor
+    if os.environ.get("NEOPILOT_THERMAL", "1") == "0":
+        return None
+    with _default_lock:
+        if _default_governor is None:
+            from hardware import get_sampler
+
+            _default_governor = ThermalGovernor(
+                reduced_c=_env_float("NEOPILOT_THERMAL_REDUCED_C", REDUCED_TEMP_C),
+                minimal_c=_env_float("NEOPILOT_THERMAL_MINIMAL_C", MINIMAL_TEMP_C),
+            )
+            get_sampler().add_listener(_default_governor.on_sample)
+    return _default_governor
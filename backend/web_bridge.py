@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Puente QWebChannel para el kiosko
+Expone las sondas del backend y el lanzador de apps directamente a la
+página, sin HTTP ni WebSocket: las consultas son llamadas en proceso y
+el estado ("system", "apps", "render") llega como deltas por una señal de Qt.
+El cliente JS (frontend/src/backendClient.js) usa este transporte si
+existe y el de red si no
+"""
+
+import json
+import os
+import threading
+
+# Nombre del objeto en la página: channel.objects.neopilot
+BRIDGE_NAME = "neopilot"
+
+# Script que Qt incluye en sus recursos; se inyecta antes que el bundle
+QWEBCHANNEL_JS = ":/qtwebchannel/qwebchannel.js"
+SCRIPT_NAME = "neopilot-qwebchannel"
+
+_MISSING = object()
+
+_bridge_class = None
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def install_web_bridge(view, profile=None, bridge=None):
+    """Registra el puente en la página de un QWebEngineView
+
+    Con varias ventanas se pasa el `bridge` de la primera: todas comparten
+    el mismo estado y el mismo lanzador de apps. Devuelve el BackendBridge,
+    o None si está desactivado (NEOPILOT_WEB_BRIDGE=0) o falta
+    QtWebChannel; en ese caso el frontend sigue usando la API por red.
+    """
+    if os.environ.get("NEOPILOT_WEB_BRIDGE", "1") == "0":
+        return None
+
+    page = view.page()
+    profile = profile or page.profile()
+    try:
+        from PyQt5.QtWebChannel import QWebChannel
+        if bridge is None:
+            bridge = create_bridge(parent=profile)
+    except ImportError as e:
+        print(f"⚠️  Puente QWebChannel no disponible: {e}")
+        return None
+
+    if not _inject_qwebchannel_js(profile):
+        print("⚠️  qwebchannel.js no encontrado, el frontend usará la API por red")
+        return None
+
+    channel = QWebChannel(view)
+    channel.registerObject(BRIDGE_NAME, bridge)
+    page.setWebChannel(channel)
+    print("🔌 Puente QWebChannel activo: el frontend habla con el backend en proceso")
+    return bridge
+
+
+def _inject_qwebchannel_js(profile):
+    """Añade qwebchannel.js a los scripts del perfil (una sola vez)"""
+    from PyQt5.QtCore import QFile, QIODevice
+    from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+    scripts = profile.scripts()
+    if scripts.findScripts(SCRIPT_NAME):
+        return True
+
+    source = QFile(QWEBCHANNEL_JS)
+    if not source.open(QIODevice.ReadOnly):
+        return False
+    code = bytes(source.readAll()).decode()
+    source.close()
+
+    script = QWebEngineScript()
+    script.setName(SCRIPT_NAME)
+    script.setSourceCode(code)
+    # En el mundo principal y antes que cualquier script de la página
+    script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+    script.setWorldId(QWebEngineScript.MainWorld)
+    script.setRunsOnSubFrames(False)
+    scripts.insert(script)
+    return True
+
+
+def create_bridge(parent=None):
+    """Crea el BackendBridge (PyQt5 se importa aquí, no al cargar el módulo)"""
+    global _bridge_class
+
+    if _bridge_class is None:
+        from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+        from PyQt5.QtWidgets import QApplication
+
+        from probes import create_registry, telemetry_history
+
+        class BackendBridge(QObject):
+            # topic, delta en JSON; la página se suscribe con state.connect()
+            state = pyqtSignal(str, str)
+            # id de la petición, respuesta en JSON (comandos que no bloquean la UI)
+            reply = pyqtSignal(str, str)
+
+            # Apps externas abiertas; las ventanas del kiosko se apartan mientras haya alguna
+            apps_running = pyqtSignal(int)
+
+            # Emitida desde cualquier hilo; _apply corre en el hilo de Qt
+            _staged = pyqtSignal(str, dict)
+
+            def __init__(self, parent=None):
+                super().__init__(parent)
+                self.registry = create_registry()
+                self.topics = {}
+                self.launcher = None
+                self._launcher_lock = threading.Lock()
+                self._sampler = None
+                self._staged.connect(self._apply)
+
+                app = QApplication.instance()
+                if app is not None:
+                    app.aboutToQuit.connect(self.shutdown)
+
+            # --- API para la página -------------------------------------
+
+            @pyqtSlot(str, str, result=str)
+            def query(self, name, params_json):
+                """Sonda por nombre: {"ok": true, "data": ...} o {"ok": false, "error": ...}"""
+                try:
+                    params = json.loads(params_json) if params_json else {}
+                    if name == "telemetry_history":
+                        data = telemetry_history(
+                            params.get("start"), params.get("end"),
+                            tier=params.get("tier"), points=int(params.get("points", 500)),
+                        )
+                    else:
+                        data = self.registry.query(name)
+                except KeyError:
+                    return _dumps({"ok": False, "error": f"consulta desconocida: {name}"})
+                except Exception as e:
+                    return _dumps({"ok": False, "error": str(e)})
+                return _dumps({"ok": True, "data": data})
+
+            @pyqtSlot(str, str, str)
+            def send(self, request_id, message_type, data_json):
+                """Mismos mensajes que el servidor WebSocket; la respuesta llega por reply"""
+                def run():
+                    try:
+                        data = json.loads(data_json) if data_json else {}
+                        result = self._handle(message_type, data)
+                    except Exception as e:
+                        result = {"type": "error", "data": {"request": message_type, "error": str(e)}}
+                    self.reply.emit(request_id, _dumps(result))
+
+                # launch_app bloquea en posix_spawnp hasta el exec: fuera del hilo de Qt
+                threading.Thread(target=run, name="neopilot-bridge-send", daemon=True).start()
+
+            @pyqtSlot(result=str)
+            def snapshot(self):
+                """Estado completo por topic; el cliente lo toma al conectarse"""
+                self._ensure_sources()
+                return _dumps(self.topics)
+
+            # --- Estado -------------------------------------------------
+
+            def publish(self, topic, fields):
+                """Actualiza campos de un topic desde cualquier hilo"""
+                self._staged.emit(topic, dict(fields))
+
+            def _apply(self, topic, fields):
+                current = self.topics.setdefault(topic, {})
+                delta = {
+                    key: value for key, value in fields.items()
+                    if current.get(key, _MISSING) != value
+                }
+                if delta:
+                    current.update(delta)
+                    self.state.emit(topic, _dumps(delta))
+
+            def _ensure_sources(self):
+                """Engancha el sampler de hardware la primera vez que la página lo pide"""
+                if self._sampler is None:
+                    from hardware import get_sampler
+
+                    self._sampler = get_sampler()
+                    self._sampler.add_listener(
+                        lambda values: self.publish("system", self._sampler.to_dict(values))
+                    )
+                    latest = self._sampler.latest()
+                    if latest:
+                        self._apply("system", latest)
+
+                    # Nivel de efectos de la interfaz según la temperatura del SoC
+                    from thermal_governor import get_governor
+
+                    governor = get_governor()
+                    if governor is not None:
+                        governor.add_listener(lambda state: self.publish("render", state))
+                        self._apply("render", governor.to_dict())
+                self._get_launcher()
+
+            def _get_launcher(self):
+                with self._launcher_lock:
+                    if self.launcher is None:
+                        from app_launcher import AppLauncher
+                        from apps_config import get_registry
+
+                        def on_change(status, event):
+                            running = sum(s["running"] for s in status.values())
+                            self.publish("apps", {"status": status, "running": running})
+                            self.apps_running.emit(running)
+
+                        self.launcher = AppLauncher(get_registry(), on_change=on_change)
+                        self.launcher.start()
+                        self.publish("apps", {"status": self.launcher.status(), "running": 0})
+                    return self.launcher
+
+            def _handle(self, message_type, data):
+                if message_type == "get_status":
+                    return {"type": "status", "data": self.topics}
+                if message_type == "apps_config":
+                    return {"type": "apps_config", "data": self.registry.query("apps_config")}
+                launcher = self._get_launcher()
+                if message_type == "launch_app":
+                    return launcher.launch(data["app_id"])
+                if message_type == "close_app":
+                    return launcher.close(data["app_id"], bool(data.get("force")))
+                if message_type == "app_stats":
+                    return {"type": "app_stats", "data": launcher.stats()}
+                return {"type": "error", "data": {"error": f"tipo desconocido: {message_type}"}}
+
+            def shutdown(self):
+                with self._launcher_lock:
+                    launcher, self.launcher = self.launcher, None
+                if launcher is not None:
+                    launcher.shutdown()
+
+        _bridge_class = BackendBridge
+
+    return _bridge_class(parent)
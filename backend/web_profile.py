@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Perfil persistente de QtWebEngine
+Caché HTTP en disco con tamaño fijo y caché de código V8 entre arranques
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+# Ubicación de caché y almacenamiento del perfil (NEOPILOT_PROFILE_DIR lo cambia)
+DEFAULT_PROFILE_DIR = Path.home() / ".cache" / "neopilot" / "webengine"
+
+# Tamaño máximo de la caché HTTP en disco (NEOPILOT_HTTP_CACHE_MB lo cambia)
+DEFAULT_HTTP_CACHE_MB = 64
+
+# Archivo con el hash del build que llenó la caché
+BUILD_STAMP = "build-hash"
+
+PROFILE_NAME = "neopilot"
+
+
+def frontend_build_hash(build_dir):
+    """Hash del build del frontend
+
+    asset-manifest.json lista los nombres con hash de CRA, así que cambia
+    con cualquier cambio del bundle. Si no existe se usa index.html.
+    """
+    build_dir = Path(build_dir)
+    for name in ("asset-manifest.json", "index.html"):
+        try:
+            data = (build_dir / name).read_bytes()
+        except OSError:
+            continue
+        return hashlib.blake2b(data, digest_size=12).hexdigest()
+    return None
+
+
+def profile_dir():
+    return Path(os.environ.get("NEOPILOT_PROFILE_DIR", DEFAULT_PROFILE_DIR))
+
+
+def create_kiosk_profile(build_dir, parent=None):
+    """Crea el QWebEngineProfile persistente del kiosko
+
+    Un perfil con nombre no es off-the-record: Chromium guarda la caché
+    HTTP en disco y, junto a ella ("Code Cache"), el código compilado por
+    V8, de modo que los arranques en caliente no vuelven a parsear ni
+    compilar el bundle. Chromium solo genera caché de código para
+    recursos http(s); con neopilot:// el bundle se recompila en cada boot.
+    """
+    from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+
+    base = profile_dir()
+    cache_mb = int(os.environ.get("NEOPILOT_HTTP_CACHE_MB", DEFAULT_HTTP_CACHE_MB))
+
+    profile = QWebEngineProfile(PROFILE_NAME, parent)
+    profile.setPersistentStoragePath(str(base / "storage"))
+    profile.setCachePath(str(base / "cache"))
+    profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+    profile.setHttpCacheMaximumSize(cache_mb * 1024 * 1024)
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
+
+    bust_stale_cache(profile, build_dir, base)
+    return profile
+
+
+def bust_stale_cache(profile, build_dir, base):
+    """Vacía la caché HTTP si el build del frontend cambió desde el último arranque"""
+    current = frontend_build_hash(build_dir)
+    if current is None:
+        return False
+
+    stamp = base / BUILD_STAMP
+    try:
+        previous = stamp.read_text().strip()
+    except OSError:
+        previous = None
+
+    if previous == current:
+        return False
+
+    if previous is not None:
+        print("🧹 Nuevo build del frontend, limpiando caché de WebEngine")
+        profile.clearHttpCache()
+
+    try:
+        base.mkdir(parents=True, exist_ok=True)
+        stamp.write_text(current)
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar el hash del build: {e}")
+    return previous is not None
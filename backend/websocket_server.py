@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+NeoPilot - Servidor WebSocket
+Empuja el estado del sistema a los clientes del kiosko: agrupa
+actualizaciones rápidas por topic, envía solo los campos que cambian
+y fusiona frames para clientes lentos en lugar de encolarlos sin límite
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+
+DEFAULT_HOST = "localhost"
+DEFAULT_PORT = 8765
+
+# Ventana en la que se agrupan las actualizaciones de un mismo topic
+COALESCE_WINDOW = 0.05
+
+# Mensajes entrantes pendientes por cliente antes de aplicar backpressure
+MAX_INCOMING_QUEUE = 16
+
+_MISSING = object()
+
+
+class ClientChannel:
+    """Cola de salida de un cliente: como mucho un delta pendiente por topic
+
+    Si el cliente no consume a tiempo, los deltas nuevos se fusionan con
+    los pendientes, de modo que la memoria por cliente está acotada por
+    el tamaño del estado y no por el ritmo de actualizaciones.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.pending = {}
+        self.merged = 0
+        self.sent = 0
+        self._wakeup = asyncio.Event()
+
+    def push(self, topic, delta):
+        current = self.pending.get(topic)
+        if current is None:
+            self.pending[topic] = dict(delta)
+        else:
+            current.update(delta)
+            self.merged += 1
+        self._wakeup.set()
+
+    async def send(self, message):
+        await self.websocket.send(json.dumps(message, separators=(",", ":")))
+
+    async def writer(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            pending, self.pending = self.pending, {}
+            for topic, fields in pending.items():
+                # send() espera al drenaje del socket: esa espera es el backpressure
+                await self.send({"type": "state", "topic": topic, "data": fields})
+                self.sent += 1
+
+
+class StateHub:
+    """Estado por topic y difusión de deltas a los clientes conectados"""
+
+    def __init__(self, coalesce_window=COALESCE_WINDOW):
+        self.coalesce_window = coalesce_window
+        self.state = {}
+        self.clients = set()
+        self.handlers = {"get_status": self._handle_get_status}
+        self.loop = None
+        self._staged = {}
+        self._flush_handle = None
+
+    def publish(self, topic, fields):
+        """Actualiza campos de un topic (desde el hilo del event loop)"""
+        self._staged.setdefault(topic, {}).update(fields)
+        if self._flush_handle is None:
+            loop = self.loop or asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.coalesce_window, self._flush)
+
+    def publish_threadsafe(self, topic, fields):
+        """Como publish(), pero se puede llamar desde cualquier hilo"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish, topic, dict(fields))
+
+    def register_handler(self, message_type, handler):
+        """handler(data) -> dict responde a mensajes {"type": message_type}"""
+        self.handlers[message_type] = handler
+
+    def _flush(self):
+        self._flush_handle = None
+        staged, self._staged = self._staged, {}
+
+        for topic, fields in staged.items():
+            current = self.state.setdefault(topic, {})
+            delta = {
+                key: value for key, value in fields.items()
+                if current.get(key, _MISSING) != value
+            }
+            if not delta:
+                continue
+            current.update(delta)
+            for client in self.clients:
+                client.push(topic, delta)
+
+    async def handle_client(self, websocket):
+        channel = ClientChannel(websocket)
+
+        # El estado completo se envía como un delta inicial por topic
+        for topic, fields in self.state.items():
+            channel.push(topic, fields)
+
+        self.clients.add(channel)
+        writer = asyncio.create_task(channel.writer())
+        try:
+            async for raw in websocket:
+                await self._handle_message(channel, raw)
+        except Exception as e:
+            if not _is_connection_closed(e):
+                print(f"⚠️  Error en cliente WebSocket: {e}")
+        finally:
+            self.clients.discard(channel)
+            writer.cancel()
+
+    async def _handle_message(self, channel, raw):
+        try:
+            message = json.loads(raw)
+            message_type = message.get("type")
+            data = message.get("data") or {}
+        except (ValueError, AttributeError):
+            await channel.send({"type": "error", "data": {"error": "mensaje inválido"}})
+            return
+
+        handler = self.handlers.get(message_type)
+        if handler is None:
+            await channel.send({"type": "error", "data": {"error": f"tipo desconocido: {message_type}"}})
+            return
+
+        try:
+            result = handler(data)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception as e:
+            await channel.send({"type": "error", "data": {"request": message_type, "error": str(e)}})
+            return
+
+        if result is not None:
+            await channel.send(result)
+
+    def _handle_get_status(self, data):
+        return {"type": "status", "data": self.state}
+
+
+def _is_connection_closed(error):
+    return type(error).__name__.startswith("ConnectionClosed")
+
+
+async def serve(hub, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Atiende clientes WebSocket hasta que se cancele la tarea"""
+    import websockets
+
+    hub.loop = asyncio.get_running_loop()
+    async with websockets.serve(
+        hub.handle_client,
+        host,
+        port,
+        max_queue=MAX_INCOMING_QUEUE,
+        compression=None,
+    ):
+        print(f"✅ Servidor WebSocket activo en ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def attach_hardware(hub):
+    """Publica cada muestra del sampler de hardware en el topic "system" """
+    from hardware import get_sampler
+
+    sampler = get_sampler()
+    sampler.add_listener(lambda values: hub.publish_threadsafe("system", sampler.to_dict(values)))
+    return sampler
+
+
+def attach_thermal_governor(hub):
+    """Publica el nivel de render (full, reduced, minimal) en el topic "render" """
+    from thermal_governor import get_governor
+
+    governor = get_governor()
+    if governor is not None:
+        governor.add_listener(lambda state: hub.publish_threadsafe("render", state))
+        hub.publish("render", governor.to_dict())
+    return governor
+
+
+def attach_app_launcher(hub):
+    """Atiende launch_app/close_app y publica el estado en el topic "apps" """
+    from app_launcher import AppLauncher
+    from apps_config import get_registry
+    from probes import probe_apps_config
+
+    def on_change(status, event):
+        hub.publish_threadsafe("apps", {"status": status, "running": sum(s["running"] for s in status.values())})
+
+    launcher = AppLauncher(get_registry(), on_change=on_change)
+    launcher.start()
+    hub.publish("apps", {"status": launcher.status(), "running": 0})
+
+    async def launch_app(data):
+        # posix_spawnp bloquea hasta el exec (y lee el ejecutable de la SD): fuera del event loop
+        return await hub.loop.run_in_executor(None, launcher.launch, data["app_id"])
+
+    hub.register_handler("launch_app", launch_app)
+    hub.register_handler("close_app", lambda data: launcher.close(data["app_id"], bool(data.get("force"))))
+    hub.register_handler("app_stats", lambda data: {"type": "app_stats", "data": launcher.stats()})
+    hub.register_handler("apps_config", lambda data: {"type": "apps_config", "data": probe_apps_config()})
+    return launcher
+
+
+def main():
+    host = os.environ.get("NEOPILOT_WS_HOST", DEFAULT_HOST)
+    port = int(os.environ.get("NEOPILOT_WS_PORT", DEFAULT_PORT))
+
+    print("🔌 NeoPilot - Servidor WebSocket")
+
+    async def run():
+        hub = StateHub()
+        hub.loop = asyncio.get_running_loop()
+        attach_hardware(hub)
+        attach_thermal_governor(hub)
+        launcher = attach_app_launcher(hub)
+
+        task = asyncio.ensure_future(serve(hub, host, port))
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            hub.loop.add_signal_handler(sig, task.cancel)
+        try:
+            await task
+        except asyncio.CancelledError:
+            print("\n👋 Servidor WebSocket detenido")
+        finally:
+            launcher.shutdown()
+
+    try:
+        asyncio.run(run())
+    except ImportError as e:
+        print(f"❌ websockets no disponible: {e}")
+        print("💡 Instala dependencias: pip install -r requirements.txt")
+        return 1
+    except OSError as e:
+        print(f"❌ No se pudo abrir el puerto {port}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
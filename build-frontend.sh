@@ -1,3 +1,10 @@
-cd "/home/ian/Desktop/neeopilot/frontend"
-npm run build
+#!/bin/bash
 
+# Compilar el frontend y empaquetarlo en frontend/build.neopack
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+cd "$SCRIPT_DIR/frontend" || exit 1
+npm run build || exit 1
+
+# Un solo archivo con índice: los servidores lo mapean en memoria en lugar
+# de leer miles de archivos pequeños de la tarjeta SD (y se despliega con un solo scp)
+python3 "$SCRIPT_DIR/backend/asset_pack.py" "$SCRIPT_DIR/frontend/build"
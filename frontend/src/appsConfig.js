@@ -0,0 +1,135 @@
+import {
+  Navigation,
+  Music,
+  Phone,
+  Settings,
+  Camera,
+  MessageCircle,
+  Map,
+  Radio,
+  Thermometer,
+  Car,
+  AppWindow
+} from 'lucide-react';
+
+import { API_BASE, getBackendClient } from './backendClient';
+
+// The app registry lives in config/apps.json. The kiosk reads it through the
+// QWebChannel bridge, the browser fallback from the REST API (revalidated with
+// its ETag). It is kept in memory and in localStorage so the home screen can
+// render from cache on the next boot. A copy exported at build time
+// (public/apps-config.json) covers a first boot with no backend reachable.
+export { API_BASE };
+
+const BUNDLED_URL = `${process.env.PUBLIC_URL || ''}/apps-config.json`;
+
+const STORAGE_KEY = 'neopilot.appsConfig';
+
+const ICONS = {
+  Navigation,
+  Music,
+  Phone,
+  Settings,
+  Camera,
+  MessageCircle,
+  Map,
+  Radio,
+  Thermometer,
+  Car
+};
+
+const EMPTY_CONFIG = { byId: {}, main: [], quick: [] };
+
+let current = null;
+let pending = null;
+
+// Builds the id index and section lists once per payload
+const buildConfig = (payload) => {
+  const config = { byId: {}, main: [], quick: [] };
+  for (const app of payload.apps || []) {
+    const entry = { ...app, icon: ICONS[app.icon] || AppWindow };
+    config.byId[app.id] = entry;
+    (config[app.section] || config.main).push(entry);
+  }
+  return config;
+};
+
+const readStored = () => {
+  try {
+    const stored = JSON.parse(window.localStorage.getItem(STORAGE_KEY));
+    return stored && stored.payload ? stored : null;
+  } catch (e) {
+    return null;
+  }
+};
+
+export const getAppsConfig = () => {
+  if (!current) {
+    const stored = readStored();
+    current = stored ? buildConfig(stored.payload) : EMPTY_CONFIG;
+  }
+  return current;
+};
+
+export const getApp = (appId) => getAppsConfig().byId[appId];
+
+// Resolves { etag, payload }, or null when the stored copy is still current
+const fetchFromBackend = (stored) => {
+  const client = getBackendClient();
+  if (client.transport === 'qt') {
+    return client.query('apps_config').then(({ etag, config }) =>
+      stored && stored.etag === etag ? null : { etag, payload: config }
+    );
+  }
+
+  const headers = stored && stored.etag ? { 'If-None-Match': stored.etag } : {};
+  return fetch(`${API_BASE}/api/apps/config`, { headers }).then(async (response) => {
+    if (response.status === 304 && stored) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error(`apps config: HTTP ${response.status}`);
+    }
+    return { etag: response.headers.get('ETag'), payload: await response.json() };
+  });
+};
+
+// Build-time copy; not stored, so the backend's version wins once reachable
+const loadBundled = () =>
+  fetch(BUNDLED_URL)
+    .then((response) => {
+      if (!response.ok) {
+        throw new Error(`bundled apps config: HTTP ${response.status}`);
+      }
+      return response.json();
+    })
+    .then((payload) => {
+      current = buildConfig(payload);
+      return current;
+    })
+    .catch(() => getAppsConfig());
+
+export const loadAppsConfig = () => {
+  if (pending) {
+    return pending;
+  }
+
+  const stored = readStored();
+
+  pending = fetchFromBackend(stored)
+    .then((result) => {
+      if (!result) {
+        return getAppsConfig();
+      }
+      try {
+        window.localStorage.setItem(STORAGE_KEY, JSON.stringify(result));
+      } catch (e) {
+        // Storage full or unavailable: the in-memory copy is enough
+      }
+      current = buildConfig(result.payload);
+      return current;
+    })
+    .catch(() => (stored ? getAppsConfig() : loadBundled()));
+
+  return pending;
+};
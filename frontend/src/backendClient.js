@@ -0,0 +1,187 @@
+// One client API over two transports:
+//  - "qt": the kiosk build exposes the backend in-process through QWebChannel
+//    (backend/web_bridge.py), so queries are local calls and state arrives as
+//    Qt signals.
+//  - "network": the browser fallback (SimpleKioskLauncher, npm start) uses the
+//    REST API for queries and the WebSocket server for state and commands.
+// Both deliver state as per-topic deltas; subscribers get the merged topic.
+export const API_BASE = process.env.REACT_APP_NEOPILOT_API || 'http://127.0.0.1:5000';
+export const WS_URL = process.env.REACT_APP_NEOPILOT_WS || 'ws://127.0.0.1:8765';
+
+const RECONNECT_MIN_MS = 500;
+const RECONNECT_MAX_MS = 10000;
+
+let client = null;
+
+const hasQtChannel = () =>
+  typeof window !== 'undefined' &&
+  window.qt &&
+  window.qt.webChannelTransport &&
+  typeof window.QWebChannel === 'function';
+
+// Merged state per topic and its listeners, shared by both transports
+const createTopics = () => {
+  const state = {};
+  const listeners = {};
+
+  return {
+    state,
+    apply(topic, delta) {
+      const merged = { ...state[topic], ...delta };
+      state[topic] = merged;
+      (listeners[topic] || []).forEach((callback) => callback(merged, delta));
+    },
+    subscribe(topic, callback) {
+      (listeners[topic] = listeners[topic] || []).push(callback);
+      if (state[topic]) {
+        callback(state[topic], state[topic]);
+      }
+      return () => {
+        listeners[topic] = (listeners[topic] || []).filter((cb) => cb !== callback);
+      };
+    },
+  };
+};
+
+const createQtClient = () => {
+  const topics = createTopics();
+  const pending = {};
+  let nextId = 0;
+
+  const bridge = new Promise((resolve) => {
+    new window.QWebChannel(window.qt.webChannelTransport, (channel) => {
+      const backend = channel.objects.neopilot;
+      backend.state.connect((topic, delta) => topics.apply(topic, JSON.parse(delta)));
+      backend.reply.connect((id, message) => {
+        const request = pending[id];
+        if (request) {
+          delete pending[id];
+          const parsed = JSON.parse(message);
+          if (parsed.type === 'error') {
+            request.reject(new Error(parsed.data.error));
+          } else {
+            request.resolve(parsed);
+          }
+        }
+      });
+      backend.snapshot((snapshot) => {
+        const state = JSON.parse(snapshot);
+        Object.keys(state).forEach((topic) => topics.apply(topic, state[topic]));
+      });
+      resolve(backend);
+    });
+  });
+
+  return {
+    transport: 'qt',
+    query: (name, params = {}) =>
+      bridge.then((backend) => new Promise((resolve, reject) => {
+        backend.query(name, JSON.stringify(params), (result) => {
+          const parsed = JSON.parse(result);
+          if (parsed.ok) {
+            resolve(parsed.data);
+          } else {
+            reject(new Error(parsed.error));
+          }
+        });
+      })),
+    send: (type, data = {}) =>
+      bridge.then((backend) => new Promise((resolve, reject) => {
+        const id = String(nextId++);
+        pending[id] = { resolve, reject };
+        backend.send(id, type, JSON.stringify(data));
+      })),
+    subscribe: topics.subscribe,
+  };
+};
+
+const queryUrl = (name, params) => {
+  if (name === 'telemetry_history') {
+    const search = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value !== undefined && value !== null)
+    );
+    return `${API_BASE}/api/telemetry/history?${search}`;
+  }
+  return `${API_BASE}/api/${encodeURIComponent(name)}`;
+};
+
+const createNetworkClient = () => {
+  const topics = createTopics();
+  // The server answers each client's commands in order
+  const waiting = [];
+  const outbox = [];
+  let socket = null;
+  let retryMs = RECONNECT_MIN_MS;
+
+  const connect = () => {
+    socket = new WebSocket(WS_URL);
+    socket.onopen = () => {
+      retryMs = RECONNECT_MIN_MS;
+      outbox.splice(0).forEach((message) => socket.send(message));
+    };
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === 'state') {
+        topics.apply(message.topic, message.data);
+        return;
+      }
+      const request = waiting.shift();
+      if (!request) {
+        return;
+      }
+      if (message.type === 'error') {
+        request.reject(new Error(message.data.error));
+      } else {
+        request.resolve(message);
+      }
+    };
+    socket.onclose = () => {
+      outbox.length = 0;
+      waiting.splice(0).forEach((request) => request.reject(new Error('backend disconnected')));
+      setTimeout(connect, retryMs);
+      retryMs = Math.min(retryMs * 2, RECONNECT_MAX_MS);
+    };
+  };
+
+  const ensureSocket = () => {
+    if (!socket) {
+      connect();
+    }
+  };
+
+  return {
+    transport: 'network',
+    query: (name, params = {}) =>
+      fetch(queryUrl(name, params)).then(async (response) => {
+        const body = await response.json();
+        if (!response.ok) {
+          throw new Error(body.error || `${name}: HTTP ${response.status}`);
+        }
+        return body;
+      }),
+    send: (type, data = {}) => {
+      ensureSocket();
+      return new Promise((resolve, reject) => {
+        const message = JSON.stringify({ type, data });
+        waiting.push({ resolve, reject });
+        if (socket.readyState === WebSocket.OPEN) {
+          socket.send(message);
+        } else {
+          outbox.push(message);
+        }
+      });
+    },
+    subscribe: (topic, callback) => {
+      ensureSocket();
+      return topics.subscribe(topic, callback);
+    },
+  };
+};
+
+// The transport is picked once: qwebchannel.js is injected before the bundle runs
+export const getBackendClient = () => {
+  if (!client) {
+    client = hasQtChannel() ? createQtClient() : createNetworkClient();
+  }
+  return client;
+};
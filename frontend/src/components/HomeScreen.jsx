@@ -1,17 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import AppIcon from './AppIcon';
-import { 
-  Navigation, 
-  Music, 
-  Phone, 
-  Settings, 
-  Camera, 
-  MessageCircle,
-  Map,
-  Radio,
-  Thermometer,
-  Car
-} from 'lucide-react';
+import { getAppsConfig, loadAppsConfig } from '../appsConfig';
+import { getBackendClient } from '../backendClient';
 
 const HomeScreen = () => {
   const [activeApps, setActiveApps] = useState(['waze', 'spotify']);
@@ -25,84 +15,41 @@ const HomeScreen = () => {
     return () => clearTimeout(timer);
   }, []);
 
-  const appData = [
-    {
-      id: 'waze',
-      label: 'Waze',
-      icon: Navigation,
-      color: 'cyan',
-      isActive: activeApps.includes('waze')
-    },
-    {
-      id: 'spotify',
-      label: 'Spotify',
-      icon: Music,
-      color: 'green',
-      isActive: activeApps.includes('spotify')
-    },
-    {
-      id: 'phone',
-      label: 'Phone',
-      icon: Phone,
-      color: 'blue',
-      isActive: activeApps.includes('phone')
-    },
-    {
-      id: 'messages',
-      label: 'Messages',
-      icon: MessageCircle,
-      color: 'purple',
-      isActive: activeApps.includes('messages')
-    },
-    {
-      id: 'camera',
-      label: 'Camera',
-      icon: Camera,
-      color: 'orange',
-      isActive: activeApps.includes('camera')
-    },
-    {
-      id: 'settings',
-      label: 'Settings',
-      icon: Settings,
-      color: 'pink',
-      isActive: activeApps.includes('settings')
-    }
-  ];
+  // Registry from the backend (config/apps.json); starts from the cached copy
+  const [appsConfig, setAppsConfig] = useState(getAppsConfig);
 
-  const quickAccessData = [
-    {
-      id: 'maps',
-      label: 'Maps',
-      icon: Map,
-      color: 'cyan'
-    },
-    {
-      id: 'radio',
-      label: 'Radio',
-      icon: Radio,
-      color: 'green'
-    },
-    {
-      id: 'climate',
-      label: 'Climate',
-      icon: Thermometer,
-      color: 'blue'
-    },
-    {
-      id: 'vehicle',
-      label: 'Vehicle',
-      icon: Car,
-      color: 'purple'
+  useEffect(() => {
+    let cancelled = false;
+    loadAppsConfig().then((config) => {
+      if (!cancelled) {
+        setAppsConfig(config);
+      }
+    });
+    return () => {
+      cancelled = true;
+    };
+  }, []);
+
+  // Running apps as reported by the backend (QWebChannel or WebSocket)
+  useEffect(() => getBackendClient().subscribe('apps', ({ status }) => {
+    if (status) {
+      setActiveApps(Object.keys(status).filter((id) => status[id].running));
     }
-  ];
+  }), []);
+
+  const appData = appsConfig.main;
+  const quickAccessData = appsConfig.quick;
 
   const handleAppClick = (appId) => {
+    const running = activeApps.includes(appId);
     setActiveApps(prev => 
       prev.includes(appId) 
         ? prev.filter(id => id !== appId)
         : [...prev, appId]
     );
+    getBackendClient()
+      .send(running ? 'close_app' : 'launch_app', { app_id: appId })
+      .catch(() => {});
   };
 
   return (
@@ -121,7 +68,7 @@ const HomeScreen = () => {
               icon={app.icon}
               label={app.label}
               color={app.color}
-              isActive={app.isActive}
+              isActive={activeApps.includes(app.id)}
               onClick={() => handleAppClick(app.id)}
               animationDelay={index * 100}
               size="large"
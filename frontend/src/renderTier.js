@@ -0,0 +1,16 @@
+import { getBackendClient } from './backendClient';
+
+// The backend thermal governor (backend/thermal_governor.py) publishes a
+// rendering tier on the "render" topic: full, reduced or minimal. It is
+// mirrored on <html data-render-tier>, and index.css drops blur, glow and
+// animations per tier so the compositor stays idle while the SoC throttles.
+export const RENDER_TIERS = ['full', 'reduced', 'minimal'];
+
+export const watchRenderTier = (root = document.documentElement) => {
+  root.dataset.renderTier = 'full';
+  return getBackendClient().subscribe('render', ({ tier }) => {
+    if (RENDER_TIERS.includes(tier) && root.dataset.renderTier !== tier) {
+      root.dataset.renderTier = tier;
+    }
+  });
+};
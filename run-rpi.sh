@@ -52,18 +52,8 @@ fi
 export QT_QPA_PLATFORM=xcb
 export DISPLAY=:0
 
-# Función de limpieza al salir
-cleanup() {
-    pkill -f "server_web.py" 2>/dev/null || true
-    pkill -f "kiosk_launcher.py" 2>/dev/null || true
-    exit 0
-}
-
-# Configurar manejadores de señales
-trap cleanup SIGINT SIGTERM
-
 # Ejecutar el launcher de kiosko
-python3 backend/kiosk_launcher.py
-
-# Cleanup al finalizar
-cleanup
+# exec: las señales llegan directamente al launcher, que cierra su servidor.
+# Si ya hay una instancia en marcha, la nueva toma su socket HTTP y la
+# anterior se cierra sola cuando la nueva ventana está lista (sin pkill).
+exec python3 backend/kiosk_launcher.py